@@ -0,0 +1,299 @@
+"""
+pytest-benchmark suite for the hot paths of the integration.
+
+Cases:
+- frame decode throughput of FrameStream.read_data_once()
+- setup_entities() of the sensor and binary_sensor platforms
+- a coordinator refresh fanned out to 100, 500 and 2000 CoordinatedSensors
+- f_get_native_value calls of hundreds of ComposableSensors per refresh,
+  with and without the per-generation memo
+- cold import time of custom_components.kwb_heaters
+
+The decode case only needs the protocol package. The others need Home
+Assistant (and pykwb for setup_entities) and are skipped without it.
+
+The file is not collected by a plain pytest run. Run it explicitly and keep
+the results as JSON, one file per run, to compare versions:
+
+    python -m pytest benchmarks/bench_integration.py --benchmark-autosave
+    python -m pytest benchmarks/bench_integration.py --benchmark-compare \\
+        --benchmark-compare-fail=mean:10%
+
+Results go to .benchmarks/ (see --benchmark-storage). A single JSON file
+can be written with --benchmark-json=FILE instead.
+"""
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+import itertools
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+# Repository root for custom_components, src for the protocol package alone
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "custom_components", "kwb_heaters", "src"))
+from decode_throughput import (  # noqa: E402
+    encode_message,
+    payload_size,
+    synthetic_signal_maps,
+)
+from impl.derived import DerivedValues  # noqa: E402
+from impl.protocol.compiled import CompiledMessageDecoder  # noqa: E402
+from impl.protocol.decoder import MessageDecoder  # noqa: E402
+from impl.protocol.stream import READ_SIZE, FrameStream  # noqa: E402
+from impl.snapshot import ValueTable  # noqa: E402
+
+MESSAGE_IDS = [32, 33, 64, 65]
+
+
+class LoopedSource:
+    """Byte source that returns the same recorded traffic over and over,
+    in reads of READ_SIZE like a busy socket."""
+
+    def __init__(self, data: bytes):
+        self._chunks = itertools.cycle(
+            [data[i : i + READ_SIZE] for i in range(0, len(data), READ_SIZE)]
+        )
+
+    def open(self, timeout: float):
+        pass
+
+    def read(self, timeout: float) -> bytes:
+        return next(self._chunks)
+
+    def close(self):
+        pass
+
+
+def _traffic(cycles: int = 100) -> bytes:
+    """Frames of every message id in turn, with changing payloads."""
+    return b"".join(
+        encode_message(
+            message_id, bytes((cycle + i) % 256 for i in range(payload_size(message_id)))
+        )
+        for cycle in range(cycles)
+        for message_id in MESSAGE_IDS
+    )
+
+
+@pytest.mark.parametrize("decoder_class", [MessageDecoder, CompiledMessageDecoder])
+def test_read_data_once(benchmark, decoder_class):
+    signal_maps = synthetic_signal_maps()
+    stream = FrameStream(
+        source=LoopedSource(_traffic()),
+        decoder=decoder_class(signal_maps, MESSAGE_IDS),
+        derived=DerivedValues({}, {}),
+        connect_timeout=1,
+    )
+    stream.open()
+
+    data = benchmark(stream.read_data_once, MESSAGE_IDS, 5)
+
+    assert data
+    assert not stream.missing_message_ids
+    benchmark.extra_info["frames"] = stream.stats.frames
+
+
+def _device_info(domain: str) -> dict:
+    return {
+        "identifiers": {(domain, "bench")},
+        "manufacturer": "KWB",
+        "name": "KWB Easyfire",
+        "model": "Easyfire",
+    }
+
+
+@pytest.mark.parametrize("platform", ["sensor", "binary_sensor"])
+def test_setup_entities(benchmark, platform):
+    pytest.importorskip("homeassistant")
+    pytest.importorskip("pykwb")
+    from custom_components.kwb_heaters.const import (
+        CONF_BOILER_EFFICIENCY,
+        CONF_BOILER_NOMINAL_POWER,
+        CONF_PELLET_NOMINAL_ENERGY,
+        DOMAIN,
+    )
+
+    if platform == "sensor":
+        from custom_components.kwb_heaters.src.impl.config.sensor.entities import (
+            setup_entities,
+        )
+    else:
+        from custom_components.kwb_heaters.src.impl.config.binary_sensor.entities import (
+            setup_entities,
+        )
+
+    # setup_entities() stores the coordinator, asks its appliance for the
+    # connection type and reads the config entry
+    coordinator = SimpleNamespace(data=None, appliance=SimpleNamespace(native=False))
+    config_entry = SimpleNamespace(
+        options={},
+        data={
+            CONF_BOILER_NOMINAL_POWER: 15,
+            CONF_BOILER_EFFICIENCY: 90.0,
+            CONF_PELLET_NOMINAL_ENERGY: 4.8,
+        }
+    )
+
+    entities = benchmark(
+        lambda: list(setup_entities(_device_info(DOMAIN), coordinator, config_entry))
+    )
+
+    assert entities
+    benchmark.extra_info["entities"] = len(entities)
+
+
+def _coordinator(tmp_path, appliance):
+    import logging
+
+    from homeassistant.core import HomeAssistant
+
+    from custom_components.kwb_heaters.coordinator import Coordinator
+
+    async def create():
+        # HomeAssistant wants a running event loop
+        return Coordinator(
+            HomeAssistant(str(tmp_path)), logging.getLogger(__name__), appliance, name="bench"
+        )
+
+    return asyncio.run(create())
+
+
+@pytest.mark.parametrize("changed", [1.0, 0.1])
+@pytest.mark.parametrize("entities", [100, 500, 2000])
+def test_coordinator_fan_out(benchmark, tmp_path, entities, changed):
+    """One refresh in which the share `changed` of all values changed."""
+    pytest.importorskip("homeassistant")
+    from custom_components.kwb_heaters.const import DOMAIN
+    from custom_components.kwb_heaters.src.api.platform.sensor.sensor_coordinated import (
+        CoordinatedSensor,
+    )
+    from custom_components.kwb_heaters.src.api.platform.sensor.sensor_description import (
+        SensorDescription,
+    )
+
+    values = ValueTable()
+    appliance = SimpleNamespace(snapshot=values.snapshot)
+    coordinator = _coordinator(tmp_path, appliance)
+
+    writes = 0
+
+    def write_ha_state():
+        nonlocal writes
+        writes += 1
+
+    device_info = _device_info(DOMAIN)
+    keys = [f"signal_{i}" for i in range(entities)]
+    for key in keys:
+        sensor = CoordinatedSensor(
+            coordinator, SensorDescription(key=key, name=key), device_info
+        )
+        # Everything up to the state machine write, which needs a running hass
+        sensor.async_write_ha_state = write_ha_state
+        coordinator.async_add_listener(sensor._handle_coordinator_update, key)
+
+    changed_keys = keys[: max(int(entities * changed), 1)]
+    counter = itertools.count()
+
+    def refresh():
+        value = next(counter)
+        appliance.snapshot = values.update({key: value for key in changed_keys})
+        coordinator.async_update_listeners()
+
+    # First refresh notifies everyone, measure the steady state
+    refresh()
+    writes = 0
+    benchmark(refresh)
+
+    assert writes
+    benchmark.extra_info["writes_per_refresh"] = len(changed_keys)
+
+
+@pytest.mark.parametrize("memoized", [True, False])
+@pytest.mark.parametrize("entities", [100, 500])
+def test_composable_fan_out(benchmark, tmp_path, entities, memoized):
+    """One refresh of composable sensors, each state write reading the value
+    a few times like Home Assistant does."""
+    pytest.importorskip("homeassistant")
+    from custom_components.kwb_heaters.const import DOMAIN
+    from custom_components.kwb_heaters.src.api.platform.sensor.sensor_composable import (
+        ComposableSensor,
+        ComposableSensorDescription,
+    )
+
+    calls = 0
+
+    def get_native_value(sensor):
+        nonlocal calls
+        calls += 1
+        return sensor.coordinator.data.get(sensor.entity_description.key)
+
+    @dataclass
+    class Description(ComposableSensorDescription):
+        f_get_unique_sensor_id: Callable = lambda sensor: sensor.entity_description.key
+        f_get_native_value: Callable = get_native_value
+        f_on_init: Callable = lambda sensor: None
+        f_on_coordinator_update: Callable = lambda sensor: None
+
+    class UnmemoizedSensor(ComposableSensor):
+        @property
+        def native_value(self):
+            return self.entity_description.f_get_native_value(self)
+
+    values = ValueTable()
+    appliance = SimpleNamespace(snapshot=values.snapshot)
+    coordinator = _coordinator(tmp_path, appliance)
+
+    def write_ha_state(sensor):
+        # state, and the attributes that depend on the value
+        return sensor.state, sensor.native_value, sensor.native_value
+
+    sensor_class = ComposableSensor if memoized else UnmemoizedSensor
+    keys = [f"signal_{i}" for i in range(entities)]
+    for key in keys:
+        sensor = sensor_class(
+            entity_description=Description(key=key, name=key),
+            device_info=_device_info(DOMAIN),
+            coordinator=coordinator,
+        )
+        sensor.async_write_ha_state = lambda sensor=sensor: write_ha_state(sensor)
+        coordinator.async_add_listener(sensor._handle_coordinator_update)
+
+    counter = itertools.count()
+
+    def refresh():
+        value = next(counter)
+        appliance.snapshot = values.update({key: value for key in keys})
+        coordinator.async_update_listeners()
+
+    refresh()
+    calls = 0
+    benchmark(refresh)
+
+    rounds = next(counter) - 1
+    benchmark.extra_info["calls_per_sensor_per_refresh"] = calls / rounds / entities
+
+
+def test_cold_import(benchmark):
+    """Import custom_components.kwb_heaters in a fresh interpreter.
+
+    Includes interpreter start up, about 20 ms. python -X importtime shows
+    where the rest goes.
+    """
+    pytest.importorskip("homeassistant")
+    command = [sys.executable, "-c", "import custom_components.kwb_heaters"]
+    # Fail here rather than benchmark an ImportError
+    subprocess.run(command, cwd=ROOT, check=True)
+
+    benchmark.pedantic(
+        subprocess.run,
+        args=(command,),
+        kwargs={"cwd": ROOT, "check": True},
+        rounds=10,
+        iterations=1,
+    )
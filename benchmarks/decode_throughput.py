@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Compare read throughput of pykwb and the native reader on the same stream.
+
+A local TCP server plays the gateway and streams the same pre-encoded
+frames over and over. pykwb's KWBMessageStream and the native FrameStream
+with CompiledMessageDecoder each connect to it and run read_data_once()
+cycles, as the scrape and persistent connection modes do. Both get the
+same signal maps.
+
+Without pykwb only the native reader runs, on synthetic signal maps. If
+pykwb decodes nothing, its framing does not match the frames encoded
+here and there is nothing to compare.
+
+Before that, both readers must decode the same frames to the same
+values, and the compiled decoder must match the generic MessageDecoder
+value for value. The native connection types stay experimental until
+the check against pykwb passes.
+
+Usage: python benchmarks/decode_throughput.py [--cycles 2000]
+"""
+import argparse
+import math
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+# Import the integration's impl package directly so that Home Assistant is not needed
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "kwb_heaters", "src")
+)
+from impl.derived import DerivedValues  # noqa: E402
+from impl.protocol.compiled import CompiledMessageDecoder  # noqa: E402
+from impl.protocol.decoder import MessageDecoder, message_keys  # noqa: E402
+from impl.protocol.frame import (  # noqa: E402
+    CONTROL,
+    CONTROL_DATA_SIZE,
+    FrameParser,
+    encode_frame,
+)
+from impl.protocol.stream import FrameStream, TCPByteSource  # noqa: E402
+
+MESSAGE_IDS = [32, 33, 64, 65]
+# Sent as sense frames, the others as control frames
+SENSE_MESSAGE_IDS = {32, 33}
+PAYLOAD_SIZE = 120
+
+
+def payload_size(message_id: int) -> int:
+    return PAYLOAD_SIZE if message_id in SENSE_MESSAGE_IDS else CONTROL_DATA_SIZE
+
+
+def encode_message(message_id: int, payload: bytes) -> bytes:
+    if message_id in SENSE_MESSAGE_IDS:
+        return encode_frame(message_id, payload)
+    return encode_frame(message_id, payload, frame_type=CONTROL)
+
+
+def synthetic_signal_maps():
+    """Signal maps shaped like pykwb's.
+
+    Sense messages have 40 values and 24 bits, control messages 4 values
+    and 64 bits in their 16 bytes.
+    """
+    signal_maps = [None] * 255
+    for message_id in MESSAGE_IDS:
+        sense = message_id in SENSE_MESSAGE_IDS
+        values, bits_at = (40, 80) if sense else (4, 0)
+        values_at = 0 if sense else 8
+        signal_map = {}
+        for i in range(values):
+            kind = "s" if i % 3 == 0 else "u"
+            signal_map[f"Value {message_id} {i}"] = (
+                kind, values_at + i * 2, 2, 0.1, "°C", "", None, None
+            )
+        for i in range(24 if sense else 64):
+            signal_map[f"Bit {message_id} {i}"] = (
+                "b", bits_at + i // 8, i % 8, None, None, "", None, None
+            )
+        signal_maps[message_id] = signal_map
+    return signal_maps
+
+
+def load_maps():
+    try:
+        from pykwb.kwb import load_signal_maps
+    except ImportError:
+        return synthetic_signal_maps(), "synthetic"
+    return load_signal_maps(), "pykwb"
+
+
+def traffic(message_ids, cycles: int = 100) -> bytes:
+    """Frames of every message id in turn, with random payloads."""
+    rng = random.Random(0)
+    return b"".join(
+        encode_message(
+            message_id, bytes(rng.getrandbits(8) for _ in range(payload_size(message_id)))
+        )
+        for _ in range(cycles)
+        for message_id in message_ids
+    )
+
+
+def serve(data: bytes) -> socket.socket:
+    """Stream data over and over to every client of a local TCP server."""
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def send_forever(connection: socket.socket):
+        with connection:
+            try:
+                while True:
+                    connection.sendall(data)
+            except OSError:
+                # The client went away
+                pass
+
+    def accept_forever():
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                # Server closed
+                return
+            threading.Thread(target=send_forever, args=(connection,), daemon=True).start()
+
+    threading.Thread(target=accept_forever, daemon=True).start()
+    return server
+
+
+def pykwb_stream(port: int, signal_maps):
+    try:
+        from pykwb.kwb import KWBMessageStream, TCPByteReader
+    except ImportError:
+        return None
+    return KWBMessageStream(
+        reader=TCPByteReader(ip="127.0.0.1", port=port),
+        signal_maps=signal_maps,
+        heater_config={
+            "pellet_nominal_energy_kWh_kg": None,
+            "boiler_efficiency": None,
+            "boiler_nominal_power_kW": None,
+        },
+        last_values={
+            "last_timestamp": None,
+            "boiler_run_time": None,
+        },
+    )
+
+
+def native_stream(port: int, signal_maps, message_ids) -> FrameStream:
+    return FrameStream(
+        source=TCPByteSource("127.0.0.1", port),
+        decoder=CompiledMessageDecoder(signal_maps, message_ids),
+        derived=DerivedValues({}, {}),
+        connect_timeout=1,
+    )
+
+
+def read_cycles(stream, message_ids, cycles: int) -> tuple[float, int]:
+    """Return read_data_once() cycles per second and the values of one cycle.
+
+    Returns (0, 0) if the first cycle decoded nothing.
+    """
+    stream.open()
+    try:
+        data = stream.read_data_once(message_ids, 1)
+        if not data:
+            return 0.0, 0
+        start = time.perf_counter()
+        for _ in range(cycles):
+            stream.read_data_once(message_ids, 1)
+        elapsed = time.perf_counter() - start
+    finally:
+        stream.close()
+    return cycles / elapsed, len(data)
+
+
+def read_values(stream, message_ids) -> dict:
+    """Return the values of one read_data_once() cycle."""
+    stream.open()
+    try:
+        return stream.read_data_once(message_ids, 1)
+    finally:
+        stream.close()
+
+
+def same_value(a, b) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        return a is not None and b is not None and math.isclose(a, b, abs_tol=1e-9)
+    return a == b
+
+
+def compare_with_pykwb(signal_maps, message_ids) -> dict | None:
+    """Decode the same frames with pykwb and the native reader.
+
+    Returns {sensor key: (pykwb value, native value)} of every signal they
+    disagree on, or None without pykwb. Every cycle the server sends is
+    the same, so both readers get the same frames whenever they connect.
+    """
+    server = serve(traffic(message_ids, cycles=1))
+    port = server.getsockname()[1]
+    try:
+        stream = pykwb_stream(port, signal_maps)
+        if stream is None:
+            return None
+        expected = read_values(stream, message_ids)
+        actual = read_values(native_stream(port, signal_maps, message_ids), message_ids)
+    finally:
+        server.close()
+    keys = message_keys(signal_maps)
+    mismatches = {}
+    for message_id in message_ids:
+        for key in keys[message_id]:
+            if not same_value(expected.get(key), actual.get(key)):
+                mismatches[key] = (expected.get(key), actual.get(key))
+    return mismatches
+
+
+def check_compiled(signal_maps, message_ids, data: bytes):
+    """The compiled decoder must return what the generic one does."""
+    generic = MessageDecoder(signal_maps, message_ids)
+    compiled = CompiledMessageDecoder(signal_maps, message_ids)
+    for frame in FrameParser().feed(data):
+        assert generic.decode(frame) == compiled.decode(frame), frame
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cycles", type=int, default=2000)
+    args = parser.parse_args()
+
+    signal_maps, origin = load_maps()
+    message_ids = [i for i in MESSAGE_IDS if signal_maps[i]]
+    data = traffic(message_ids)
+    check_compiled(signal_maps, message_ids, data)
+    mismatches = compare_with_pykwb(signal_maps, message_ids)
+    if mismatches:
+        for key, (expected, actual) in sorted(mismatches.items()):
+            print(f"{key}: pykwb {expected!r}, native {actual!r}")
+        sys.exit(f"The native reader disagrees with pykwb on {len(mismatches)} values")
+
+    server = serve(data)
+    port = server.getsockname()[1]
+    print(f"read_data_once() throughput ({args.cycles} cycles, {origin} signal maps)")
+    print("=" * 50)
+    try:
+        native_cps, native_values = read_cycles(
+            native_stream(port, signal_maps, message_ids), message_ids, args.cycles
+        )
+        print(f"native: {native_cps:10,.0f} cycles/s  {native_values} values/cycle")
+        stream = pykwb_stream(port, signal_maps)
+        if stream is None:
+            print(" pykwb: not installed, nothing to compare")
+            return
+        pykwb_cps, pykwb_values = read_cycles(stream, message_ids, args.cycles)
+        if not pykwb_values:
+            print(" pykwb: decoded nothing, its framing differs from the frames sent")
+            return
+        print(
+            f" pykwb: {pykwb_cps:10,.0f} cycles/s  {pykwb_values} values/cycle"
+            f"  (native {native_cps / pykwb_cps:.1f}x)"
+        )
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Measure how long the event loop stalls per coordinator refresh.
+
+A fake heater (tools/fake_heater.py) serves frames from its own thread.
+The integration's Coordinator refreshes the integration's Appliance
+connected to it, the way async_setup_entry sets them up. "before" runs
+the scrape inline on the event loop, like data_update_method used to.
+"after" runs it on the appliance's worker thread with async_data_updater,
+as the integration does now. A heartbeat task on the event loop records
+how late it gets to run during each refresh.
+
+Needs Home Assistant and pykwb. --connection persistent reads with the
+native reader, scrape with pykwb's KWBMessageStream. The stream is not
+started, so every refresh connects, reads every message id and closes.
+
+Usage: python benchmarks/event_loop_stall.py [--cycles 5] [--rate 20]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tools"))
+from fake_heater import FakeHeater, create_appliance  # noqa: E402
+
+HEARTBEAT_SEC = 0.01
+
+
+class HeaterThread:
+    """FakeHeater on an event loop of its own, so that a stalled Home
+    Assistant loop does not stall the heater too."""
+
+    def __init__(self, rate: float):
+        self.heater = FakeHeater(port=0, rate=rate, seed=0)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> FakeHeater:
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.heater.start(), self._loop).result()
+        return self.heater
+
+    def __exit__(self, *exc_info):
+        asyncio.run_coroutine_threadsafe(self.heater.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+async def heartbeat(stalls: list, stop: asyncio.Event):
+    """Record how late each heartbeat tick fires."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT_SEC
+        await asyncio.sleep(HEARTBEAT_SEC)
+        stalls.append(max(0.0, loop.time() - expected))
+
+
+async def run_cycles(mode: str, cycles: int, port: int, connection: str) -> tuple[list, list]:
+    """Return the longest stall and the scrape duration of every refresh."""
+    # Exits with a message if Home Assistant or pykwb are missing
+    appliance = create_appliance("127.0.0.1", port, connection)
+
+    from homeassistant.core import HomeAssistant
+
+    from custom_components.kwb_heaters.coordinator import (
+        Coordinator,
+        async_data_updater,
+        data_updater,
+    )
+
+    if mode == "before":
+        scrape = data_updater(appliance)
+
+        async def update_method():
+            return scrape()
+
+    else:
+        update_method = async_data_updater(appliance)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        # No update_interval, every refresh is started here
+        coordinator = Coordinator(
+            hass,
+            logging.getLogger(__name__),
+            appliance,
+            name="bench",
+            update_method=update_method,
+        )
+        per_cycle = []
+        durations = []
+        try:
+            for _ in range(cycles):
+                stalls = []
+                stop = asyncio.Event()
+                beat = asyncio.create_task(heartbeat(stalls, stop))
+                await asyncio.sleep(HEARTBEAT_SEC * 2)
+                await coordinator.async_refresh()
+                await asyncio.sleep(HEARTBEAT_SEC * 2)
+                stop.set()
+                await beat
+                if not coordinator.last_update_success:
+                    raise RuntimeError(f"Refresh failed: {coordinator.last_exception}")
+                per_cycle.append(max(stalls) if stalls else 0.0)
+                durations.append(appliance.last_scrape_duration)
+        finally:
+            await appliance.worker.async_shutdown()
+    return per_cycle, durations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=20, help="frames per second of the heater")
+    parser.add_argument("--connection", default="persistent", choices=["scrape", "persistent"])
+    args = parser.parse_args()
+
+    print(f"Event loop stall per coordinator refresh ({args.cycles} cycles, {args.connection})")
+    print("=" * 50)
+    with HeaterThread(args.rate) as heater:
+        for mode in ("before", "after"):
+            per_cycle, durations = asyncio.run(
+                run_cycles(mode, args.cycles, heater.port, args.connection)
+            )
+            print(
+                f"{mode:>6}: max {max(per_cycle) * 1000:8.1f} ms"
+                f"  mean {statistics.mean(per_cycle) * 1000:8.1f} ms"
+                f"  (scrape {statistics.mean(durations) * 1000:.1f} ms)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Measure frame parsing throughput, resync cost and allocations per frame.
+
+Feeds a synthetic stream of KWB frames with bursts of garbage (as inserted by
+RS485-over-TCP bridges) through FrameParser in recv()-sized chunks. For
+comparison, the same stream goes through a parser that steps forward one byte
+at a time on errors, like FrameParser did before.
+
+Usage: python benchmarks/frame_parser.py [--frames 20000] [--garbage 0.2]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Import the protocol package directly so that Home Assistant is not needed
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(__file__), "..", "custom_components", "kwb_heaters", "src", "impl"
+    ),
+)
+from protocol.frame import (  # noqa: E402
+    CHECKSUM_SIZE,
+    CONTROL,
+    CONTROL_DATA_SIZE,
+    CONTROL_HEADER_SIZE,
+    ESCAPE,
+    SENSE,
+    SENSE_HEADER_SIZE,
+    SYNC,
+    Frame,
+    FrameParser,
+    checksum,
+    encode_frame,
+    unescape,
+)
+
+CHUNK_SIZE = 4096
+
+
+class ByteStepParser:
+    """Parser that resyncs one byte at a time."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        self._buffer.extend(data)
+        frames = []
+        buffer = self._buffer
+        while buffer:
+            if buffer[0] != SYNC:
+                del buffer[0]
+                continue
+            if len(buffer) < 2:
+                break
+            if buffer[1] == ESCAPE:
+                del buffer[0]
+                continue
+            if buffer[1] == SENSE:
+                if len(buffer) < SENSE_HEADER_SIZE:
+                    break
+                data_start, checksum_start = SENSE_HEADER_SIZE, 1
+                data_end = data_start + buffer[2]
+            else:
+                data_start, checksum_start = CONTROL_HEADER_SIZE, 0
+                data_end = data_start + CONTROL_DATA_SIZE
+            if len(buffer) <= data_end:
+                break
+            if checksum(buffer[checksum_start:data_end]) != buffer[data_end]:
+                del buffer[0]
+                continue
+            payload = bytes(buffer[data_start:data_end])
+            if buffer[1] == SENSE:
+                payload = unescape(payload)
+            frames.append(Frame(buffer[data_start - 2], payload, buffer[1], buffer[data_start - 1]))
+            del buffer[: data_end + CHECKSUM_SIZE]
+        return frames
+
+
+def make_stream(count: int, garbage: float) -> bytes:
+    rng = random.Random(0)
+    parts = []
+    for _ in range(count):
+        if rng.random() < garbage:
+            parts.append(bytes(rng.getrandbits(8) for _ in range(rng.randint(1, 64))))
+        message_id = rng.choice([32, 33, 64, 65])
+        if message_id < 64:
+            payload = bytes(rng.getrandbits(8) for _ in range(rng.randint(40, 120)))
+            parts.append(encode_frame(message_id, payload))
+        else:
+            payload = bytes(rng.getrandbits(8) for _ in range(CONTROL_DATA_SIZE))
+            parts.append(encode_frame(message_id, payload, frame_type=CONTROL))
+    return b"".join(parts)
+
+
+def run(parser, stream: bytes) -> tuple[int, float]:
+    frames = 0
+    start = time.perf_counter()
+    for i in range(0, len(stream), CHUNK_SIZE):
+        frames += len(parser.feed(stream[i : i + CHUNK_SIZE]))
+    return frames, time.perf_counter() - start
+
+
+def allocations_per_frame(parser, stream: bytes) -> tuple[float, float]:
+    """Memory blocks and bytes allocated while parsing, per frame."""
+    chunks = [stream[i : i + CHUNK_SIZE] for i in range(0, len(stream), CHUNK_SIZE)]
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for chunk in chunks:
+        # Keep the frames alive so that their allocations show up
+        kept.extend(parser.feed(chunk))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return blocks / len(kept), size / len(kept)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--garbage", type=float, default=0.2)
+    args = parser.parse_args()
+
+    stream = make_stream(args.frames, args.garbage)
+    print(
+        f"Frame parsing ({args.frames} frames, garbage before {args.garbage:.0%}, "
+        f"{len(stream)} bytes)"
+    )
+    print("=" * 50)
+    for name, factory in (("byte-step", ByteStepParser), ("find", FrameParser)):
+        frames, seconds = run(factory(), stream)
+        blocks, size = allocations_per_frame(factory(), stream)
+        print(
+            f"{name:>11}: {frames / seconds:10,.0f} frames/s"
+            f"  {blocks:5.1f} blocks/frame  {size:7.1f} bytes/frame"
+        )
+
+    frame_parser = FrameParser()
+    run(frame_parser, stream)
+    stats = frame_parser.stats
+    mean_us = stats.resync_seconds / stats.resyncs * 1e6 if stats.resyncs else 0.0
+    print(
+        f"resyncs: {stats.resyncs}  bad checksums: {stats.bad_checksums}"
+        f"  skipped bytes: {stats.skipped_bytes}"
+        f"  mean resync time: {mean_us:.2f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
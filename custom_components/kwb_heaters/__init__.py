@@ -6,6 +6,7 @@ import time
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    CONF_DEVICE,
     CONF_HOST,
     CONF_MODEL,
     CONF_PORT,
@@ -14,30 +15,35 @@ from homeassistant.const import (
     CONF_UNIQUE_ID,
     Platform,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryError, ConfigEntryNotReady
 from homeassistant.helpers import device_registry
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .config_flow import options_update_listener
+from .config_flow import entry_config, entry_settings, options_update_listener
 from .const import (
+    CONF_BAUDRATE,
     CONF_BOILER_EFFICIENCY,
     CONF_BOILER_NOMINAL_POWER,
+    CONF_CAPTURE_FILE,
+    CONF_CONNECTION,
+    CONF_EXPERIMENTAL,
+    CONF_MESSAGE_PROFILE,
     CONF_PELLET_NOMINAL_ENERGY,
+    CONNECTION_PUSH,
+    CONNECTION_SCRAPE,
     DOMAIN,
     OPT_LAST_BOILER_RUN_TIME,
-    OPT_LAST_ENERGY_OUTPUT,
-    OPT_LAST_PELLET_CONSUMPTION,
     OPT_LAST_TIMESTAMP,
+    SCAN_INTERVAL_SEC,
 )
-from .coordinator import data_updater
-from .src.impl.appliance import connect_appliance
+from .coordinator import Coordinator, async_data_updater
+from .src.impl.appliance import Appliance, connect_appliance
+from .src.impl.protocol.decoder import SignalMapLayoutError
 
 logger = logging.getLogger(__name__)
 
 
 PLATFORMS = [Platform.SENSOR, Platform.BINARY_SENSOR]
-SCAN_INTERVAL_SEC = 10
 
 # HomeAssistant reads this for entities with async_update() (?)
 SCAN_INTERVAL = timedelta(seconds=SCAN_INTERVAL_SEC)
@@ -52,36 +58,45 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> T
         raise Exception("Unique device id is None. This should not be possible.")
 
     # Setup sensors from a config entry created in the integrations UI
-    # Configure KWB heater
+    # Configure KWB heater. Settings changed in the options flow apply too,
+    # the unique id and model stay what the device was registered with.
+    config = entry_config(config_entry)
+    connection = config.get(CONF_CONNECTION, CONNECTION_SCRAPE)
+    if connection != CONNECTION_SCRAPE and not config.get(CONF_EXPERIMENTAL):
+        logger.warning(
+            "Connection type %s is experimental and not allowed in the options, using %s",
+            connection,
+            CONNECTION_SCRAPE,
+        )
+        connection = CONNECTION_SCRAPE
     config_heater = {
         CONF_UNIQUE_ID: config_entry.data.get(CONF_UNIQUE_ID),
-        CONF_HOST: config_entry.data.get(CONF_HOST),
-        CONF_PORT: config_entry.data.get(CONF_PORT),
-        CONF_TIMEOUT: int(config_entry.data.get(CONF_TIMEOUT, 2)),
+        CONF_HOST: config.get(CONF_HOST),
+        CONF_PORT: config.get(CONF_PORT),
+        CONF_TIMEOUT: int(config.get(CONF_TIMEOUT, 2)),
         CONF_MODEL: config_entry.data.get(CONF_MODEL),
-        CONF_PROTOCOL: config_entry.data.get(CONF_PROTOCOL),
-        CONF_BOILER_EFFICIENCY: config_entry.data.get(CONF_BOILER_EFFICIENCY),
-        CONF_BOILER_NOMINAL_POWER: config_entry.data.get(CONF_BOILER_NOMINAL_POWER),
-        CONF_PELLET_NOMINAL_ENERGY: config_entry.data.get(CONF_PELLET_NOMINAL_ENERGY),
+        CONF_PROTOCOL: config.get(CONF_PROTOCOL),
+        CONF_DEVICE: config.get(CONF_DEVICE),
+        CONF_BAUDRATE: config.get(CONF_BAUDRATE),
+        CONF_CAPTURE_FILE: hass.config.path(config[CONF_CAPTURE_FILE])
+        if config.get(CONF_CAPTURE_FILE)
+        else None,
+        CONF_CONNECTION: connection,
+        CONF_MESSAGE_PROFILE: config_entry.data.get(CONF_MESSAGE_PROFILE),
+        CONF_BOILER_EFFICIENCY: config.get(CONF_BOILER_EFFICIENCY),
+        CONF_BOILER_NOMINAL_POWER: config.get(CONF_BOILER_NOMINAL_POWER),
+        CONF_PELLET_NOMINAL_ENERGY: config.get(CONF_PELLET_NOMINAL_ENERGY),
     }
     # Recover sensor states using proper entity IDs
     model = config_entry.data.get(CONF_MODEL)
     sensor_prefix = f"sensor.kwb_{unique_device_id}"
     
     sensor_boiler_run_time = hass.states.get(f"{sensor_prefix}_boiler_run_time")
-    sensor_energy_output = hass.states.get(f"{sensor_prefix}_boiler_energy_output")
-    sensor_pellet_consumption = hass.states.get(f"{sensor_prefix}_pellet_consumption")
     sensor_last_timestamp = hass.states.get(f"{sensor_prefix}_last_timestamp")
     
     last_boiler_run_time = (
         float(sensor_boiler_run_time.state) if sensor_boiler_run_time and sensor_boiler_run_time.state not in ['unknown', 'unavailable'] else 0.0
     )
-    last_energy_output = (
-        float(sensor_energy_output.state) if sensor_energy_output and sensor_energy_output.state not in ['unknown', 'unavailable'] else 0.0
-    )
-    last_pellet_consumption = (
-        float(sensor_pellet_consumption.state) if sensor_pellet_consumption and sensor_pellet_consumption.state not in ['unknown', 'unavailable'] else 0.0
-    )
     last_timestamp = (
         float(sensor_last_timestamp.state)
         if sensor_last_timestamp and sensor_last_timestamp.state not in ['unknown', 'unavailable']
@@ -91,8 +106,6 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> T
         {
             OPT_LAST_TIMESTAMP: last_timestamp,
             OPT_LAST_BOILER_RUN_TIME: last_boiler_run_time,
-            OPT_LAST_ENERGY_OUTPUT: last_energy_output,
-            OPT_LAST_PELLET_CONSUMPTION: last_pellet_consumption,
         }
     )
 
@@ -102,31 +115,36 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> T
         connect_appliance(config_heater)
     )
     if not is_success:
+        if isinstance(heater_or_exception, Appliance):
+            # Connected, but read nothing
+            await _async_close_heater(hass, heater_or_exception)
+            raise ConfigEntryNotReady("No data from heater")
+        if isinstance(heater_or_exception, SignalMapLayoutError):
+            # Retrying cannot help, the connection type has to change
+            raise ConfigEntryError(str(heater_or_exception)) from heater_or_exception
         logger.error("Failed to connect to heater", exc_info=heater_or_exception)
         # return False
         raise ConfigEntryNotReady("Failed to connect to heater")
 
-    # Configure DataUpdateCoordinator
-    async def data_update_method():
-        # return await hass.async_add_executor_job(data_updater(heater_or_exception))
-        return data_updater(heater_or_exception)()
-
-    # TODO move this to __init__.py
-    # Create a data update coordinator
-    coordinator = DataUpdateCoordinator(
-        hass,
-        logger,
-        name=DOMAIN,
-        update_method=data_update_method,
-        update_interval=SCAN_INTERVAL,
-    )
-    # and fetch data (at least) once via DataUpdateCoordinator
-    await coordinator.async_config_entry_first_refresh()
+    try:
+        coordinator = await _async_start_coordinator(hass, heater_or_exception)
+    except Exception:
+        # Setup is retried with a new appliance, this one must not keep
+        # its thread and connection
+        await _async_close_heater(hass, heater_or_exception)
+        raise
 
     hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = {
         "coordinator": coordinator,
         "device": heater_or_exception,
+        # Saving the message profile changes nothing in here, so it does not reload
+        "settings": entry_settings(config_entry),
     }
+    config_entry.async_on_unload(
+        coordinator.async_add_listener(
+            _message_profile_saver(hass, config_entry, heater_or_exception, coordinator)
+        )
+    )
 
     # We can't add CONF_UNIQUE_ID here or we get an error in the device registry
     device_info: device_registry.DeviceInfo = {
@@ -155,7 +173,9 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> T
     # Store a reference to the unsubscribe function to cleanup if an entry is unloaded.
     # hass_data["unsub_options_update_listener"] = unsub_options_update_listener
     # hass.data[DOMAIN][config_entry.entry_id] = hass_data
-    config_entry.add_update_listener(options_update_listener)
+    config_entry.async_on_unload(
+        config_entry.add_update_listener(options_update_listener)
+    )
 
     # Forward the setup to the sensor platform.
     # hass.async_create_task(
@@ -168,7 +188,73 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> T
     return True
 
 
-# TODO Unload gracefully
-# https://github.com/home-assistant/core/blob/dev/homeassistant/components/fronius/__init__.py
-# async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-#   ...
+async def _async_start_coordinator(hass: HomeAssistant, heater: Appliance) -> Coordinator:
+    """Create the coordinator and get the first values into it."""
+    if heater.connection == CONNECTION_PUSH:
+        # Frames are pushed into the coordinator as they arrive, so it never polls
+        coordinator = Coordinator(hass, logger, heater, name=DOMAIN)
+        coordinator.async_set_updated_data(heater.snapshot)
+        try:
+            # Only entities whose value changed are notified
+            await heater.async_start_push(coordinator.async_set_message_data)
+        except OSError as e:
+            raise ConfigEntryNotReady("Failed to connect to heater") from e
+        return coordinator
+
+    # TODO move this to __init__.py
+    # Create a data update coordinator.
+    # Scrapes block on the heater, so they run on the appliance's own worker
+    # thread and never on the event loop.
+    coordinator = Coordinator(
+        hass,
+        logger,
+        heater,
+        name=DOMAIN,
+        update_method=async_data_updater(heater),
+        update_interval=SCAN_INTERVAL,
+    )
+    # and fetch data (at least) once via DataUpdateCoordinator
+    await coordinator.async_config_entry_first_refresh()
+    # In persistent connection mode, keep reading frames from now on. Only
+    # started once the first refresh worked, as that may raise ConfigEntryNotReady.
+    heater.start_streaming()
+    return coordinator
+
+
+def _message_profile_saver(
+    hass: HomeAssistant, config_entry: ConfigEntry, heater: Appliance, coordinator: Coordinator
+):
+    """Store the message profile in the config entry once the heater learned it."""
+
+    @callback
+    def save():
+        profile = heater.message_profile
+        if profile and profile != config_entry.data.get(CONF_MESSAGE_PROFILE):
+            coordinator.message_keys_changed()
+            hass.config_entries.async_update_entry(
+                config_entry, data={**config_entry.data, CONF_MESSAGE_PROFILE: profile}
+            )
+
+    return save
+
+
+async def _async_close_heater(hass: HomeAssistant, heater: Appliance):
+    """Stop reading, close the connection and release the worker thread."""
+    heater.stop_streaming()
+    await heater.async_stop_push()
+    await heater.worker.async_shutdown()
+    if heater.capture is not None:
+        await hass.async_add_executor_job(heater.capture.close)
+
+
+async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
+    """Unload platforms and stop talking to the heater."""
+
+    unload_ok = await hass.config_entries.async_unload_platforms(
+        config_entry, PLATFORMS
+    )
+    if unload_ok:
+        entry_data = hass.data[DOMAIN].pop(config_entry.entry_id)
+        await _async_close_heater(hass, entry_data["device"])
+
+    return unload_ok
@@ -14,6 +14,7 @@ from homeassistant.config_entries import (
     OptionsFlow,
 )
 from homeassistant.const import (
+    CONF_DEVICE,
     CONF_HOST,
     CONF_MODEL,
     CONF_PORT,
@@ -32,13 +33,27 @@ from homeassistant.helpers.selector import (
 )
 
 from .const import (
+    CONF_BAUDRATE,
     CONF_BOILER_EFFICIENCY,
     CONF_BOILER_NOMINAL_POWER,
+    CONF_BURNER_HOLD_OFF,
+    CONF_CAPTURE_FILE,
+    CONF_CONNECTION,
+    CONF_EXPERIMENTAL,
+    CONF_MESSAGE_PROFILE,
     CONF_PELLET_NOMINAL_ENERGY,
+    CONNECTION_PERSISTENT,
+    CONNECTION_PUSH,
+    CONNECTION_SCRAPE,
+    DEFAULT_BAUDRATE,
+    DEFAULT_BURNER_HOLD_OFF,
     DEFAULT_NAME,
     DOMAIN,
+    PROTOCOL_SERIAL,
+    PROTOCOL_TCP,
 )
-from .src.impl.appliance import connect_appliance
+from .src.impl.appliance import connect_appliance, endpoint_key
+from .src.impl.protocol.decoder import SignalMapLayoutError
 
 logger = logging.getLogger(__name__)
 
@@ -50,12 +65,18 @@ def data_schema(defaults: dict):
     conf_host = defaults.get(CONF_HOST)
     conf_model = defaults.get(CONF_MODEL, "easyfire_1")
     conf_port = defaults.get(CONF_PORT, "8899")
-    conf_protocol = defaults.get(CONF_PROTOCOL, "tcp")
+    conf_protocol = defaults.get(CONF_PROTOCOL, PROTOCOL_TCP)
+    conf_device = defaults.get(CONF_DEVICE)
+    conf_baudrate = defaults.get(CONF_BAUDRATE, DEFAULT_BAUDRATE)
+    conf_connection = defaults.get(CONF_CONNECTION, CONNECTION_SCRAPE)
+    conf_experimental = defaults.get(CONF_EXPERIMENTAL, False)
     conf_sender = defaults.get(CONF_SENDER, "comfort_3")
     conf_timeout = defaults.get(CONF_TIMEOUT, 2)
+    conf_capture_file = defaults.get(CONF_CAPTURE_FILE)
     conf_boiler_efficiency = defaults.get(CONF_BOILER_EFFICIENCY, 90.0)
     conf_boiler_nominal_power = defaults.get(CONF_BOILER_NOMINAL_POWER)
     conf_pellet_nominal_energy = defaults.get(CONF_PELLET_NOMINAL_ENERGY)
+    conf_burner_hold_off = defaults.get(CONF_BURNER_HOLD_OFF, DEFAULT_BURNER_HOLD_OFF)
     # Load up existing sensor values
     # sensor_boiler_run_time = defaults.get("boiler_run_time")
     # sensor_energy_output = defaults.get("boiler_energy")
@@ -85,10 +106,22 @@ def data_schema(defaults: dict):
                 SelectSelectorConfig(options=["comfort_3"], translation_key=CONF_SENDER)
             ),
             vol.Required(CONF_PROTOCOL, default=conf_protocol): SelectSelector(
-                SelectSelectorConfig(options=["tcp"], translation_key=CONF_PROTOCOL)
+                SelectSelectorConfig(
+                    options=[PROTOCOL_TCP, PROTOCOL_SERIAL], translation_key=CONF_PROTOCOL
+                )
+            ),
+            vol.Required(CONF_CONNECTION, default=conf_connection): SelectSelector(
+                SelectSelectorConfig(
+                    options=[CONNECTION_SCRAPE, CONNECTION_PERSISTENT, CONNECTION_PUSH],
+                    translation_key=CONF_CONNECTION,
+                )
             ),
-            vol.Required(CONF_HOST, default=conf_host): str,
+            vol.Required(CONF_EXPERIMENTAL, default=conf_experimental): bool,
+            # Host and port are only needed for TCP, the device only for serial
+            vol.Optional(CONF_HOST, description={"suggested_value": conf_host}): str,
             vol.Required(CONF_PORT, default=conf_port): int,
+            vol.Optional(CONF_DEVICE, description={"suggested_value": conf_device}): str,
+            vol.Required(CONF_BAUDRATE, default=conf_baudrate): int,
             vol.Required(CONF_TIMEOUT, default=conf_timeout): int,
             vol.Optional(CONF_BOILER_EFFICIENCY, default=conf_boiler_efficiency): NumberSelector(
                 NumberSelectorConfig(min=0, max=100, step=0.1, mode=NumberSelectorMode.BOX)
@@ -103,6 +136,18 @@ def data_schema(defaults: dict):
             ): NumberSelector(
                 NumberSelectorConfig(min=0, max=10, step=0.01, mode=NumberSelectorMode.BOX)
             ),
+            vol.Optional(CONF_BURNER_HOLD_OFF, default=conf_burner_hold_off): NumberSelector(
+                NumberSelectorConfig(
+                    min=0,
+                    max=3600,
+                    step=1,
+                    unit_of_measurement="s",
+                    mode=NumberSelectorMode.BOX,
+                )
+            ),
+            vol.Optional(
+                CONF_CAPTURE_FILE, description={"suggested_value": conf_capture_file}
+            ): str,
             # vol.Optional(OPT_LAST_BOILER_RUN_TIME, default=last_boiler_run_time): float,
             # vol.Optional(OPT_LAST_ENERGY_OUTPUT, default=last_energy_output): float,
             # vol.Optional(
@@ -115,6 +160,14 @@ def data_schema(defaults: dict):
     return schema
 
 
+def experimental_errors(user_input: dict) -> dict[str, str]:
+    """Errors if user_input picks an experimental connection type without allowing them."""
+    connection = user_input.get(CONF_CONNECTION, CONNECTION_SCRAPE)
+    if connection != CONNECTION_SCRAPE and not user_input.get(CONF_EXPERIMENTAL):
+        return {CONF_CONNECTION: "experimental_required"}
+    return {}
+
+
 class KWBConfigFlow(ConfigFlow, domain=DOMAIN):
     """KWB config flow."""
 
@@ -134,13 +187,39 @@ class KWBConfigFlow(ConfigFlow, domain=DOMAIN):
         if not user_input:
             return None
 
+        if user_input.get(CONF_PROTOCOL) == PROTOCOL_SERIAL:
+            if not user_input.get(CONF_DEVICE):
+                errors[CONF_DEVICE] = "device_required"
+        elif not user_input.get(CONF_HOST):
+            errors[CONF_HOST] = "host_required"
+        errors.update(experimental_errors(user_input))
+        if errors:
+            return (errors, None)
+
+        # Frames carry no boiler address, so a second heater on the same
+        # gateway or serial port would read the same boiler
+        endpoint = endpoint_key(user_input)
+        for entry in self._async_current_entries():
+            if endpoint_key(entry_config(entry)) == endpoint:
+                if user_input.get(CONF_PROTOCOL) == PROTOCOL_SERIAL:
+                    errors[CONF_DEVICE] = "endpoint_in_use"
+                else:
+                    errors[CONF_HOST] = "endpoint_in_use"
+                return (errors, None)
+
         # Validate the data can be used to set up a connection.
+        # The test connection is not captured.
         is_success, heater = await hass.async_add_executor_job(
-            connect_appliance(user_input)
+            connect_appliance({**user_input, CONF_CAPTURE_FILE: None})
         )
         # If we can't connect, set a value indicating this so we can tell the user
-        if not is_success:
+        if isinstance(heater, SignalMapLayoutError):
+            errors[CONF_CONNECTION] = "native_unsupported"
+        elif not is_success:
             errors["base"] = "cannot_connect"
+        else:
+            # This heater was only needed for the test connection
+            await hass.async_add_executor_job(heater.close)
 
         return (errors, heater)
 
@@ -296,15 +375,14 @@ class KWBOptionsFlow(OptionsFlow):
         if user_input is not None:
             # We got user input, so save it
 
-            errors: Dict[str, str] = {}
+            errors: Dict[str, str] = experimental_errors(user_input)
 
             if not errors:
                 return self.async_create_entry(title=DEFAULT_NAME, data=user_input)
             else:
                 # We got errors, so show error form
-                # TODO clone and set default= in data schema
                 return self.async_show_form(
-                    step_id="init", data_schema=schema, errors=errors
+                    step_id="init", data_schema=data_schema(user_input), errors=errors
                 )
         else:
             # We haven't gotten user input yet, so display form
@@ -313,9 +391,34 @@ class KWBOptionsFlow(OptionsFlow):
             return self.async_show_form(step_id="init", data_schema=schema)
 
 
+def entry_settings(config_entry: ConfigEntry) -> tuple[dict, dict]:
+    """Entry data and options a change of which needs a reload.
+
+    The message profile is learned and saved while running and left out.
+    """
+    data = {
+        key: value for key, value in config_entry.data.items() if key != CONF_MESSAGE_PROFILE
+    }
+    return data, dict(config_entry.options)
+
+
+def entry_config(config_entry: ConfigEntry) -> dict:
+    """Settings of the entry, with those changed in the options flow on top.
+
+    The options flow shows the whole form again and saves it in options,
+    the entry data keeps what the entry was created with.
+    """
+    return {**config_entry.data, **config_entry.options}
+
+
 async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
     """Handle options update."""
 
+    entry_data = hass.data.get(DOMAIN, {}).get(config_entry.entry_id)
+    if entry_data is not None and entry_data["settings"] == entry_settings(config_entry):
+        # Only the message profile was saved
+        return
+
     # TODO Save these?
     # conf_unique_id = self.config_entry.data.get(CONF_UNIQUE_ID)
     # conf_host = self.config_entry.data.get(CONF_HOST)
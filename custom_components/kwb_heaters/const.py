@@ -12,11 +12,49 @@ DEFAULT_SCAN_INTERVAL = 60
 DEFAULT_TIMEOUT = 3
 
 MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=10)
+# Seconds between scrapes of the heater
+SCAN_INTERVAL_SEC = 10
 
 CONF_PELLET_NOMINAL_ENERGY = "pellet_nominal_energy_kWh_kg"
 CONF_BOILER_EFFICIENCY = "boiler_efficiency"
 CONF_BOILER_NOMINAL_POWER = "boiler_nominal_power_kW"
 OPT_LAST_BOILER_RUN_TIME = "last_boiler_run_time"
-OPT_LAST_ENERGY_OUTPUT = "last_energy_output"
-OPT_LAST_PELLET_CONSUMPTION = "last_pellet_consumption"
 OPT_LAST_TIMESTAMP = "last_timestamp"
+
+# How the connection to the heater is managed
+CONF_CONNECTION = "connection"
+# Open, read one broadcast cycle and close on every scrape
+CONNECTION_SCRAPE = "scrape"
+# Keep the connection open and read frames all the time
+CONNECTION_PERSISTENT = "persistent"
+# Read frames natively on the event loop and push them to entities
+CONNECTION_PUSH = "push"
+# The connection types other than scrape read the bus without pykwb. They
+# can only be chosen with this set, until the native reader is shown to
+# decode what pykwb does (benchmarks/decode_throughput.py).
+CONF_EXPERIMENTAL = "experimental"
+
+# How the heater is reached, stored under homeassistant.const.CONF_PROTOCOL
+# RS485-to-LAN gateway at CONF_HOST:CONF_PORT
+PROTOCOL_TCP = "tcp"
+# Local RS485 adapter at CONF_DEVICE
+PROTOCOL_SERIAL = "serial"
+CONF_BAUDRATE = "baudrate"
+# KWB Comfort bus speed
+DEFAULT_BAUDRATE = 19200
+
+# Record the raw byte stream to this file, relative to the config directory
+CONF_CAPTURE_FILE = "capture_file"
+
+# Message ids the heater was seen sending, with the share of reads that got
+# them. Learned from the first reads and stored in the config entry.
+CONF_MESSAGE_PROFILE = "message_profile"
+# Reads of every decodable message id the profile is learned from
+PROFILE_READS = 3
+# Signals not received for this long make their entities unavailable
+DEFAULT_STALE_AFTER = timedelta(minutes=10)
+
+# Seconds the burner output has to stay at zero before a burner cycle ends.
+# Long enough to ride out modulation, short enough not to merge short cycles.
+CONF_BURNER_HOLD_OFF = "burner_hold_off"
+DEFAULT_BURNER_HOLD_OFF = 60
@@ -1,37 +1,223 @@
+from collections.abc import Callable
 import logging
+import time
+from typing import Any
 
+from homeassistant.core import CALLBACK_TYPE, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .src.impl.appliance import Appliance
+from .src.impl.protocol.link import CircuitOpen
+from .src.impl.worker import WorkerBusy
 
 logger = logging.getLogger(__name__)
 
 
 def data_updater(appliance: Appliance):
-    """Function called by DataUpdateCoordinator to do the data refresh from the heater"""
+    """Function called by DataUpdateCoordinator to do the data refresh from the heater.
+
+    Returns the appliance's latest Snapshot, which becomes coordinator.data.
+    """
 
     def u():
         try:
             is_success = appliance.scrape()
-            logger.debug("data_updater is_success=%s", is_success)
-            logger.debug("data_updater latest_scrape keys: %s", list(appliance.latest_scrape.keys()) if appliance.latest_scrape else "None")
+            # Only cheap arguments here, this runs on every cycle
+            logger.debug(
+                "data_updater is_success=%s values=%s %s",
+                is_success,
+                appliance.snapshot,
+                appliance.frame_stats,
+            )
+        except CircuitOpen as e:
+            # Already logged once when the circuit opened
+            raise UpdateFailed(str(e)) from e
         except Exception as e:
             logger.error("Failed scraping KWB heater", exc_info=e)
             raise UpdateFailed("Failed scraping KWB heater")
 
-        if not is_success or appliance.latest_scrape == {}:
+        snapshot = appliance.snapshot
+        if not is_success or not snapshot:
             logger.error("Failed scraping KWB heater - no data returned")
             raise UpdateFailed("Failed scraping KWB heater")
 
-        return appliance
+        return snapshot
 
     return u
 
 
+def async_data_updater(appliance: Appliance):
+    """Like data_updater, but runs the scrape on the appliance's own worker thread.
+
+    If the previous scrape is still running, this cycle is dropped and the
+    current snapshot is returned.
+    """
+
+    u = data_updater(appliance)
+
+    async def au():
+        if not appliance.scrape_blocks:
+            # Persistent connection: scrape() only takes a snapshot
+            return u()
+        try:
+            return await appliance.worker.async_run(u)
+        except WorkerBusy:
+            logger.debug("Previous scrape of %s still running, skipping cycle", appliance.unique_id)
+            return appliance.snapshot
+
+    return au
+
+
+# Marks a key that is not in the snapshot
+_MISSING = object()
+# Marks a key whose value was dispatched as too old
+_STALE = object()
+
+
 class Coordinator(DataUpdateCoordinator):
-    async def _async_update_data(self):
-        """Data update coordinator implementation.
+    """DataUpdateCoordinator that only notifies entities whose value changed.
+
+    coordinator.data is the appliance's latest Snapshot. Entities pass
+    their key as coordinator context. On every update the coordinator
+    compares each key with the value it last dispatched and only calls the
+    listeners of keys that changed. Listeners without a key (calculated
+    values, no context) are called on every update. Everyone is notified
+    when last_update_success flips, so availability stays right. Keys with
+    a stale_after are also notified once when their value gets too old.
+    """
+
+    def __init__(self, hass, logger, appliance: Appliance, **kwargs):
+        super().__init__(hass, logger, **kwargs)
+        self.appliance = appliance
+        self._key_listeners: dict[str, dict[CALLBACK_TYPE, None]] = {}
+        self._other_listeners: dict[CALLBACK_TYPE, None] = {}
+        # Values as of the last time their listeners were called
+        self._dispatched: dict[str, Any] = {}
+        self._dispatched_success: bool | None = None
+        self._dispatched_version: int | None = None
+        # Seconds after which the listeners of a key are told it went stale
+        self._stale_after: dict[str, float] = {}
+        # Keys that only other messages carry, by message id. Only valid for
+        # the message keys and ids of the appliance they were taken from.
+        self._other_message_keys: dict[int | None, frozenset[str]] = {}
+        self._other_message_keys_of: tuple | None = None
+        # Listener calls made, and listener calls saved because nothing changed
+        self.notified_count = 0
+        self.skipped_count = 0
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        remove_listener = super().async_add_listener(update_callback, context)
 
-        This is the place to pre-process the data to lookup tables
-        so entities can quickly look up their data.
+        listeners = (
+            self._key_listeners.setdefault(context, {})
+            if isinstance(context, str)
+            else self._other_listeners
+        )
+        listeners[update_callback] = None
+
+        @callback
+        def remove():
+            listeners.pop(update_callback, None)
+            remove_listener()
+
+        return remove
+
+    def set_stale_after(self, key: str, seconds: float):
+        """Notify the listeners of key when its value is older than seconds."""
+        current = self._stale_after.get(key)
+        self._stale_after[key] = seconds if current is None else min(current, seconds)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Call the listeners of keys whose value changed or went stale since the last call."""
+        self._update_listeners(frozenset())
+
+    def _update_listeners(self, skip_keys: frozenset[str]):
+        """Like async_update_listeners, but keys in skip_keys are only
+        checked for going stale."""
+        # A failed update still publishes link values, take those along too
+        snapshot = self.data = self.appliance.snapshot
+        notify_all = self.last_update_success != self._dispatched_success
+        self._dispatched_success = self.last_update_success
+        # Nothing was recorded since the last call, no key can have changed
+        unchanged = not notify_all and snapshot.version == self._dispatched_version
+        self._dispatched_version = snapshot.version
+
+        now = time.monotonic()
+        notified = skipped = 0
+        for key, listeners in self._key_listeners.items():
+            slot = snapshot.slot(key)
+            max_age = self._stale_after.get(key)
+            if max_age is not None and snapshot.has(slot) and not snapshot.is_fresh(
+                slot, max_age, now
+            ):
+                value = _STALE
+            elif unchanged or (not notify_all and key in skip_keys):
+                skipped += len(listeners)
+                continue
+            else:
+                value = snapshot.value_at(slot, _MISSING)
+            if not notify_all and self._dispatched.get(key, _MISSING) == value:
+                skipped += len(listeners)
+                continue
+            self._dispatched[key] = value
+            for update_callback in list(listeners):
+                update_callback()
+            notified += len(listeners)
+        for update_callback in list(self._other_listeners):
+            update_callback()
+        notified += len(self._other_listeners)
+
+        self.notified_count += notified
+        self.skipped_count += skipped
+        logger.debug(
+            "Notified %s listeners, skipped %s unchanged (total %s / %s)",
+            notified,
+            skipped,
+            self.notified_count,
+            self.skipped_count,
+        )
+
+    @callback
+    def async_set_message_data(self, message_id: int | None) -> None:
+        """Like async_set_updated_data, but for one freshly decoded message.
+
+        Only keys of that message, and keys no message carries (link state,
+        counters, derived values), can have changed. The values of keys
+        that only other messages carry are not compared, those keys are
+        only checked for going stale. message_id is None if only the link
+        state changed. Entities are unavailable while the circuit is open.
         """
+        self.last_update_success = not self.appliance.link.is_open
+        self._update_listeners(self._keys_of_other_messages(message_id))
+
+    def message_keys_changed(self):
+        """Forget the keys of other messages, the appliance's message keys
+        or the message ids it reads (its message profile) changed."""
+        self._other_message_keys.clear()
+        self._other_message_keys_of = None
+
+    def _keys_of_other_messages(self, message_id: int | None) -> frozenset[str]:
+        appliance = self.appliance
+        # The appliance replaces these when it learns or is given a message profile
+        taken_of = self._other_message_keys_of
+        if (
+            taken_of is None
+            or taken_of[0] is not appliance.message_keys
+            or taken_of[1] is not appliance.message_ids
+        ):
+            self.message_keys_changed()
+            self._other_message_keys_of = (appliance.message_keys, appliance.message_ids)
+        try:
+            return self._other_message_keys[message_id]
+        except KeyError:
+            pass
+        message_keys = self.appliance.message_keys
+        other = frozenset().union(*message_keys.values()) - message_keys.get(
+            message_id, frozenset()
+        )
+        self._other_message_keys[message_id] = other
+        return other
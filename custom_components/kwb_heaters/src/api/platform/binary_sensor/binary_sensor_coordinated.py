@@ -7,13 +7,14 @@ from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
 )
 
+from ..snapshot_entity import SnapshotEntity
 from .binary_sensor import BinarySensor
 from .binary_sensor_description import BinarySensorDescription
 
 logger = logging.getLogger(__name__)
 
 
-class CoordinatedBinarySensor(CoordinatorEntity, BinarySensor):
+class CoordinatedBinarySensor(CoordinatorEntity, SnapshotEntity, BinarySensor):
     """Custom binary sensor entity."""
 
     def __init__(
@@ -22,7 +23,8 @@ class CoordinatedBinarySensor(CoordinatorEntity, BinarySensor):
         entity_description: BinarySensorDescription,
         device_info: DeviceInfo,
     ):
-        super().__init__(coordinator)
+        # The key lets the coordinator notify only sensors whose value changed
+        super().__init__(coordinator, context=entity_description.key)
 
         unique_device_id = list(device_info.get("identifiers"))[0][1]
 
@@ -32,31 +34,29 @@ class CoordinatedBinarySensor(CoordinatorEntity, BinarySensor):
 
         self.entity_description = entity_description
 
+        self._init_snapshot(entity_description.key, entity_description.stale_after)
+
     @property
     def is_on(self) -> bool:
-        return bool(self.coordinator.data.latest_scrape[self.entity_description.key])
-
-    # @callback
-    # def _handle_coordinator_update(self) -> None:
-    #     """Update entity value(s) from data update coordinator.
-
-    #     # Put transformations here, such as setting self._attr_is_on
-    #     or setting self._attr_available = True
-
-    #     If super()._handle_coordinator_update() is not called, then the
-    #     state will not be saved to HomeAssistant.
-    #     """
+        return bool(self._snapshot_value())
 
-    #     super()._handle_coordinator_update()
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update entity value(s) from data update coordinator.
 
-    # async def async_added_to_hass(self) -> None:
-    #     """Sensor is loaded into HomeAssistant.
+        The sensor is unavailable while its value is older than stale_after.
 
-    #     Do anything that needs to happen at the time the sensor is
-    #     loaded here.
+        If super()._handle_coordinator_update() is not called, then the
+        state will not be saved to HomeAssistant.
+        """
+        self._attr_available = self._snapshot_fresh()
+        super()._handle_coordinator_update()
 
-    #     If the super().async_added_to_hass() is not called,
-    #     then sensor values will not be updated.
-    #     """
+    async def async_added_to_hass(self) -> None:
+        """Sensor is loaded into HomeAssistant.
 
-    #     await super().async_added_to_hass()
+        If the super().async_added_to_hass() is not called,
+        then sensor values will not be updated.
+        """
+        self._register_stale_after()
+        await super().async_added_to_hass()
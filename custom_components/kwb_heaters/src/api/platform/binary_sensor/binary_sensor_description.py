@@ -1,7 +1,14 @@
+from dataclasses import dataclass
+from datetime import timedelta
+
 from homeassistant.components.binary_sensor import (
     BinarySensorEntityDescription,
 )
 
 
+@dataclass
 class BinarySensorDescription(BinarySensorEntityDescription):
     """"""
+
+    # Go unavailable when the value has not been received for this long
+    stale_after: timedelta | None = None
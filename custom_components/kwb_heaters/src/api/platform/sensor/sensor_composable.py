@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import date, datetime
 from decimal import Decimal
 import logging
@@ -37,12 +38,16 @@ from .sensor_composable_types import (
 
 logger = logging.getLogger(__name__)
 
+# Marks a native value that has not been computed for this generation
+_UNSET = object()
+
 
 class EntityPersona:
     CLOUD_POLL = "cloud_poll"
     LOCAL_POLL = "local_poll"
 
 
+@dataclass
 class ComposableSensorDescription(SensorEntityDescription):
     # Restore sensor value on load?
     restore: bool = False
@@ -94,6 +99,12 @@ class ComposableSensor(CoordinatorEntity, RestoreSensor):
 
         self._attr_should_poll = not self.entity_description.coordinated
 
+        # native_value is computed once per generation: per coordinator data
+        # object, or per poll if not coordinated
+        self._poll_generation = object()
+        self._value_generation = _UNSET
+        self._value = None
+
         self.entity_description.f_on_init(self)
 
     async def async_update(self):
@@ -108,8 +119,9 @@ class ComposableSensor(CoordinatorEntity, RestoreSensor):
         if self.entity_description.coordinated:
             logger.warning("async_update called but coordinated==True")
 
+        self._poll_generation = object()
         # Set the native value here
-        self._attr_native_value = self.entity_description.f_get_native_value(self)
+        self._attr_native_value = self.native_value
         # and the availability
         self._attr_available = self.entity_description.f_get_available(self)
 
@@ -126,6 +138,8 @@ class ComposableSensor(CoordinatorEntity, RestoreSensor):
                 self, data, state
             )
             self.entity_description.f_on_restore_state(self)
+            # Restoring may change what f_get_native_value returns
+            self._value_generation = _UNSET
 
         self.entity_description.f_on_loaded(self)
 
@@ -145,7 +159,7 @@ class ComposableSensor(CoordinatorEntity, RestoreSensor):
         if not self.entity_description.coordinated:
             logger.warning("_handle_coordinator_update called but coordinated==False")
 
-        self._attr_native_value = self.entity_description.f_get_native_value(self)
+        self._attr_native_value = self.native_value
 
         self.entity_description.f_on_coordinator_update(self)
 
@@ -157,8 +171,19 @@ class ComposableSensor(CoordinatorEntity, RestoreSensor):
 
         You could also set self._attr_native_value in self._handle_coordinator_update()
         instead of implementing this method.
+
+        Home Assistant reads this several times per state write, so
+        f_get_native_value is only called once per generation.
         """
-        return self.entity_description.f_get_native_value(self)
+        generation = (
+            self.coordinator.data
+            if self.entity_description.coordinated and self.coordinator is not None
+            else self._poll_generation
+        )
+        if generation is not self._value_generation:
+            self._value = self.entity_description.f_get_native_value(self)
+            self._value_generation = generation
+        return self._value
 
     # @property
     # def should_poll(self) -> bool:
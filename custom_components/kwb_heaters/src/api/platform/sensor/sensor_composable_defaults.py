@@ -1,11 +1,16 @@
+from __future__ import annotations
+
 from datetime import date, datetime
 from decimal import Decimal
+from typing import TYPE_CHECKING
 
 from homeassistant.components.sensor import SensorExtraStoredData
 from homeassistant.core import State
 from homeassistant.helpers.typing import StateType
 
-from .sensor_composable import ComposableSensor
+if TYPE_CHECKING:
+    # sensor_composable imports this module
+    from .sensor_composable import ComposableSensor
 
 
 class UndefinedBehaviorFunction:
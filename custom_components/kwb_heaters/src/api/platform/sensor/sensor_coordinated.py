@@ -1,21 +1,25 @@
+from datetime import timedelta
 import logging
+import time
 from homeassistant.const import CONF_UNIQUE_ID
 
-from homeassistant.core import callback
+from homeassistant.core import CALLBACK_TYPE, callback
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
 )
 
 from .....const import DOMAIN, MANUFACTURER
+from ..snapshot_entity import SnapshotEntity
 from .sensor import Sensor
 from .sensor_description import SensorDescription
 
 logger = logging.getLogger(__name__)
 
 
-class CoordinatedSensor(CoordinatorEntity, Sensor):
+class CoordinatedSensor(CoordinatorEntity, SnapshotEntity, Sensor):
     """Sensor that is updated by DataUpdateCoordinator."""
 
     def __init__(
@@ -27,9 +31,10 @@ class CoordinatedSensor(CoordinatorEntity, Sensor):
         """Initialize the sensor.
 
         You must super().__init__(coordinator) in this method in order for
-        polling to work.
+        polling to work. The key is passed as context so the coordinator can
+        notify only the sensors whose value changed.
         """
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=description.key)
 
         unique_device_id = list(device_info.get("identifiers"))[0][1]
 
@@ -41,21 +46,38 @@ class CoordinatedSensor(CoordinatorEntity, Sensor):
         # values from entity_description
         self.entity_description = description
 
+        self._init_snapshot(description.key, description.stale_after)
+
+        # Last value written to HomeAssistant, for the deadband filter
+        self._written_value = None
+        self._written_available: bool | None = None
+        self._written_at = 0.0
+        self.suppressed_writes = 0
+        # Writes a held back change when max_hold is up
+        self._cancel_flush: CALLBACK_TYPE | None = None
+
+    @property
+    def available(self) -> bool:
+        if self.entity_description.available_on_failure:
+            return self._attr_available
+        return super().available
+
     @property
     def native_value(self):
         """Return the native value of the sensor based on the last data poll.
 
-        You could also set self._attr_native_value in self._handle_coordinator_update()
-        instead of implementing this method.
+        With a deadband, this is the value last written to HomeAssistant,
+        so that a change held back by the deadband does not show up in
+        between. Subclasses override _live_value() instead.
         """
-        if not self.coordinator.data or not hasattr(self.coordinator.data, 'latest_scrape'):
-            return None
-        
-        latest_scrape = self.coordinator.data.latest_scrape
-        if not latest_scrape or self.entity_description.key not in latest_scrape:
-            return None
-            
-        return latest_scrape[self.entity_description.key]
+        written = self._written_available is not None
+        if written and self.entity_description.deadband is not None:
+            return self._written_value
+        return self._live_value()
+
+    def _live_value(self):
+        """Return the current value, whether or not it has been written."""
+        return self._snapshot_value()
 
     @callback
     def _handle_coordinator_update(self) -> None:
@@ -67,19 +89,73 @@ class CoordinatedSensor(CoordinatorEntity, Sensor):
         If super()._handle_coordinator_update() is not called, then the
         state will not be saved to HomeAssistant.
         """
-        # Check if we have valid data
-        if (self.coordinator.data and 
-            hasattr(self.coordinator.data, 'latest_scrape') and 
-            self.coordinator.data.latest_scrape and 
-            self.entity_description.key in self.coordinator.data.latest_scrape):
+        # Check if we have valid data that is recent enough
+        if self._snapshot_fresh():
             self._attr_available = True
         else:
             self._attr_available = False
-            logger.debug("Sensor %s unavailable - no data for key %s", 
+            logger.debug("Sensor %s unavailable - no recent data for key %s", 
                         self.entity_description.key, self.entity_description.key)
 
+        if not self._is_significant_update():
+            self.suppressed_writes += 1
+            self._schedule_flush()
+            return
+
+        self._unschedule_flush()
         super()._handle_coordinator_update()
 
+    def _schedule_flush(self):
+        """Write a held back change once max_hold is up.
+
+        The coordinator only calls again when the value changes, so a
+        change that then holds steady would otherwise never be written.
+        """
+        max_hold = self.entity_description.deadband.max_hold
+        if (
+            max_hold is None
+            or self._cancel_flush is not None
+            or self._live_value() == self._written_value
+        ):
+            return
+        delay = self._written_at + max_hold.total_seconds() - time.monotonic()
+        self._cancel_flush = async_call_later(
+            self.hass, max(delay, 0), self._flush_held_change
+        )
+
+    def _unschedule_flush(self):
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
+
+    @callback
+    def _flush_held_change(self, _now) -> None:
+        self._cancel_flush = None
+        if self._is_significant_update():
+            self.async_write_ha_state()
+        else:
+            self._schedule_flush()
+
+    def _is_significant_update(self) -> bool:
+        """Apply the description's deadband and remember what gets written."""
+        value = self._live_value()
+        available = self.available
+        deadband = self.entity_description.deadband
+        now = time.monotonic()
+        if (
+            deadband is not None
+            and available == self._written_available
+            and not deadband.is_significant(
+                self._written_value, value, timedelta(seconds=now - self._written_at)
+            )
+        ):
+            return False
+
+        self._written_value = value
+        self._written_available = available
+        self._written_at = now
+        return True
+
     async def async_added_to_hass(self) -> None:
         """Sensor is loaded into HomeAssistant.
 
@@ -90,4 +166,6 @@ class CoordinatedSensor(CoordinatorEntity, Sensor):
         then sensor values will not be updated.
         """
 
+        self._register_stale_after()
+        self.async_on_remove(self._unschedule_flush)
         await super().async_added_to_hass()
@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from datetime import timedelta
+
+
+@dataclass(frozen=True)
+class Deadband:
+    """Decide whether a new sensor value is worth writing to Home Assistant.
+
+    A numeric change is significant if it reaches the absolute or the
+    relative threshold. If neither threshold is set, any change is
+    significant. A change below the thresholds is held back for at most
+    max_hold after the last write, so that a slowly drifting value still
+    shows up. An unchanged value is never written again, this is not a
+    heartbeat.
+    """
+
+    absolute: float | None = None
+    # Fraction of the last written value, e.g. 0.02 for 2 %
+    relative: float | None = None
+    max_hold: timedelta | None = None
+
+    def is_significant(self, last_value, new_value, since_write: timedelta) -> bool:
+        if last_value is None or new_value is None:
+            return last_value is not new_value
+        if not isinstance(new_value, (int, float)) or isinstance(new_value, bool):
+            return new_value != last_value
+        if not isinstance(last_value, (int, float)) or isinstance(last_value, bool):
+            return True
+        if new_value == last_value:
+            return False
+        if self.max_hold is not None and since_write >= self.max_hold:
+            return True
+        if self.absolute is None and self.relative is None:
+            return True
+
+        delta = abs(new_value - last_value)
+        if self.absolute is not None and delta >= self.absolute:
+            return True
+        if self.relative is not None and (
+            last_value == 0 or delta / abs(last_value) >= self.relative
+        ):
+            return True
+        return False
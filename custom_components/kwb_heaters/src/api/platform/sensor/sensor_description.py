@@ -1,7 +1,10 @@
 from dataclasses import dataclass
+from datetime import timedelta
 
 from homeassistant.components.sensor import SensorEntityDescription
 
+from .sensor_deadband import Deadband
+
 
 @dataclass
 class SensorDescription(SensorEntityDescription):
@@ -9,3 +12,10 @@ class SensorDescription(SensorEntityDescription):
 
     Any custom properties should go here as class attributes.
     """
+
+    # Suppress insignificant changes before they are written to Home Assistant
+    deadband: Deadband | None = None
+    # Stay available when a coordinator update fails, for connection diagnostics
+    available_on_failure: bool = False
+    # Go unavailable when the value has not been received for this long
+    stale_after: timedelta | None = None
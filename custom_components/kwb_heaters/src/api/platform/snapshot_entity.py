@@ -0,0 +1,47 @@
+import time
+
+
+class SnapshotEntity:
+    """Mixin for CoordinatorEntities that show one key of the coordinator's Snapshot.
+
+    The slot of the key is looked up once per snapshot index. A value
+    older than stale_after seconds makes the entity unavailable.
+    """
+
+    _snapshot_key: str
+    _snapshot_index = None
+    _slot: int | None = None
+    _stale_after: float | None = None
+
+    def _init_snapshot(self, key: str, stale_after):
+        self._snapshot_key = key
+        self._stale_after = stale_after.total_seconds() if stale_after else None
+
+    def _snapshot_slot(self) -> tuple:
+        """The coordinator's Snapshot and the slot of this entity's key in it."""
+        snapshot = self.coordinator.data
+        if snapshot is not None and (
+            self._slot is None or snapshot.index is not self._snapshot_index
+        ):
+            # Slots only change when the key first arrives or others are evicted
+            self._snapshot_index = snapshot.index
+            self._slot = snapshot.slot(self._snapshot_key)
+        return snapshot, self._slot
+
+    def _snapshot_value(self, default=None):
+        snapshot, slot = self._snapshot_slot()
+        if snapshot is None:
+            return default
+        return snapshot.value_at(slot, default)
+
+    def _snapshot_fresh(self) -> bool:
+        """True if the key has a value that is not older than stale_after."""
+        snapshot, slot = self._snapshot_slot()
+        return snapshot is not None and snapshot.is_fresh(
+            slot, self._stale_after, time.monotonic()
+        )
+
+    def _register_stale_after(self):
+        """Ask the coordinator to call us once more when the value goes stale."""
+        if self._stale_after is not None:
+            self.coordinator.set_stale_after(self._snapshot_key, self._stale_after)
@@ -1,20 +1,51 @@
 """Glue code that allows HomeAssistant to get data from pykwb."""
 
+from collections.abc import Callable
 import logging
+import threading
+import time
 
-from pykwb.kwb import KWBMessageStream, TCPByteReader, load_signal_maps
+from pykwb.kwb import KWBMessageStream, SerialByteReader, TCPByteReader
 
-from homeassistant.const import CONF_HOST, CONF_PORT, CONF_TIMEOUT, CONF_UNIQUE_ID
+from homeassistant.const import (
+    CONF_DEVICE,
+    CONF_HOST,
+    CONF_PORT,
+    CONF_PROTOCOL,
+    CONF_TIMEOUT,
+    CONF_UNIQUE_ID,
+)
 
 from ...const import (
+    CONF_BAUDRATE,
     CONF_BOILER_EFFICIENCY,
     CONF_BOILER_NOMINAL_POWER,
+    CONF_CAPTURE_FILE,
+    CONF_CONNECTION,
+    CONF_MESSAGE_PROFILE,
     CONF_PELLET_NOMINAL_ENERGY,
+    CONNECTION_PERSISTENT,
+    CONNECTION_PUSH,
+    CONNECTION_SCRAPE,
+    DEFAULT_BAUDRATE,
     OPT_LAST_BOILER_RUN_TIME,
-    OPT_LAST_ENERGY_OUTPUT,
-    OPT_LAST_PELLET_CONSUMPTION,
     OPT_LAST_TIMESTAMP,
+    PROFILE_READS,
+    PROTOCOL_SERIAL,
+    PROTOCOL_TCP,
 )
+from .config.signal_catalog import ENTITY_SIGNAL_SOURCE, get_signal_catalog
+from .derived import DerivedValues
+from .protocol.compiled import CompiledMessageDecoder
+from .protocol.decoder import check_signal_maps, message_keys
+from .protocol.capture import CaptureWriter, CapturingSource
+from .protocol.frame import Frame, FrameStats
+from .protocol.link import CircuitOpen, LinkMonitor
+from .protocol.push import PushConnection, SerialPushConnection, TCPPushConnection
+from .protocol.serial_port import SerialByteSource
+from .protocol.stream import FrameStream, TCPByteSource
+from .snapshot import Snapshot, ValueTable
+from .worker import ApplianceWorker
 
 logger = logging.getLogger(__name__)
 
@@ -23,9 +54,14 @@ class Appliance:
     """A physical appliance or service."""
 
     def __init__(self, config, signal_maps):
-        reader = TCPByteReader(ip=config.get(CONF_HOST), port=config.get(CONF_PORT))
         self.unique_id = config.get(CONF_UNIQUE_ID)
         self.unique_key = config.get(CONF_UNIQUE_ID).lower().replace(" ", "_")
+        self.host = config.get(CONF_HOST)
+        self.port = config.get(CONF_PORT)
+        self.protocol = config.get(CONF_PROTOCOL) or PROTOCOL_TCP
+        self.device = config.get(CONF_DEVICE)
+        self.baudrate = int(config.get(CONF_BAUDRATE) or DEFAULT_BAUDRATE)
+        self.signal_maps = signal_maps
         heater_config = {
             "pellet_nominal_energy_kWh_kg": config.get(CONF_PELLET_NOMINAL_ENERGY),
             "boiler_efficiency": config.get(CONF_BOILER_EFFICIENCY),
@@ -34,59 +70,399 @@ class Appliance:
         last_values = {
             "last_timestamp": config.get(OPT_LAST_TIMESTAMP),
             "boiler_run_time": config.get(OPT_LAST_BOILER_RUN_TIME),
-            "boiler_energy": config.get(OPT_LAST_ENERGY_OUTPUT),
-            "pellet_consumption": config.get(OPT_LAST_PELLET_CONSUMPTION),
         }
-        self.message_stream = KWBMessageStream(
-            reader=reader,
-            signal_maps=signal_maps,
-            heater_config=heater_config,
-            last_values=last_values,
-        )
-        # FIXME remove hard coded ids
-        self.message_ids = [32, 33, 64, 65]
+        self.heater_config = heater_config
+        self.last_values = last_values
         self.read_timeout = config.get(CONF_TIMEOUT, 2)
-        # TODO support serial too
-        # if args.mode == PROP_MODE_TCP:
-        #     reader = TCPByteReader(ip=args.hostname, port=args.port)
-        # elif args.mode == PROP_MODE_SERIAL:
-        #   reader = SerialByteReader(dev=args.interface, baud=args.baud)
+        # Signals of every message id, to tell which messages a read got
+        self.message_keys = message_keys(signal_maps)
+        # Until there is a profile, every message id that can be decoded is read
+        self.message_ids = list(self.message_keys)
+        # Decoding is shared by the native connection modes
+        self._decoder = CompiledMessageDecoder(signal_maps, self.message_ids)
+        # Message ids the heater sends, learned from the first PROFILE_READS reads
+        self.message_profile: dict[str, float] | None = config.get(CONF_MESSAGE_PROFILE)
+        self._profile_reads = 0
+        self._profile_counts: dict[int, int] = {}
+        if self.message_profile:
+            self._use_message_profile()
+        self._derived = DerivedValues(heater_config, last_values)
+        self.connection = config.get(CONF_CONNECTION, CONNECTION_SCRAPE)
+        # Scrape reads through pykwb. The other connection types parse and
+        # decode frames themselves.
+        self.native = self.connection != CONNECTION_SCRAPE
+        # Raw traffic recorder, for reproducing field problems
+        capture_file = config.get(CONF_CAPTURE_FILE)
+        self.capture = None
+        if capture_file and not self.native:
+            logger.warning(
+                "Heater %s: only the native connection types write a capture file",
+                self.unique_id,
+            )
+        elif capture_file:
+            self.capture = CaptureWriter(capture_file)
+        # Link integrity, counted over all connections of this appliance
+        self.frame_stats = FrameStats()
+        if self.native:
+            self._check_native_reader()
+            self.message_stream = self._native_stream()
+        else:
+            # pykwb adds its own derived values, like boiler_run_time,
+            # continued from last_values. Energy and pellet totals are
+            # metrics, restored by their sensors.
+            self.message_stream = KWBMessageStream(
+                reader=self._pykwb_reader(),
+                signal_maps=signal_maps,
+                heater_config=heater_config,
+                last_values=last_values,
+            )
+
+        # All blocking I/O for this appliance runs on its own thread
+        self.worker = ApplianceWorker(self.unique_key)
+
+        # Connection health. Decides when to retry and when to fail fast.
+        self.link = LinkMonitor(name=self.unique_id)
+
+        # State variables. Every read publishes a new immutable snapshot.
+        self.values = ValueTable()
+        # True once a read returned values
+        self._has_values = False
+        # Seconds the last read took until every message id had arrived
+        self.last_scrape_duration: float | None = None
+
+        # Persistent connection state.
+        # The read loop publishes snapshots, scrape() only checks its errors.
+        self._stream_lock = threading.Lock()
+        self._stream_stop = threading.Event()
+        self._stream_error: Exception | None = None
+        self.streaming = False
+
+        # Push connection state
+        self.push_connection: PushConnection | None = None
+        self._on_push_update: Callable[[int | None], None] | None = None
+        self._remove_link_listener: Callable[[], None] | None = None
+
+    def _check_native_reader(self):
+        """Refuse signal maps the native reader cannot decode.
+
+        Raises SignalMapLayoutError. Frames are read as pykwb 0.0.21 reads
+        them, but message ids and signal offsets are not validated against
+        a heater yet.
+        """
+        check_signal_maps(self.signal_maps, self.message_ids)
+        logger.warning(
+            "Heater %s is read without pykwb, in %s connection mode. This is "
+            "experimental, switch to scrape if values look wrong",
+            self.unique_id,
+            self.connection,
+        )
+
+    def _pykwb_reader(self) -> TCPByteReader | SerialByteReader:
+        if self.protocol == PROTOCOL_SERIAL:
+            return SerialByteReader(dev=self.device, baud=self.baudrate)
+        return TCPByteReader(ip=self.host, port=self.port)
+
+    def _native_stream(self) -> FrameStream:
+        """All transports feed the same frame parser and decoder."""
+        if self.protocol == PROTOCOL_SERIAL:
+            reader = SerialByteSource(self.device, self.baudrate)
+        else:
+            reader = TCPByteSource(self.host, self.port)
+        if self.capture is not None:
+            reader = CapturingSource(reader, self.capture)
+        return FrameStream(
+            source=reader,
+            decoder=self._decoder,
+            derived=self._derived,
+            connect_timeout=self.read_timeout,
+            stats=self.frame_stats,
+        )
+
+    @property
+    def snapshot(self) -> Snapshot:
+        """Latest values. Never changes, the next read publishes a new one."""
+        return self.values.snapshot
 
-        # State variables
-        self.latest_scrape = {}
+    @property
+    def scrape_blocks(self) -> bool:
+        """True if scrape() waits on the heater and must run on the worker."""
+        return not self.streaming
 
     def scrape(self):
-        self.message_stream.open()
-
-        # TODO use read_data(), not read_messages()
-        # message_generator = self.message_stream.read_messages(
-        #     self.message_ids, self.read_timeout
-        # )
-        # for message in message_generator:
-        #     data = message.decode()
-        #     # Put data in latest_scrape
-        #     for sensor_name, sensor_data in data.items():
-        #         # Prepend unique id to sensor name
-        #         sensor_value = sensor_data[0]
-        #         sensor_definition = sensor_data[1]
-        #         self.latest_scrape[sensor_name] = sensor_value
+        """Read one value of every signal and publish them as a new snapshot.
 
-        data = self.message_stream.read_data_once(self.message_ids, self.read_timeout)
-        self.latest_scrape.update(data)
+        While the link backs off, no connection is made and the last values
+        are kept. While the circuit is open, raises CircuitOpen right away.
+        """
+        if self.streaming:
+            return self._scrape_snapshot()
+
+        if not self.link.may_attempt():
+            self.values.update(self._link_values())
+            if self.link.is_open:
+                raise CircuitOpen(self._circuit_open_message())
+            return self._has_values
 
-        self.message_stream.close()
+        try:
+            self.message_stream.open()
+            try:
+                data = self._read_data_once()
+            finally:
+                self.message_stream.close()
+        except Exception as e:
+            self.link.failed(e)
+            self.values.update(self._link_values())
+            if self.link.is_open:
+                raise CircuitOpen(self._circuit_open_message()) from e
+            if not self._has_values:
+                raise
+            logger.debug("Scrape of %s failed, keeping last values", self.unique_id, exc_info=e)
+            return True
+
+        self._read_succeeded(data)
+        data.update(self._link_values())
+        self.values.update(data)
+        self._has_values = True
 
         return True
 
+    def _link_values(self) -> dict:
+        return {
+            "link_state": str(self.link.state),
+            "link_next_retry": self.link.next_retry_at(),
+        }
+
+    def _circuit_open_message(self) -> str:
+        return f"{self.unique_id} unreachable, next retry in {self.link.retry_in():.0f}s"
+
+    def _read_succeeded(self, data: dict):
+        """Record a read that returned data in the link state and the profile."""
+        missing = self._missing_message_ids(data)
+        profiling = not self.message_profile
+        if profiling:
+            self._learn_message_profile(missing)
+        # Message ids the heater does not send are missing until there is a profile
+        self.link.succeeded(complete=profiling or not missing)
+
+    def _learn_message_profile(self, missing: set[int]):
+        """Count the message ids a read got. After PROFILE_READS reads, only
+        the ones that arrived are read from then on.
+
+        The profile maps message id to the share of reads that got it. Keys
+        are strings so that it can be stored in the config entry as is.
+        """
+        self._profile_reads += 1
+        for message_id in self.message_ids:
+            if message_id not in missing:
+                self._profile_counts[message_id] = self._profile_counts.get(message_id, 0) + 1
+        if self._profile_reads < PROFILE_READS or not self._profile_counts:
+            return
+        self.message_profile = {
+            str(message_id): round(count / self._profile_reads, 2)
+            for message_id, count in sorted(self._profile_counts.items())
+        }
+        logger.info("Heater %s sends message ids %s", self.unique_id, self.message_profile)
+        self._use_message_profile()
+
+    def _use_message_profile(self):
+        message_ids = [
+            message_id
+            for message_id in map(int, self.message_profile)
+            if message_id in self.message_keys
+        ]
+        if not message_ids:
+            logger.warning(
+                "None of message ids %s can be decoded, reading all",
+                list(self.message_profile),
+            )
+            message_ids = list(self.message_keys)
+        self.message_ids = message_ids
+        self._decoder.message_ids = set(message_ids)
+
+    def _read_data_once(self) -> dict:
+        """Read one frame of every message id and record how long that took."""
+        start = time.monotonic()
+        data = self.message_stream.read_data_once(self.message_ids, self.read_timeout)
+        self.last_scrape_duration = time.monotonic() - start
+        if not data:
+            raise TimeoutError(f"No frames from {self.unique_id} within {self.read_timeout}s")
+        data["scrape_duration"] = round(self.last_scrape_duration, 3)
+        data.update(self._frame_counters())
+        logger.debug(
+            "Read %s values from %s in %.3fs",
+            len(data),
+            self.unique_id,
+            self.last_scrape_duration,
+        )
+        return data
+
+    def _missing_message_ids(self, data: dict) -> set[int]:
+        """Message ids the last read did not get."""
+        if self.native:
+            return self.message_stream.missing_message_ids
+        # pykwb does not tell which messages arrived, their signals do
+        return {
+            message_id
+            for message_id in self.message_ids
+            if self.message_keys.get(message_id, frozenset()).isdisjoint(data)
+        }
+
+    def _frame_counters(self) -> dict:
+        """Counters that tell a bad link from a misbehaving controller."""
+        if not self.native:
+            # pykwb does not count frames
+            return {}
+        stats = self.frame_stats
+        return {
+            "frames_good": stats.frames,
+            "frames_bad_checksum": stats.bad_checksums,
+            "frame_resyncs": stats.resyncs,
+        }
+
+    def _scrape_snapshot(self):
+        """The read loop publishes its own snapshots. Does no I/O."""
+        with self._stream_lock:
+            if self.link.is_open:
+                raise CircuitOpen(self._circuit_open_message()) from self._stream_error
+        return len(self.snapshot) > 0
+
+    def start_streaming(self):
+        """Keep the connection open and read frames until stop_streaming().
+
+        The read loop occupies the worker thread for the life of the
+        config entry. Only has an effect in persistent connection mode.
+        """
+        if self.connection != CONNECTION_PERSISTENT or self.streaming:
+            return
+        self._stream_stop.clear()
+        self.streaming = True
+        self.worker.submit(self._read_forever)
+
+    def stop_streaming(self):
+        """Ask the read loop to stop. It exits after the read in progress."""
+        self._stream_stop.set()
+
+    def _read_forever(self):
+        is_open = False
+        try:
+            while not self._stream_stop.is_set():
+                try:
+                    if not is_open:
+                        self.message_stream.open()
+                        is_open = True
+                    data = self._read_data_once()
+                    self._read_succeeded(data)
+                    data.update(self._link_values())
+                    self.values.update(data)
+                    with self._stream_lock:
+                        self._stream_error = None
+                except Exception as e:
+                    logger.debug("Lost connection to heater %s", self.unique_id, exc_info=e)
+                    self.link.failed(e)
+                    self.values.update(self._link_values())
+                    with self._stream_lock:
+                        self._stream_error = e
+                    if is_open:
+                        self._close_quietly()
+                        is_open = False
+                    # Back off before reconnecting
+                    self._stream_stop.wait(self.link.retry_in())
+        finally:
+            if is_open:
+                self._close_quietly()
+            self.streaming = False
+
+    def _close_quietly(self):
+        try:
+            self.message_stream.close()
+        except Exception as e:
+            logger.debug("Error closing connection to heater", exc_info=e)
+
+    async def async_start_push(self, on_update: Callable[[int | None], None]):
+        """Read frames natively on the event loop and call on_update after each one.
+
+        No thread is involved: frames are decoded as the bytes arrive and
+        a new snapshot is published. Each message only updates its own
+        signals, and on_update is called with its message id, or with None
+        when only the link state changed. Only has an effect in push
+        connection mode.
+        """
+        if self.connection != CONNECTION_PUSH or self.push_connection is not None:
+            return
+        self._on_push_update = on_update
+        # Push mode learns no profile. Message ids the heater does not send
+        # cost nothing here, as no frames of them arrive.
+        if self.protocol == PROTOCOL_SERIAL:
+            connection = SerialPushConnection(
+                self.device, self.baudrate, self._handle_frame, self.frame_stats
+            )
+        else:
+            connection = TCPPushConnection(
+                self.host, self.port, self._handle_frame, self.frame_stats
+            )
+        connection.capture = self.capture
+        await connection.async_start()
+        self.push_connection = connection
+        # The connection reconnects on its own and keeps the link state
+        self.link = connection.link
+        self._remove_link_listener = self.link.add_listener(self._on_link_change)
+        self.values.update(self._link_values())
+
+    async def async_stop_push(self):
+        if self.push_connection is not None:
+            self._remove_link_listener()
+            await self.push_connection.async_stop()
+            self.push_connection = None
+
+    def _handle_frame(self, frame: Frame):
+        data = self._decoder.decode(frame)
+        if not data:
+            return
+        data.update(self._derived.update(data, time.time_ns() / 1000000))
+        data.update(self._frame_counters())
+        self.values.update(data)
+        self._on_push_update(frame.message_id)
+
+    def _on_link_change(self, state):
+        self.values.update(self._link_values())
+        self._on_push_update(None)
+
+    def close(self):
+        """Stop reading and release the worker thread.
+
+        Blocks until the read in progress is done.
+        """
+        self.stop_streaming()
+        self.worker.shutdown()
+        if self.capture is not None:
+            self.capture.close()
+
+
+def endpoint_key(config: dict) -> tuple:
+    """Identifies the gateway or serial port config connects to.
+
+    Frames carry no boiler address, so every heater on one endpoint would
+    read the same boiler. Only one config entry per endpoint is allowed.
+    """
+    if (config.get(CONF_PROTOCOL) or PROTOCOL_TCP) == PROTOCOL_SERIAL:
+        return (PROTOCOL_SERIAL, config.get(CONF_DEVICE))
+    return (PROTOCOL_TCP, config.get(CONF_HOST), config.get(CONF_PORT))
+
 
 def create_appliance(config_heater: dict) -> tuple[bool, Appliance | Exception]:
     def f():
+        heater = None
         try:
-            signal_maps = load_signal_maps()
+            signal_maps = get_signal_catalog().signal_maps
+            # Parse the maps the platforms use now, off the event loop
+            get_signal_catalog(source=ENTITY_SIGNAL_SOURCE)
             heater = Appliance(config_heater, signal_maps)
             is_success = heater.scrape()
         except Exception as e:
             logger.error("Error connecting to heater", exc_info=e)
+            if heater is not None:
+                # Setup is retried with a new appliance
+                heater.close()
             return False, e
         return is_success, heater
 
@@ -1,7 +1,6 @@
 from collections.abc import Iterable
 import logging
 
-from pykwb.kwb import load_signal_maps
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass
 
 from homeassistant.config_entries import ConfigEntry
@@ -10,12 +9,14 @@ from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+from .....const import DEFAULT_STALE_AFTER
 from ....api.platform.binary_sensor.binary_sensor_coordinated import (
     CoordinatedBinarySensor,
 )
 from ....api.platform.binary_sensor.binary_sensor_description import (
     BinarySensorDescription,
 )
+from ..signal_catalog import ENTITY_SIGNAL_SOURCE, get_signal_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -37,36 +38,28 @@ def setup_entities(
 
     entities = []
 
-    # TODO refactor out this chunk. Same in sensors.entities.py
-    for signal_map in load_signal_maps(source=10):
-        if not signal_map:
-            continue
-        for signal_key, signal_definition in signal_map.items():
-            sensor_key = (
-                signal_definition[5]
-                if signal_definition[5] and signal_definition[5] != ""
-                else signal_key.lower().replace(" ", "_")
-            )
-            # TODO signal_key is a key, not a name. Translate it
-            sensor_name = f"{model} {unique_device_id} {signal_key}"
+    # Signal maps are parsed once per process and shared with the sensor platform
+    for signal in get_signal_catalog(source=ENTITY_SIGNAL_SOURCE).binary_sensors:
+        # TODO signal_key is a key, not a name. Translate it
+        sensor_name = f"{model} {unique_device_id} {signal.signal_key}"
 
-            if signal_definition[0] == "b":
-                # TODO should be from BinarySensorDeviceClass.
-                # Should be "running" or "problem"?
-                # device_class = signal_definition[5]
+        # TODO should be from BinarySensorDeviceClass.
+        # Should be "running" or "problem"?
+        # device_class = signal.device_class
 
-                entities.append(
-                    CoordinatedBinarySensor(
-                        coordinator=coordinator,
-                        device_info=device_info,
-                        entity_description=BinarySensorDescription(
-                            key=sensor_key,
-                            translation_key=sensor_key,
-                            name=sensor_name,
-                            device_class=BinarySensorDeviceClass.RUNNING,
-                        ),
-                    )
-                )
+        entities.append(
+            CoordinatedBinarySensor(
+                coordinator=coordinator,
+                device_info=device_info,
+                entity_description=BinarySensorDescription(
+                    key=signal.key,
+                    translation_key=signal.key,
+                    name=sensor_name,
+                    device_class=BinarySensorDeviceClass.RUNNING,
+                    stale_after=DEFAULT_STALE_AFTER,
+                ),
+            )
+        )
 
     entities.append(
         CoordinatedBinarySensor(
@@ -1,31 +1,76 @@
 from __future__ import annotations
 
 from collections.abc import Iterable
+from datetime import timedelta
 import logging
 
-from pykwb.kwb import load_signal_maps
-
 from homeassistant.components.sensor.const import SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfEnergy, UnitOfPower, UnitOfTime
+from homeassistant.const import EntityCategory, UnitOfEnergy, UnitOfPower, UnitOfTime
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+from .....config_flow import entry_config
 from .....const import (
     CONF_BOILER_EFFICIENCY,
-    CONF_BOILER_NOMINAL_POWER,
+    CONF_BURNER_HOLD_OFF,
     CONF_PELLET_NOMINAL_ENERGY,
+    DEFAULT_BURNER_HOLD_OFF,
+    DEFAULT_STALE_AFTER,
+    SCAN_INTERVAL_SEC,
 )
 from ....api.platform.sensor.sensor_coordinated import CoordinatedSensor
+from ....api.platform.sensor.sensor_deadband import Deadband
 from ....api.platform.sensor.sensor_description import SensorDescription
-from ....impl.platform.sensor.boiler_energy_sensor import KWBBoilerEnergySensor
-from ....impl.platform.sensor.pellet_consumption_sensor import (
-    KWBPelletConsumptionSensor,
-)
+from ....impl.platform.sensor.cycle_sensor import BurnerCycleSensor
+from ....impl.platform.sensor.metric_sensor import MetricSensor, MetricSensorDescription
+from ....impl.platform.sensor.rolling_sensor import RollingStatSensor
+from ...cycles import BurnerCycleDetector, BurnerPhase
+from ...metrics import MetricEngine
+from ...rolling import RollingStats, Statistic
+from ...protocol.link import LinkState
+from ..signal_catalog import ENTITY_SIGNAL_SOURCE, get_signal_catalog
+from .metrics import heater_metrics
 
 logger = logging.getLogger(__name__)
 
+# Changes smaller than these are not written to HomeAssistant (and so not
+# recorded) for up to max_hold after the last write.
+# Signal classes not listed here write every change.
+DEADBANDS = {
+    SensorDeviceClass.TEMPERATURE: Deadband(
+        absolute=0.5, max_hold=timedelta(minutes=15)
+    ),
+    SensorDeviceClass.POWER: Deadband(relative=0.02, max_hold=timedelta(minutes=5)),
+    SensorDeviceClass.PRESSURE: Deadband(
+        absolute=0.05, max_hold=timedelta(minutes=15)
+    ),
+}
+
+# Signals not received for this long go unavailable. Slow signals get
+# longer, signal classes not listed here get DEFAULT_STALE_AFTER.
+STALE_AFTER = {
+    SensorDeviceClass.TEMPERATURE: timedelta(minutes=15),
+    SensorDeviceClass.POWER: timedelta(minutes=5),
+}
+
+# Rolling-window statistics, by the catalog key of the signal: the pykwb
+# signals Exhaust, Boiler 0, Buffer Tank 1 and Buffer Tank 2. Keys the
+# signal catalog does not have are logged and get none.
+ROLLING_WINDOWS = (timedelta(minutes=5), timedelta(hours=1))
+ROLLING_STATISTICS = {
+    "exhaust": tuple(Statistic),
+    "boiler_0": tuple(Statistic),
+    "buffer_tank_1": tuple(Statistic),
+    "buffer_tank_2": tuple(Statistic),
+}
+# Catalog key of the binary signal that is on while the burner ignites, the
+# pykwb signal Ignition. Without it, only the hold-off ends burner cycles.
+IGNITION_KEY = "ignition"
+# Rates are in unit per minute and only written when they moved this much
+RATE_DEADBAND = Deadband(absolute=0.1, max_hold=timedelta(minutes=15))
+
 
 def setup_entities(
     device_info: DeviceInfo,
@@ -42,47 +87,74 @@ def setup_entities(
     model = device_info.get("model")
 
     # We will need these for later use at the end
-    boiler_nominal_power: float = config_entry.data.get(CONF_BOILER_NOMINAL_POWER)
-    boiler_efficiency: float = config_entry.data.get(CONF_BOILER_EFFICIENCY)
-    pellet_energy: float = config_entry.data.get(CONF_PELLET_NOMINAL_ENERGY)
-    boiler_output_sensor: CoordinatedSensor = None
+    config = entry_config(config_entry)
+    boiler_efficiency: float = config.get(CONF_BOILER_EFFICIENCY)
+    pellet_energy: float = config.get(CONF_PELLET_NOMINAL_ENERGY)
 
     entities = []
 
-    for signal_map in load_signal_maps(source=10):
-        if not signal_map:
-            continue
-        for signal_key, signal_definition in signal_map.items():
-            sensor_key = (
-                signal_definition[5]
-                if signal_definition[5] and signal_definition[5] != ""
-                else signal_key.lower().replace(" ", "_")
-            )
-            # TODO signal_key is a key, not a name. Translate it
-            sensor_name = f"{model} {unique_device_id} {signal_key}"
-
-            if signal_definition[0] != "b":
-                unit = signal_definition[4]
-                state_class = signal_definition[6] if signal_definition[6] else SensorStateClass.MEASUREMENT
-                device_class = signal_definition[7]
-
-                sensor = CoordinatedSensor(
-                    coordinator=coordinator,
-                    device_info=device_info,
-                    description=SensorDescription(
-                        key=sensor_key,
-                        translation_key=sensor_key,
-                        name=sensor_name,
-                        native_unit_of_measurement=unit,
-                        device_class=device_class,
-                        state_class=state_class,
-                    ),
-                )
+    # Signal maps are parsed once per process and shared by all heaters
+    catalog = get_signal_catalog(source=ENTITY_SIGNAL_SOURCE)
+    missing = ROLLING_STATISTICS.keys() - {signal.key for signal in catalog.sensors}
+    if missing:
+        logger.warning(
+            "No rolling statistics for %s, the signal maps have no such sensors",
+            ", ".join(sorted(missing)),
+        )
 
-                if sensor_key == "boiler_output":
-                    boiler_output_sensor = sensor
+    for signal in catalog.sensors:
+        # TODO signal_key is a key, not a name. Translate it
+        sensor_name = f"{model} {unique_device_id} {signal.signal_key}"
 
-                entities.append(sensor)
+        sensor = CoordinatedSensor(
+            coordinator=coordinator,
+            device_info=device_info,
+            description=SensorDescription(
+                key=signal.key,
+                translation_key=signal.key,
+                name=sensor_name,
+                native_unit_of_measurement=signal.unit,
+                device_class=signal.device_class,
+                state_class=signal.state_class,
+                deadband=DEADBANDS.get(signal.device_class),
+                stale_after=STALE_AFTER.get(signal.device_class, DEFAULT_STALE_AFTER),
+            ),
+        )
+        entities.append(sensor)
+
+        statistics = ROLLING_STATISTICS.get(signal.key)
+        if not statistics:
+            continue
+        # One set of windows per signal, shared by all its statistics
+        stats = RollingStats(
+            signal.key, [window.total_seconds() for window in ROLLING_WINDOWS]
+        )
+        for window in ROLLING_WINDOWS:
+            window_name = f"{window.total_seconds() / 60:g} min"
+            for statistic in statistics:
+                is_rate = statistic == Statistic.RATE
+                entities.append(
+                    RollingStatSensor(
+                        coordinator=coordinator,
+                        stats=stats,
+                        window=window,
+                        statistic=statistic,
+                        device_info=device_info,
+                        description=SensorDescription(
+                            key=f"{signal.key}_{statistic}_{window.total_seconds():.0f}s",
+                            name=f"{sensor_name} {window_name} {statistic}",
+                            native_unit_of_measurement=(
+                                f"{signal.unit}/min" if is_rate and signal.unit else signal.unit
+                            ),
+                            device_class=None if is_rate else signal.device_class,
+                            state_class=SensorStateClass.MEASUREMENT,
+                            deadband=(
+                                RATE_DEADBAND if is_rate else DEADBANDS.get(signal.device_class)
+                            ),
+                            stale_after=sensor.entity_description.stale_after,
+                        ),
+                    )
+                )
 
     # f_get_native_value: GetNativeValueType = (
     #     lambda sensor: sensor.coordinator.latest_scrape[sensor.entity_description.key],
@@ -135,6 +207,7 @@ def setup_entities(
                 native_unit_of_measurement=UnitOfPower.KILO_WATT,
                 device_class=SensorDeviceClass.POWER,
                 state_class=SensorStateClass.MEASUREMENT,
+                deadband=DEADBANDS[SensorDeviceClass.POWER],
             ),
         )
     )
@@ -166,44 +239,179 @@ def setup_entities(
             ),
         )
     )
-
-    # HACK Create KWBBoilerEnergySensor
-    # boiler_nominal_power = config_entry.data.get(CONF_BOILER_NOMINAL_POWER)
-    # boiler_efficiency = config_entry.data.get(CONF_BOILER_EFFICIENCY)
-    # boiler_output_sensor = list(
-    #     filter(lambda e: e.entity_description.key == "boiler_output", entities)
-    # ).pop()
-
-    boiler_energy_sensor = KWBBoilerEnergySensor(
-        device_info=device_info,
-        boiler_nominal_power=boiler_nominal_power,
-        boiler_efficiency=boiler_efficiency,
-        boiler_output_sensor=boiler_output_sensor,
-        entity_description=SensorDescription(
-            key="boiler_energy_output",
-            translation_key="boiler_energy_output",
-            name=f"{model} {unique_device_id} Boiler Energy Output",
-            native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
-            device_class=SensorDeviceClass.ENERGY,
-            state_class=SensorStateClass.TOTAL,
-        ),
+    entities.append(
+        CoordinatedSensor(
+            coordinator=coordinator,
+            device_info=device_info,
+            description=SensorDescription(
+                key="scrape_duration",
+                translation_key="scrape_duration",
+                name=f"{model} {unique_device_id} Scrape Duration",
+                native_unit_of_measurement=UnitOfTime.SECONDS,
+                device_class=SensorDeviceClass.DURATION,
+                state_class=SensorStateClass.MEASUREMENT,
+                entity_category=EntityCategory.DIAGNOSTIC,
+            ),
+        )
+    )
+    # Link integrity counters. The good frame count changes with every frame,
+    # so it is only written every minute or when it grew by 5 %. Only the
+    # native connection types count frames, pykwb in scrape mode does not.
+    frame_counters = (
+        ("frames_good", "Good Frames", Deadband(relative=0.05, max_hold=timedelta(minutes=1))),
+        ("frames_bad_checksum", "Bad Checksums", None),
+        ("frame_resyncs", "Frame Resyncs", None),
     )
-    entities.append(boiler_energy_sensor)
+    if not coordinator.appliance.native:
+        frame_counters = ()
+    for key, name, deadband in frame_counters:
+        entities.append(
+            CoordinatedSensor(
+                coordinator=coordinator,
+                device_info=device_info,
+                description=SensorDescription(
+                    key=key,
+                    translation_key=key,
+                    name=f"{model} {unique_device_id} {name}",
+                    state_class=SensorStateClass.TOTAL_INCREASING,
+                    entity_category=EntityCategory.DIAGNOSTIC,
+                    deadband=deadband,
+                ),
+            )
+        )
 
+    # Connection state, available even while updates fail
     entities.append(
-        KWBPelletConsumptionSensor(
+        CoordinatedSensor(
+            coordinator=coordinator,
             device_info=device_info,
-            pellet_energy=pellet_energy,
-            boiler_energy_sensor=boiler_energy_sensor,
-            entity_description=SensorDescription(
-                key="pellet_consumption",
-                translation_key="pellet_consumption",
-                name=f"{model} {unique_device_id} Pellet Consumption",
-                native_unit_of_measurement="kg",
-                device_class=SensorDeviceClass.WEIGHT,
-                state_class=SensorStateClass.TOTAL_INCREASING,
+            description=SensorDescription(
+                key="link_state",
+                translation_key="link_state",
+                name=f"{model} {unique_device_id} Link State",
+                device_class=SensorDeviceClass.ENUM,
+                options=[state.value for state in LinkState],
+                entity_category=EntityCategory.DIAGNOSTIC,
+                available_on_failure=True,
+            ),
+        )
+    )
+    entities.append(
+        CoordinatedSensor(
+            coordinator=coordinator,
+            device_info=device_info,
+            description=SensorDescription(
+                key="link_next_retry",
+                translation_key="link_next_retry",
+                name=f"{model} {unique_device_id} Link Next Retry",
+                device_class=SensorDeviceClass.TIMESTAMP,
+                entity_category=EntityCategory.DIAGNOSTIC,
+                available_on_failure=True,
             ),
         )
     )
 
+    # Energy and fuel, evaluated once per snapshot for all of these sensors
+    engine = MetricEngine(heater_metrics(boiler_efficiency, pellet_energy, SCAN_INTERVAL_SEC))
+    for key, name, unit, device_class, state_class in (
+        (
+            "boiler_energy_output",
+            "Boiler Energy Output",
+            UnitOfEnergy.KILO_WATT_HOUR,
+            SensorDeviceClass.ENERGY,
+            SensorStateClass.TOTAL,
+        ),
+        (
+            "boiler_fuel_power",
+            "Boiler Fuel Power",
+            UnitOfPower.KILO_WATT,
+            SensorDeviceClass.POWER,
+            SensorStateClass.MEASUREMENT,
+        ),
+        (
+            "pellet_consumption",
+            "Pellet Consumption",
+            "kg",
+            SensorDeviceClass.WEIGHT,
+            SensorStateClass.TOTAL_INCREASING,
+        ),
+    ):
+        if key not in engine.metrics:
+            continue
+        entities.append(
+            MetricSensor(
+                coordinator=coordinator,
+                engine=engine,
+                device_info=device_info,
+                entity_description=MetricSensorDescription(
+                    key=key,
+                    translation_key=key,
+                    name=f"{model} {unique_device_id} {name}",
+                    native_unit_of_measurement=unit,
+                    device_class=device_class,
+                    state_class=state_class,
+                ),
+            )
+        )
+
+    # Burner cycles, detected once per snapshot for all of these sensors
+    ignition_key = IGNITION_KEY
+    if ignition_key not in {signal.key for signal in catalog.binary_sensors}:
+        logger.warning(
+            "No %s signal in the signal maps, burner cycles end only after the hold-off",
+            ignition_key,
+        )
+        ignition_key = None
+    detector = BurnerCycleDetector(
+        ignition_key=ignition_key,
+        hold_off_sec=float(config.get(CONF_BURNER_HOLD_OFF, DEFAULT_BURNER_HOLD_OFF)),
+    )
+    for attribute, name, unit, device_class, state_class, options in (
+        (
+            "phase",
+            "Burner Phase",
+            None,
+            SensorDeviceClass.ENUM,
+            None,
+            [phase.value for phase in BurnerPhase],
+        ),
+        ("cycle_count", "Burner Cycles", None, None, SensorStateClass.TOTAL_INCREASING, None),
+        ("cycles_today", "Burner Cycles Today", None, None, SensorStateClass.MEASUREMENT, None),
+        (
+            "last_cycle_duration",
+            "Burner Last Cycle Duration",
+            UnitOfTime.SECONDS,
+            SensorDeviceClass.DURATION,
+            SensorStateClass.MEASUREMENT,
+            None,
+        ),
+        (
+            "average_cycle_duration",
+            "Burner Average Cycle Duration",
+            UnitOfTime.SECONDS,
+            SensorDeviceClass.DURATION,
+            SensorStateClass.MEASUREMENT,
+            None,
+        ),
+    ):
+        key = f"burner_{attribute}"
+        entities.append(
+            BurnerCycleSensor(
+                coordinator=coordinator,
+                detector=detector,
+                attribute=attribute,
+                device_info=device_info,
+                description=SensorDescription(
+                    key=key,
+                    translation_key=key,
+                    name=f"{model} {unique_device_id} {name}",
+                    native_unit_of_measurement=unit,
+                    device_class=device_class,
+                    state_class=state_class,
+                    options=options,
+                    stale_after=STALE_AFTER[SensorDeviceClass.POWER],
+                ),
+            )
+        )
+
     return entities
@@ -0,0 +1,54 @@
+from ...metrics import Integral, Metric
+
+
+# Reads may come somewhat late, but a gap this many poll intervals long
+# means reads went missing
+MAX_SAMPLE_GAP_INTERVALS = 1.5
+
+
+def heater_metrics(
+    boiler_efficiency: float | None, pellet_energy: float | None, poll_interval_sec: float
+) -> list[Metric]:
+    """Energy and fuel metrics of one heater.
+
+    boiler_power, the heat output in kW, is a derived value of the
+    snapshot. boiler_efficiency is in percent, pellet_energy in kWh/kg.
+    pellet_consumption is a total of its own, integrated from the pellet
+    flow, so that it keeps counting from its restored value.
+    """
+    # Heat out per fuel energy in
+    efficiency = (boiler_efficiency or 100) / 100
+    max_gap_sec = poll_interval_sec * MAX_SAMPLE_GAP_INTERVALS
+
+    metrics = [
+        Metric(
+            key="boiler_energy_output",
+            inputs=("boiler_power", "last_timestamp"),
+            formula=Integral(max_gap_sec),
+        ),
+        Metric(
+            key="boiler_fuel_power",
+            inputs=("boiler_power",),
+            formula=lambda power: power / efficiency,
+        ),
+        Metric(
+            key="boiler_fuel_energy",
+            inputs=("boiler_energy_output",),
+            formula=lambda energy: energy / efficiency,
+        ),
+    ]
+    if pellet_energy:
+        metrics += [
+            # Pellets burnt, in kg/h
+            Metric(
+                key="pellet_flow",
+                inputs=("boiler_fuel_power",),
+                formula=lambda power: power / pellet_energy,
+            ),
+            Metric(
+                key="pellet_consumption",
+                inputs=("pellet_flow", "last_timestamp"),
+                formula=Integral(max_gap_sec),
+            ),
+        ]
+    return metrics
@@ -0,0 +1,98 @@
+"""Process-wide cache of pykwb signal maps and the entity tables built from them."""
+
+from dataclasses import dataclass
+import functools
+from importlib import metadata
+import logging
+from types import MappingProxyType
+
+from pykwb.kwb import load_signal_maps
+
+from homeassistant.components.sensor.const import SensorStateClass
+
+from ..protocol.decoder import (
+    SIG_DEVICE_CLASS,
+    SIG_STATE_CLASS,
+    SIG_TYPE,
+    SIG_UNIT,
+    TYPE_BIT,
+    sensor_key,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    PYKWB_VERSION = metadata.version("pykwb")
+except metadata.PackageNotFoundError:
+    PYKWB_VERSION = None
+
+# Signal map source the sensor and binary_sensor platforms build entities from
+ENTITY_SIGNAL_SOURCE = 10
+
+
+@dataclass(frozen=True)
+class SignalEntry:
+    """Everything an entity needs to know about one signal."""
+
+    message_id: int
+    signal_key: str
+    key: str
+    unit: str | None
+    state_class: str | None
+    device_class: str | None
+
+
+@dataclass(frozen=True)
+class SignalCatalog:
+    """Immutable, parsed signal maps of one pykwb source."""
+
+    source: int | None
+    # Indexed by message id. Entries are read-only mappings or None.
+    signal_maps: tuple
+    sensors: tuple[SignalEntry, ...]
+    binary_sensors: tuple[SignalEntry, ...]
+
+
+def get_signal_catalog(source: int | None = None) -> SignalCatalog:
+    """Return the catalog for source, parsing the signal maps only once.
+
+    All appliances and both platforms share the result. The cache is keyed
+    on the installed pykwb version, so a pykwb update invalidates it.
+    """
+    return _build_catalog(source, PYKWB_VERSION)
+
+
+@functools.lru_cache(maxsize=None)
+def _build_catalog(source: int | None, pykwb_version: str | None) -> SignalCatalog:
+    signal_maps = load_signal_maps() if source is None else load_signal_maps(source=source)
+    logger.debug("Parsed pykwb %s signal maps for source %s", pykwb_version, source)
+
+    sensors = []
+    binary_sensors = []
+    for message_id, signal_map in enumerate(signal_maps):
+        if not signal_map:
+            continue
+        for signal_key, signal_definition in signal_map.items():
+            entry = SignalEntry(
+                message_id=message_id,
+                signal_key=signal_key,
+                key=sensor_key(signal_key, signal_definition),
+                unit=signal_definition[SIG_UNIT],
+                state_class=signal_definition[SIG_STATE_CLASS]
+                or SensorStateClass.MEASUREMENT,
+                device_class=signal_definition[SIG_DEVICE_CLASS],
+            )
+            if signal_definition[SIG_TYPE] == TYPE_BIT:
+                binary_sensors.append(entry)
+            else:
+                sensors.append(entry)
+
+    return SignalCatalog(
+        source=source,
+        signal_maps=tuple(
+            MappingProxyType(dict(signal_map)) if signal_map else None
+            for signal_map in signal_maps
+        ),
+        sensors=tuple(sensors),
+        binary_sensors=tuple(binary_sensors),
+    )
@@ -0,0 +1,196 @@
+"""Burner cycles detected from the live stream of snapshots.
+
+A cycle starts with ignition, burns while boiler_output is above zero
+and ends when the output has stayed at zero for hold_off_sec, or when the
+burner ignites again before that. The output dropping to zero for a
+shorter time is modulation within the same cycle. Heaters whose signal
+maps have no ignition signal go straight from off to burning on the
+first output, and only the hold-off ends their cycles.
+
+Only the current cycle, running totals and a fixed number of daily
+counts are kept, so memory does not grow with the number of cycles.
+"""
+
+from array import array
+from collections.abc import Mapping
+from datetime import date, datetime
+from enum import StrEnum
+import logging
+
+from .snapshot import Snapshot
+
+logger = logging.getLogger(__name__)
+
+# Days of cycle counts kept for the histogram, today included
+HISTOGRAM_DAYS = 7
+
+
+class BurnerPhase(StrEnum):
+    OFF = "off"
+    IGNITION = "ignition"
+    BURNING = "burning"
+    SHUTDOWN = "shutdown"
+
+
+class BurnerCycleDetector:
+    """State machine fed with snapshots, counting burner cycles.
+
+    All sensors of a heater share one detector. The first one called on
+    a coordinator update feeds the snapshot, the others reuse the result.
+    Times are the heater read times in last_timestamp, in ms. The default
+    hold-off is const.DEFAULT_BURNER_HOLD_OFF, it can be changed in the
+    options.
+    """
+
+    def __init__(
+        self,
+        hold_off_sec: float,
+        ignition_key: str | None = "ignition",
+        output_key: str = "boiler_output",
+        histogram_days: int = HISTOGRAM_DAYS,
+    ):
+        self.ignition_key = ignition_key
+        self.output_key = output_key
+        self.hold_off_sec = hold_off_sec
+        self.phase = BurnerPhase.OFF
+        # Completed cycles, restored ones included
+        self.cycle_count = 0
+        self.last_cycle_duration: float | None = None
+        # Cycles the average duration is taken over, and their total duration
+        self.timed_cycle_count = 0
+        self._total_duration = 0.0
+        # Times in ms the current cycle started and its output last dropped to zero
+        self._started_at: float | None = None
+        self._output_zero_at: float | None = None
+        # Cycles per day, day n at n % histogram_days. _day is the newest.
+        self._day_counts = array("I", bytes(4 * histogram_days))
+        self._day: int | None = None
+        self._updated: Snapshot | None = None
+        self._timestamp: float | None = None
+
+    @property
+    def average_cycle_duration(self) -> float | None:
+        if not self.timed_cycle_count:
+            return None
+        return self._total_duration / self.timed_cycle_count
+
+    def restore_cycle_count(self, cycle_count: int):
+        """Add a count saved before a restart to the cycles counted since."""
+        self.cycle_count += int(cycle_count)
+
+    def restore_last_cycle_duration(self, duration: float):
+        if self.last_cycle_duration is None:
+            self.last_cycle_duration = float(duration)
+
+    def restore_average_cycle_duration(self, average: float, cycles: int):
+        """Add cycles of the given average duration, saved before a restart."""
+        self._total_duration += float(average) * int(cycles)
+        self.timed_cycle_count += int(cycles)
+
+    def restore_cycles_per_day(self, cycles_per_day: Mapping[str, int]):
+        """Add daily counts saved before a restart, as cycles_per_day() returns them.
+
+        Days outside the histogram are dropped. Keys that are no ISO date,
+        like the other state attributes the counts are stored with, are
+        skipped.
+        """
+        counts = {}
+        for day, count in cycles_per_day.items():
+            try:
+                counts[date.fromisoformat(day).toordinal()] = int(count)
+            except (TypeError, ValueError):
+                continue
+        if not counts:
+            return
+        if self._day is None:
+            self._day = max(counts)
+        days = len(self._day_counts)
+        for day, count in counts.items():
+            if self._day - days < day <= self._day:
+                self._day_counts[day % days] += count
+
+    def update(self, snapshot: Snapshot | None):
+        """Feed snapshot, unless it was fed already or holds no new sample."""
+        if snapshot is None or snapshot is self._updated:
+            return
+        self._updated = snapshot
+        timestamp = snapshot.get("last_timestamp")
+        if timestamp is None or timestamp == self._timestamp:
+            return
+        self._timestamp = timestamp
+        ignition = snapshot.get(self.ignition_key) if self.ignition_key else None
+        self.feed(timestamp, ignition, snapshot.get(self.output_key))
+
+    def feed(self, timestamp_ms: float, ignition: bool | None, output: float | None):
+        """Advance the state machine by one sample. Unknown values change nothing."""
+        self._roll_days(timestamp_ms)
+        burning = None if output is None else output > 0
+        phase = self.phase
+
+        if phase is BurnerPhase.OFF:
+            if ignition:
+                self._start(timestamp_ms, BurnerPhase.IGNITION)
+            elif burning:
+                self._start(timestamp_ms, BurnerPhase.BURNING)
+        elif phase is BurnerPhase.IGNITION:
+            if burning:
+                self.phase = BurnerPhase.BURNING
+            elif ignition is False:
+                # Never got going, not a cycle
+                logger.debug("Ignition without output at %s", timestamp_ms)
+                self.phase = BurnerPhase.OFF
+                self._started_at = None
+        elif phase is BurnerPhase.BURNING:
+            if burning is False:
+                self.phase = BurnerPhase.SHUTDOWN
+                self._output_zero_at = timestamp_ms
+        elif phase is BurnerPhase.SHUTDOWN:
+            if burning:
+                self.phase = BurnerPhase.BURNING
+            elif ignition:
+                # Ignited again before the hold-off ran out
+                self._end(self._output_zero_at)
+                self._start(timestamp_ms, BurnerPhase.IGNITION)
+            elif (timestamp_ms - self._output_zero_at) / 1000 >= self.hold_off_sec:
+                self._end(self._output_zero_at)
+
+    def _start(self, timestamp_ms: float, phase: BurnerPhase):
+        self.phase = phase
+        self._started_at = timestamp_ms
+
+    def _end(self, timestamp_ms: float):
+        duration = max(0.0, (timestamp_ms - self._started_at) / 1000)
+        self.cycle_count += 1
+        self.last_cycle_duration = duration
+        self.timed_cycle_count += 1
+        self._total_duration += duration
+        self._day_counts[self._day % len(self._day_counts)] += 1
+        self.phase = BurnerPhase.OFF
+        self._started_at = self._output_zero_at = None
+
+    def _roll_days(self, timestamp_ms: float):
+        """Clear the counts of days that passed since the last sample."""
+        day = datetime.fromtimestamp(timestamp_ms / 1000).toordinal()
+        if self._day is None:
+            self._day = day
+        if day <= self._day:
+            return
+        for passed in range(self._day + 1, min(day, self._day + len(self._day_counts)) + 1):
+            self._day_counts[passed % len(self._day_counts)] = 0
+        self._day = day
+
+    @property
+    def cycles_today(self) -> int | None:
+        if self._day is None:
+            return None
+        return self._day_counts[self._day % len(self._day_counts)]
+
+    def cycles_per_day(self) -> dict[str, int]:
+        """Cycles of the last histogram_days, by ISO date, oldest first."""
+        if self._day is None:
+            return {}
+        days = len(self._day_counts)
+        return {
+            date.fromordinal(day).isoformat(): self._day_counts[day % days]
+            for day in range(self._day - days + 1, self._day + 1)
+        }
@@ -0,0 +1,41 @@
+"""Values calculated from decoded signals rather than read from the heater."""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DerivedValues:
+    """Calculate the values pykwb adds in read_data_once().
+
+    Used by read paths that decode frames themselves, so that entities see
+    the same keys whichever way the data was read.
+    """
+
+    def __init__(self, heater_config: dict, last_values: dict):
+        self.boiler_nominal_power = heater_config.get("boiler_nominal_power_kW")
+        self.boiler_run_time = last_values.get("boiler_run_time") or 0.0
+        self.boiler_on = False
+        # Time of the last sample that carried boiler_output
+        self._last_output_timestamp: float | None = None
+
+    def update(self, data: dict, timestamp_ms: float) -> dict:
+        """Return derived values given freshly decoded data taken at timestamp_ms."""
+        derived = {"last_timestamp": timestamp_ms}
+
+        if self.boiler_nominal_power is not None:
+            derived["boiler_nominal_power"] = self.boiler_nominal_power
+
+        if (boiler_output := data.get("boiler_output")) is not None:
+            # Run time accumulates for the interval the boiler was already on
+            if self.boiler_on and self._last_output_timestamp is not None:
+                elapsed_ms = timestamp_ms - self._last_output_timestamp
+                self.boiler_run_time += max(0.0, elapsed_ms) / 1000
+            self._last_output_timestamp = timestamp_ms
+            self.boiler_on = boiler_output > 0
+            derived["boiler_on"] = self.boiler_on
+            if self.boiler_nominal_power is not None:
+                derived["boiler_power"] = self.boiler_nominal_power * boiler_output / 100
+
+        derived["boiler_run_time"] = self.boiler_run_time
+        return derived
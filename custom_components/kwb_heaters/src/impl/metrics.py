@@ -0,0 +1,123 @@
+"""Metrics calculated from signals by declarative formulas.
+
+A Metric names its inputs, signal keys of the snapshot or other metrics,
+and a formula that is called with their values. MetricEngine orders all
+metrics so that every input is calculated before it is used and, for
+every new snapshot, evaluates them in one pass. A metric whose inputs are
+all unchanged keeps its value without calling its formula. Neither does
+a metric with a missing input.
+"""
+
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+import graphlib
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Metric:
+    key: str
+    # Snapshot keys or metric keys, passed to formula in this order
+    inputs: tuple[str, ...]
+    formula: Callable[..., Any]
+
+
+class Integral:
+    """Stateful formula: integrates a value over time with the trapezoidal rule.
+
+    Called with the value and its sample time in ms, returns the total in
+    value units times hours. Samples further apart than max_gap_sec are
+    not integrated, as the value in between is unknown: samples went
+    missing, the heater was unreachable or Home Assistant restarted.
+    """
+
+    def __init__(self, max_gap_sec: float):
+        self.max_gap_sec = max_gap_sec
+        self.total = 0.0
+        # The previous sample as (time in ms, value)
+        self._last_sample: tuple[float, float] | None = None
+
+    def restore(self, total: float):
+        """Add a total saved before a restart to what was integrated since."""
+        self.total += float(total)
+
+    def __call__(self, value: float, timestamp_ms: float) -> float:
+        previous, self._last_sample = self._last_sample, (timestamp_ms, value)
+        if previous is None:
+            return self.total
+        elapsed_sec = (timestamp_ms - previous[0]) / 1000
+        if elapsed_sec <= 0:
+            # Clock went back, or a replayed sample
+            return self.total
+        if elapsed_sec > self.max_gap_sec:
+            logger.debug("%.0fs between samples, not integrating them", elapsed_sec)
+            return self.total
+        self.total += (previous[1] + value) / 2 * elapsed_sec / 3600
+        return self.total
+
+
+class MetricEngine:
+    """Evaluates a set of metrics on snapshots, in dependency order.
+
+    Raises ValueError if the metrics depend on each other in a cycle.
+    """
+
+    def __init__(self, metrics: Iterable[Metric]):
+        self.metrics = {metric.key: metric for metric in metrics}
+        sorter = graphlib.TopologicalSorter(
+            {
+                key: [name for name in metric.inputs if name in self.metrics]
+                for key, metric in self.metrics.items()
+            }
+        )
+        # Raises graphlib.CycleError, a ValueError
+        self.plan = [self.metrics[key] for key in sorter.static_order()]
+        self.values: dict[str, Any] = {}
+        # Metrics that changed in the last evaluation
+        self.changed: set[str] = set()
+        self._inputs: dict[str, tuple] = {}
+        self._evaluated: Mapping | None = None
+
+    def value(self, key: str) -> Any:
+        return self.values.get(key)
+
+    def restore(self, key: str, value: Any):
+        """Restore a total saved before a restart.
+
+        Only integrals carry state over restarts. Other metrics are
+        calculated from their inputs again.
+        """
+        formula = self.metrics[key].formula
+        if isinstance(formula, Integral):
+            formula.restore(value)
+            self.values[key] = formula.total
+
+    def evaluate(self, snapshot: Mapping) -> set[str]:
+        """Bring all metrics up to date with snapshot. Returns the changed keys.
+
+        Evaluating the same snapshot again does nothing, so every entity
+        showing a metric may call this on every coordinator update.
+        """
+        if snapshot is self._evaluated:
+            return self.changed
+        self._evaluated = snapshot
+
+        changed = set()
+        values = self.values
+        for metric in self.plan:
+            inputs = tuple(
+                values.get(name) if name in self.metrics else snapshot.get(name)
+                for name in metric.inputs
+            )
+            if inputs == self._inputs.get(metric.key) or None in inputs:
+                continue
+            self._inputs[metric.key] = inputs
+            value = metric.formula(*inputs)
+            if value != values.get(metric.key):
+                values[metric.key] = value
+                changed.add(metric.key)
+        self.changed = changed
+        return changed
@@ -0,0 +1,84 @@
+import logging
+
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from ....api.platform.sensor.sensor_coordinated import CoordinatedSensor
+from ....api.platform.sensor.sensor_description import SensorDescription
+from ...cycles import BurnerCycleDetector
+from .rolling_sensor import SAMPLE_CONTEXT
+
+logger = logging.getLogger(__name__)
+
+
+class BurnerCycleSensor(CoordinatedSensor):
+    """Sensor showing one attribute of a BurnerCycleDetector.
+
+    The sensor is available while the detector's boiler_output is fresh.
+    The cycles_today sensor also has the daily counts as attributes, the
+    average_cycle_duration sensor the number of cycles averaged. Counts
+    and durations are restored into the detector on restart.
+    """
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        detector: BurnerCycleDetector,
+        attribute: str,
+        description: SensorDescription,
+        device_info: DeviceInfo,
+    ):
+        super().__init__(coordinator, description=description, device_info=device_info)
+        self.coordinator_context = SAMPLE_CONTEXT
+        self._init_snapshot(detector.output_key, description.stale_after)
+        self.detector = detector
+        self.attribute = attribute
+
+    def _live_value(self):
+        return getattr(self.detector, self.attribute)
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        if self.attribute == "cycles_today":
+            return self.detector.cycles_per_day()
+        if self.attribute == "average_cycle_duration":
+            return {"cycles": self.detector.timed_cycle_count}
+        return None
+
+    async def async_added_to_hass(self) -> None:
+        await self._async_restore_detector()
+        await super().async_added_to_hass()
+
+    async def _async_restore_detector(self):
+        if self.attribute == "cycles_today":
+            state = await self.async_get_last_state()
+            if state is not None:
+                self._restore(self.detector.restore_cycles_per_day, state.attributes)
+            return
+        data = await self.async_get_last_sensor_data()
+        if data is None or data.native_value is None:
+            return
+        value = data.native_value
+        if self.attribute == "cycle_count":
+            self._restore(self.detector.restore_cycle_count, value)
+        elif self.attribute == "last_cycle_duration":
+            self._restore(self.detector.restore_last_cycle_duration, value)
+        elif self.attribute == "average_cycle_duration":
+            state = await self.async_get_last_state()
+            cycles = state.attributes.get("cycles") if state is not None else None
+            if cycles:
+                self._restore(self.detector.restore_average_cycle_duration, value, cycles)
+
+    def _restore(self, restore, *args):
+        try:
+            restore(*args)
+        except (TypeError, ValueError) as e:
+            logger.warning(
+                "Cannot restore %s from %s: %s", self.entity_description.key, args, e
+            )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self.detector.update(self.coordinator.data)
+        super()._handle_coordinator_update()
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+import logging
+
+from homeassistant.components.sensor import SensorExtraStoredData
+from homeassistant.core import State, callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from ....api.platform.sensor.sensor_composable import (
+    ComposableSensor,
+    ComposableSensorDescription,
+)
+from ....api.platform.sensor.sensor_composable_types import (
+    GetAvailableType,
+    GetNativeValueType,
+    GetUniqueSensorIdType,
+    RestoreNativeValueType,
+    UndefinedBehaviorType,
+)
+from ...metrics import MetricEngine
+
+logger = logging.getLogger(__name__)
+
+
+def _nothing(sensor: "MetricSensor") -> None:
+    return
+
+
+def _unique_id(sensor: "MetricSensor") -> str:
+    unique_device_id = list(sensor.device_info.get("identifiers"))[0][1]
+    return f"kwb_{unique_device_id}_{sensor.entity_description.key}"
+
+
+def _native_value(sensor: "MetricSensor"):
+    return sensor.engine.value(sensor.entity_description.key)
+
+
+def _available(sensor: "MetricSensor") -> bool:
+    return _native_value(sensor) is not None
+
+
+def _restore_native_value(
+    sensor: "MetricSensor",
+    data: SensorExtraStoredData | None = None,
+    state: State | None = None,
+):
+    if data is None or data.native_value is None:
+        return None
+    sensor.engine.restore(sensor.entity_description.key, data.native_value)
+    return _native_value(sensor)
+
+
+@dataclass
+class MetricSensorDescription(ComposableSensorDescription):
+    """Shows the metric of the same key. Totals are restored on restart."""
+
+    restore: bool = True
+    f_get_unique_sensor_id: GetUniqueSensorIdType = _unique_id
+    f_get_native_value: GetNativeValueType = _native_value
+    f_get_available: GetAvailableType = _available
+    f_restore_native_value: RestoreNativeValueType = _restore_native_value
+    f_on_init: UndefinedBehaviorType = _nothing
+    f_on_poll_update: UndefinedBehaviorType = _nothing
+    f_on_loaded: UndefinedBehaviorType = _nothing
+    f_on_restore_state: UndefinedBehaviorType = _nothing
+    f_on_coordinator_update: UndefinedBehaviorType = _nothing
+
+
+class MetricSensor(ComposableSensor):
+    """Sensor showing one metric of a MetricEngine.
+
+    All metric sensors of a heater share the engine. The first one called
+    on a coordinator update evaluates every metric, the others reuse the
+    result. Only sensors whose metric or availability changed write their
+    state.
+    """
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        engine: MetricEngine,
+        entity_description: MetricSensorDescription,
+        device_info: DeviceInfo,
+    ):
+        self.engine = engine
+        # Availability of the last state write
+        self._written_available: bool | None = None
+        super().__init__(
+            entity_description=entity_description,
+            device_info=device_info,
+            coordinator=coordinator,
+        )
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.entity_description.f_get_available(self)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        snapshot = self.coordinator.data
+        changed = snapshot is not None and (
+            self.entity_description.key in self.engine.evaluate(snapshot)
+        )
+        available = self.available
+        if not changed and available == self._written_available:
+            return
+        self._written_available = available
+        super()._handle_coordinator_update()
@@ -0,0 +1,49 @@
+from datetime import timedelta
+import logging
+
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from ....api.platform.sensor.sensor_coordinated import CoordinatedSensor
+from ....api.platform.sensor.sensor_description import SensorDescription
+from ...rolling import RollingStats, Statistic
+
+logger = logging.getLogger(__name__)
+
+# Updated on every read, so the windows take a sample and drop old ones
+# even while the source value does not change
+SAMPLE_CONTEXT = "last_timestamp"
+
+
+class RollingStatSensor(CoordinatedSensor):
+    """Sensor showing one rolling-window statistic of another snapshot key.
+
+    The description's key names the statistic, stats.key the source. The
+    sensor is available while the source is fresh.
+    """
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        stats: RollingStats,
+        window: timedelta,
+        statistic: Statistic,
+        description: SensorDescription,
+        device_info: DeviceInfo,
+    ):
+        super().__init__(coordinator, description=description, device_info=device_info)
+        self.coordinator_context = SAMPLE_CONTEXT
+        self._init_snapshot(stats.key, description.stale_after)
+        self.stats = stats
+        self.window_sec = window.total_seconds()
+        self.statistic = statistic
+
+    def _live_value(self):
+        value = self.stats.value(self.window_sec, self.statistic)
+        return None if value is None else round(value, 3)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self.stats.update(self.coordinator.data)
+        super()._handle_coordinator_update()
@@ -0,0 +1,199 @@
+"""Raw traffic capture and replay.
+
+A capture file is gzip compressed. Every time it is opened for writing, a
+new gzip member is appended, so a file can collect many sessions and a
+crash loses at most the unflushed tail of the last one. The uncompressed
+stream is a sequence of records:
+
+    +----------------------------+-----------------+--------------+
+    | arrival time (double, s)   | length (uint32) | raw bytes    |
+    +----------------------------+-----------------+--------------+
+
+Arrival times are Unix time, big-endian.
+"""
+
+from collections.abc import Iterator
+import gzip
+import logging
+import queue
+import struct
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+_RECORD = struct.Struct(">dI")
+# Seconds between flushes to disk while capturing
+FLUSH_INTERVAL_SEC = 5.0
+
+
+class CaptureWriter:
+    """Appends received bytes with their arrival time to a capture file.
+
+    write() only queues the bytes, so it is safe to call on the event loop
+    and from several threads. A writer thread, started by the first write,
+    compresses and writes them to the file.
+    """
+
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL_SEC):
+        self.path = path
+        self.flush_interval = flush_interval
+        # (arrival time, bytes) records, None stops the writer thread
+        self._queue: queue.SimpleQueue[tuple[float, bytes] | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self.bytes_written = 0
+
+    def write(self, data: bytes, timestamp: float | None = None):
+        """Queue data for writing. Does nothing once the writer is closed."""
+        if not data:
+            return
+        with self._lock:
+            if self._closed:
+                return
+            self._queue.put((timestamp or time.time(), data))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="kwb_capture", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        flushed_at = time.monotonic()
+        try:
+            file = gzip.open(self.path, "ab")
+        except OSError as e:
+            logger.error("Cannot capture raw traffic to %s", self.path, exc_info=e)
+            # Drain the queue so that it does not grow
+            while self._queue.get() is not None:
+                pass
+            return
+        logger.info("Capturing raw traffic to %s", self.path)
+        with file:
+            while True:
+                try:
+                    record = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    record = ()
+                if record is None:
+                    return
+                if record:
+                    timestamp, data = record
+                    file.write(_RECORD.pack(timestamp, len(data)))
+                    file.write(data)
+                    self.bytes_written += len(data)
+                now = time.monotonic()
+                if now - flushed_at >= self.flush_interval:
+                    # Make everything so far readable without closing the member
+                    file.flush(zlib.Z_SYNC_FLUSH)
+                    flushed_at = now
+
+    def close(self):
+        """Write what is queued and close the file. Blocks until it is written."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is None:
+                return
+            self._queue.put(None)
+        self._thread.join()
+
+
+def read_capture(path: str) -> Iterator[tuple[float, bytes]]:
+    """Yield (arrival time, bytes) of every record in a capture file.
+
+    A record cut short at the end of the file, e.g. by a crash, is ignored.
+    """
+    with gzip.open(path, "rb") as file:
+        while True:
+            try:
+                header = file.read(_RECORD.size)
+                if len(header) < _RECORD.size:
+                    return
+                timestamp, size = _RECORD.unpack(header)
+                data = file.read(size)
+            except (EOFError, gzip.BadGzipFile, zlib.error):
+                logger.warning("Capture %s ends with an incomplete record", path)
+                return
+            if len(data) < size:
+                return
+            yield timestamp, data
+
+
+class CaptureSource:
+    """Replays a capture file. Same interface as TCPByteSource.
+
+    With speed 1 the bytes are returned at the pace they were recorded,
+    with speed 10 ten times as fast, and with speed 0 as fast as possible.
+    clock() returns the recorded time of the last bytes returned, so that
+    time-based derived values come out the same on every replay.
+    """
+
+    def __init__(self, path: str, speed: float = 0):
+        self.path = path
+        self.speed = speed
+        self._records: Iterator[tuple[float, bytes]] | None = None
+        self._pending: tuple[float, bytes] | None = None
+        # Recorded time of the first record, and when it was replayed
+        self._start: tuple[float, float] | None = None
+        self._now = 0.0
+
+    def open(self, timeout: float):
+        # Replay continues where the last connection stopped, like a live stream
+        if self._records is None:
+            self._records = read_capture(self.path)
+
+    def clock(self) -> float:
+        return self._now
+
+    def read(self, timeout: float) -> bytes:
+        """Return the next recorded bytes, or b"" if they are not due within timeout.
+
+        Raises ConnectionError at the end of the capture.
+        """
+        if self._pending is None:
+            self._pending = next(self._records, None)
+            if self._pending is None:
+                raise ConnectionError(f"End of capture {self.path}")
+        timestamp, data = self._pending
+
+        if self.speed:
+            if self._start is None:
+                self._start = (timestamp, time.monotonic())
+            due = self._start[1] + (timestamp - self._start[0]) / self.speed
+            wait = due - time.monotonic()
+            if wait > timeout:
+                time.sleep(max(timeout, 0))
+                return b""
+            if wait > 0:
+                time.sleep(wait)
+
+        self._pending = None
+        self._now = timestamp
+        return data
+
+    def close(self):
+        pass
+
+
+class CapturingSource:
+    """Wraps a byte source and records everything read from it."""
+
+    def __init__(self, source, writer: CaptureWriter):
+        self.source = source
+        self.writer = writer
+
+    def open(self, timeout: float):
+        self.source.open(timeout)
+
+    def read(self, timeout: float) -> bytes:
+        data = self.source.read(timeout)
+        self.writer.write(data)
+        return data
+
+    def close(self):
+        self.source.close()
+
@@ -0,0 +1,161 @@
+"""Decoders compiled once per message id from the signal maps."""
+
+import logging
+import struct
+
+from .decoder import (
+    SIG_OFFSET,
+    SIG_SCALE,
+    SIG_SIZE,
+    SIG_TYPE,
+    TYPE_BIT,
+    TYPE_SIGNED,
+    decode_signal,
+    sensor_key,
+)
+from .frame import Frame
+
+logger = logging.getLogger(__name__)
+
+# struct format characters by (byte size, signed)
+_FORMATS = {
+    (1, False): "B",
+    (1, True): "b",
+    (2, False): "H",
+    (2, True): "h",
+    (4, False): "I",
+    (4, True): "i",
+}
+
+
+class _StructGroup:
+    """Non-overlapping numeric signals read with a single struct.unpack_from()."""
+
+    def __init__(self):
+        self.fields: list[tuple[int, int, str, str, float | None]] = []
+        self.end = 0
+
+    def compile(self):
+        fields = sorted(self.fields, key=lambda field: field[0])
+        fmt = ">"
+        position = 0
+        for offset, size, char, _, _ in fields:
+            fmt += f"{offset - position}x" if offset > position else ""
+            fmt += char
+            position = offset + size
+        self.struct = struct.Struct(fmt)
+        self.keys = tuple(field[3] for field in fields)
+        self.scales = tuple(
+            field[4] if field[4] and field[4] != 1 else None for field in fields
+        )
+
+
+class CompiledMessage:
+    """Decodes all signals of one message id in one pass over the payload."""
+
+    def __init__(self, signal_map):
+        self.groups: list[_StructGroup] = []
+        # (key, byte offset, mask) of bit signals
+        self.bits: list[tuple[str, int, int]] = []
+        # Signals struct can't express, decoded the generic way
+        self.generic: list[tuple[str, tuple]] = []
+
+        for signal_key, signal_definition in signal_map.items():
+            key = sensor_key(signal_key, signal_definition)
+            offset = signal_definition[SIG_OFFSET]
+            if signal_definition[SIG_TYPE] == TYPE_BIT:
+                self.bits.append((key, offset, 1 << signal_definition[SIG_SIZE]))
+                continue
+            size = signal_definition[SIG_SIZE] or 1
+            char = _FORMATS.get((size, signal_definition[SIG_TYPE] == TYPE_SIGNED))
+            if char is None:
+                self.generic.append((key, signal_definition))
+                continue
+            self._group_for(offset, size).fields.append(
+                (offset, size, char, key, signal_definition[SIG_SCALE])
+            )
+
+        for group in self.groups:
+            group.compile()
+        self.bits.sort(key=lambda bit: bit[1])
+        self.bits_end = max((offset + 1 for _, offset, _ in self.bits), default=0)
+
+    def _group_for(self, offset: int, size: int) -> _StructGroup:
+        """Return the first group the field does not overlap with."""
+        for group in self.groups:
+            if all(
+                offset + size <= other[0] or other[0] + other[1] <= offset
+                for other in group.fields
+            ):
+                group.end = max(group.end, offset + size)
+                return group
+        group = _StructGroup()
+        group.end = offset + size
+        self.groups.append(group)
+        return group
+
+    def decode(self, payload: bytes) -> dict:
+        data = {}
+        for group in self.groups:
+            if len(payload) < group.end:
+                # Short frame: decode what is there, signal by signal
+                self._decode_short(payload, group, data)
+                continue
+            for key, value, scale in zip(
+                group.keys, group.struct.unpack_from(payload), group.scales
+            ):
+                data[key] = value if scale is None else round(value * scale, 3)
+
+        if len(payload) >= self.bits_end:
+            for key, offset, mask in self.bits:
+                data[key] = bool(payload[offset] & mask)
+        else:
+            for key, offset, mask in self.bits:
+                if offset < len(payload):
+                    data[key] = bool(payload[offset] & mask)
+
+        for key, signal_definition in self.generic:
+            value = decode_signal(payload, signal_definition)
+            if value is not None:
+                data[key] = value
+        return data
+
+    @staticmethod
+    def _decode_short(payload: bytes, group: _StructGroup, data: dict):
+        for offset, size, char, key, scale in group.fields:
+            if offset + size > len(payload):
+                continue
+            (value,) = struct.unpack_from(">" + char, payload, offset)
+            data[key] = value if not scale or scale == 1 else round(value * scale, 3)
+
+
+class CompiledMessageDecoder:
+    """Drop-in replacement for MessageDecoder using precompiled struct layouts.
+
+    Each message id is compiled the first time one of its frames is
+    decoded, and then reused for every later frame.
+    """
+
+    def __init__(self, signal_maps, message_ids: list[int]):
+        self.signal_maps = signal_maps
+        self.message_ids = set(message_ids)
+        self._compiled: dict[int, CompiledMessage | None] = {}
+
+    def decode(self, frame: Frame) -> dict:
+        """Return {sensor key: value} for all signals in frame."""
+        if frame.message_id not in self.message_ids:
+            return {}
+        try:
+            compiled = self._compiled[frame.message_id]
+        except KeyError:
+            compiled = self._compiled[frame.message_id] = self._compile(
+                frame.message_id
+            )
+        if compiled is None:
+            return {}
+        return compiled.decode(frame.payload)
+
+    def _compile(self, message_id: int) -> CompiledMessage | None:
+        if message_id >= len(self.signal_maps) or not self.signal_maps[message_id]:
+            return None
+        return CompiledMessage(self.signal_maps[message_id])
@@ -0,0 +1,138 @@
+"""Decode frame payloads into signal values using pykwb signal maps.
+
+The meaning of positions 0 (type) and 4 to 7 (unit, key, state class,
+device class) of a signal definition is known from how the integration
+uses pykwb. Positions 1 to 3 are taken to be the byte offset into the
+payload, the size or bit number and the scale. pykwb does not document
+that and it has not been validated against a heater, which is why the
+modes that decode natively are experimental. check_signal_maps() refuses
+signal maps that do not even have that shape.
+"""
+
+import logging
+
+from .frame import Frame
+
+logger = logging.getLogger(__name__)
+
+# Positions in a pykwb signal definition tuple. 1 to 3 are assumed, see above.
+SIG_TYPE = 0
+SIG_OFFSET = 1
+# Byte length of a value, or bit number for bit signals
+SIG_SIZE = 2
+SIG_SCALE = 3
+SIG_UNIT = 4
+SIG_KEY = 5
+SIG_STATE_CLASS = 6
+SIG_DEVICE_CLASS = 7
+
+# Signal types
+TYPE_BIT = "b"
+TYPE_SIGNED = "s"
+
+
+class SignalMapLayoutError(ValueError):
+    """Signal maps the native decoders cannot read."""
+
+
+def sensor_key(signal_key: str, signal_definition: tuple) -> str:
+    """Return the snapshot key for a signal."""
+    return (
+        signal_definition[SIG_KEY]
+        if signal_definition[SIG_KEY] and signal_definition[SIG_KEY] != ""
+        else signal_key.lower().replace(" ", "_")
+    )
+
+
+def decode_signal(payload: bytes, signal_definition: tuple):
+    """Return the value of one signal in payload, or None if it is not in there."""
+    offset = signal_definition[SIG_OFFSET]
+    if signal_definition[SIG_TYPE] == TYPE_BIT:
+        if offset >= len(payload):
+            return None
+        return bool(payload[offset] >> signal_definition[SIG_SIZE] & 1)
+
+    size = signal_definition[SIG_SIZE] or 1
+    if offset + size > len(payload):
+        return None
+    value = int.from_bytes(
+        payload[offset : offset + size],
+        "big",
+        signed=signal_definition[SIG_TYPE] == TYPE_SIGNED,
+    )
+    scale = signal_definition[SIG_SCALE]
+    if scale and scale != 1:
+        return round(value * scale, 3)
+    return value
+
+
+def _has_native_layout(signal_definition) -> bool:
+    if not isinstance(signal_definition, tuple) or len(signal_definition) <= SIG_DEVICE_CLASS:
+        return False
+    signal_type = signal_definition[SIG_TYPE]
+    offset = signal_definition[SIG_OFFSET]
+    size = signal_definition[SIG_SIZE]
+    scale = signal_definition[SIG_SCALE]
+    if not isinstance(signal_type, str) or not isinstance(offset, int) or offset < 0:
+        return False
+    if signal_type == TYPE_BIT:
+        return isinstance(size, int) and 0 <= size < 8
+    if size is not None and not (isinstance(size, int) and size >= 0):
+        return False
+    return scale is None or isinstance(scale, (int, float))
+
+
+def check_signal_maps(signal_maps, message_ids) -> None:
+    """Raise SignalMapLayoutError unless all signals of message_ids have the
+    (type, offset, size or bit, scale, ...) layout the native decoders read."""
+    for message_id in message_ids:
+        if message_id >= len(signal_maps) or not signal_maps[message_id]:
+            continue
+        for signal_key, signal_definition in signal_maps[message_id].items():
+            if not _has_native_layout(signal_definition):
+                raise SignalMapLayoutError(
+                    f"Signal {signal_key!r} of message {message_id} is defined as "
+                    f"{signal_definition!r}, which the native reader cannot decode. "
+                    "Use the scrape connection."
+                )
+
+
+def message_keys(signal_maps) -> dict[int, frozenset[str]]:
+    """Return the sensor keys of every message id that has a signal map."""
+    return {
+        message_id: frozenset(
+            sensor_key(signal_key, signal_definition)
+            for signal_key, signal_definition in signal_map.items()
+        )
+        for message_id, signal_map in enumerate(signal_maps)
+        if signal_map
+    }
+
+
+class MessageDecoder:
+    """Decodes frames of the wanted message ids, one signal at a time."""
+
+    def __init__(self, signal_maps: list, message_ids: list[int]):
+        self.signal_maps = signal_maps
+        self.message_ids = set(message_ids)
+
+    def decode(self, frame: Frame) -> dict:
+        """Return {sensor key: value} for all signals in frame."""
+        if frame.message_id not in self.message_ids:
+            return {}
+        if frame.message_id >= len(self.signal_maps):
+            return {}
+        signal_map = self.signal_maps[frame.message_id]
+        if not signal_map:
+            return {}
+
+        data = {}
+        for signal_key, signal_definition in signal_map.items():
+            try:
+                value = decode_signal(frame.payload, signal_definition)
+            except (IndexError, TypeError, ValueError) as e:
+                logger.debug("Cannot decode signal %s", signal_key, exc_info=e)
+                continue
+            if value is not None:
+                data[sensor_key(signal_key, signal_definition)] = value
+        return data
@@ -0,0 +1,209 @@
+"""KWB bus frames and an incremental frame parser.
+
+The framing follows the reader in pykwb 0.0.21 (KWBEasyfire._read_packet).
+There are two kinds of frames, both starting with the sync byte 0x02:
+
+    sense:   | 0x02 | 0x02 | length | message id | counter | data (length) | checksum |
+    control: | 0x02 | type | message id | counter | data (16)            | checksum |
+
+Any second byte but 0x00 and 0x02 starts a control frame. 0x02 followed
+by 0x00 is not a frame: it is how a 0x02 in sense data is escaped on the
+wire. The sense length counts the data bytes as sent, escapes included.
+Control data is always 16 bytes and is taken as is.
+
+The checksum is the KWB rotate-left-and-add sum: rotate the running sum
+left by one bit, add the byte, and subtract 255 if the result overflows a
+byte. For sense frames it starts at the second 0x02, for control frames
+at the first. pykwb 0.0.21 computes it the same way but never checks it.
+
+pykwb 0.0.21 calls the byte after the header the version and does not
+use it. Here it is the message id that selects the signal map (32 and
+33 for sense, 64 and 65 for control frames, the ids the integration has
+always read). That mapping is not validated against a heater yet.
+
+The integration itself requires the pykwb 0.1.4 fork (manifest.json),
+whose KWBMessageStream the scrape connection type reads with. The fork's
+framing was not available to model this on, so benchmarks/
+decode_throughput.py checks this parser against it where it is installed.
+"""
+
+from dataclasses import asdict, dataclass
+import time
+from typing import NamedTuple
+
+SYNC = 0x02
+# Second byte of a sense frame. Any other byte but ESCAPE starts a control frame.
+SENSE = 0x02
+ESCAPE = 0x00
+# Second byte of the control frames built by encode_frame()
+CONTROL = 0x01
+# Sync, sense, length, message id and counter
+SENSE_HEADER_SIZE = 5
+# Sync, type, message id and counter
+CONTROL_HEADER_SIZE = 4
+CONTROL_DATA_SIZE = 16
+CHECKSUM_SIZE = 1
+MAX_SENSE_DATA_SIZE = 255
+
+
+class Frame(NamedTuple):
+    """A frame with a valid checksum."""
+
+    message_id: int
+    # Unescaped sense data, or the 16 bytes of control data
+    payload: bytes
+    # SENSE, or the second byte of a control frame
+    frame_type: int = SENSE
+    counter: int = 0
+
+
+def _checksum_table() -> bytes:
+    """One checksum step for every (running sum, byte) pair.
+
+    The entry at (value << 8) | byte is the running sum after adding byte
+    to value. For a rotated sum r, adding bytes 0..255 gives r..255 and
+    then wraps around to 1..r.
+    """
+    rows = []
+    for value in range(256):
+        rotated = ((value << 1) | (value >> 7)) & 0xFF
+        rows.append(bytes(range(rotated, 256)) + bytes(range(1, rotated + 1)))
+    return b"".join(rows)
+
+
+_CHECKSUM_TABLE = _checksum_table()
+
+
+def checksum(data: bytes) -> int:
+    """Return the KWB checksum of data."""
+    table = _CHECKSUM_TABLE
+    value = 0
+    for byte in data:
+        value = table[(value << 8) | byte]
+    return value
+
+
+def escape(data: bytes) -> bytes:
+    return bytes(data).replace(b"\x02", b"\x02\x00")
+
+
+def unescape(data: bytes) -> bytes:
+    return bytes(data).replace(b"\x02\x00", b"\x02")
+
+
+def encode_frame(
+    message_id: int, payload: bytes, counter: int = 0, frame_type: int = SENSE
+) -> bytes:
+    """Build the wire representation of a frame.
+
+    Sense data is escaped. Control data must be exactly 16 bytes and is
+    sent as is.
+    """
+    if frame_type == SENSE:
+        data = escape(payload)
+        if len(data) > MAX_SENSE_DATA_SIZE:
+            raise ValueError(f"Sense data of {len(data)} bytes does not fit a frame")
+        body = bytes((SENSE, len(data), message_id, counter)) + data
+        # The sense checksum leaves out the first sync byte
+        return bytes((SYNC,)) + body + bytes((checksum(body),))
+    if frame_type == ESCAPE:
+        raise ValueError("0x00 after the sync byte is an escape, not a frame type")
+    if len(payload) != CONTROL_DATA_SIZE:
+        raise ValueError(f"Control data must be {CONTROL_DATA_SIZE} bytes, not {len(payload)}")
+    head = bytes((SYNC, frame_type, message_id, counter)) + payload
+    return head + bytes((checksum(head),))
+
+
+@dataclass
+class FrameStats:
+    """Link integrity counters.
+
+    One instance can be shared by several parsers, so that the counts
+    survive reconnects.
+    """
+
+    # Frames with a valid checksum
+    frames: int = 0
+    # Frames dropped because the checksum did not match, false sync bytes
+    # found while resyncing included
+    bad_checksums: int = 0
+    # Times the parser had to search for the next sync byte
+    resyncs: int = 0
+    skipped_bytes: int = 0
+    resync_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class FrameParser:
+    """Turns a byte stream into frames, however the bytes are chunked.
+
+    Garbage before a frame, an escaped 0x02, or a frame with a bad
+    checksum is skipped with a single find() for the next sync byte
+    instead of stepping forward one byte at a time. Frames with a bad
+    checksum never reach the decoder.
+    """
+
+    def __init__(self, stats: FrameStats | None = None):
+        self._buffer = bytearray()
+
+        self.stats = stats if stats is not None else FrameStats()
+
+    def feed(self, data: bytes) -> list[Frame]:
+        """Add received bytes and return all frames completed by them."""
+        buffer = self._buffer
+        buffer.extend(data)
+        frames = []
+        start = 0
+        end = len(buffer)
+        while start < end:
+            if buffer[start] != SYNC:
+                start = self._resync(start, start)
+                continue
+            if end - start < 2:
+                break
+            frame_type = buffer[start + 1]
+            if frame_type == ESCAPE:
+                # An escaped 0x02 in data we are not in sync with
+                start = self._resync(start, start + 2)
+                continue
+            if frame_type == SENSE:
+                if end - start < SENSE_HEADER_SIZE:
+                    break
+                data_start = start + SENSE_HEADER_SIZE
+                data_end = data_start + buffer[start + 2]
+                checksum_start = start + 1
+            else:
+                data_start = start + CONTROL_HEADER_SIZE
+                data_end = data_start + CONTROL_DATA_SIZE
+                checksum_start = start
+            if end <= data_end:
+                break
+            if checksum(buffer[checksum_start:data_end]) != buffer[data_end]:
+                # Corrupt or not a real frame, look for the next sync byte
+                self.stats.bad_checksums += 1
+                start = self._resync(start, start + 1)
+                continue
+            payload = bytes(buffer[data_start:data_end])
+            if frame_type == SENSE:
+                payload = unescape(payload)
+            frames.append(
+                Frame(buffer[data_start - 2], payload, frame_type, buffer[data_start - 1])
+            )
+            start = data_end + CHECKSUM_SIZE
+            self.stats.frames += 1
+        del buffer[:start]
+        return frames
+
+    def _resync(self, start: int, search_from: int) -> int:
+        """Return the position of the next sync byte at or after search_from."""
+        started = time.perf_counter()
+        position = self._buffer.find(SYNC, search_from)
+        if position == -1:
+            position = len(self._buffer)
+        stats = self.stats
+        stats.skipped_bytes += position - start
+        stats.resyncs += 1
+        stats.resync_seconds += time.perf_counter() - started
+        return position
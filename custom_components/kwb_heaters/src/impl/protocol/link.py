@@ -0,0 +1,148 @@
+"""Connection state machine with jittered exponential backoff."""
+
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from enum import StrEnum
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# Delay before the first retry, doubled for every further failure
+BASE_DELAY_SEC = 5.0
+MAX_DELAY_SEC = 300.0
+# Failures in a row before retries are spaced out
+BACKOFF_AFTER = 2
+# Failures in a row before the circuit opens
+OPEN_AFTER = 5
+
+
+class LinkState(StrEnum):
+    # Everything arrived on the last read
+    CONNECTED = "connected"
+    # The last read failed or missed message ids
+    DEGRADED = "degraded"
+    # Several reads failed, retries are spaced out
+    BACKING_OFF = "backing_off"
+    # The heater is considered gone, reads fail fast until the next retry
+    OPEN_CIRCUIT = "open_circuit"
+
+
+class CircuitOpen(ConnectionError):
+    """Raised instead of connecting while the circuit is open."""
+
+
+class LinkMonitor:
+    """Tracks the health of a connection and decides when to retry.
+
+    Every failure schedules the next attempt after a delay that doubles
+    with each failure in a row, from BASE_DELAY_SEC up to MAX_DELAY_SEC.
+    The delay is jittered between half and all of that, so that heaters
+    behind one gateway do not retry in lockstep. After OPEN_AFTER failures
+    the circuit opens. Then one attempt is let through per retry time,
+    and a complete read closes it again.
+    """
+
+    def __init__(
+        self,
+        base_delay: float = BASE_DELAY_SEC,
+        max_delay: float = MAX_DELAY_SEC,
+        backoff_after: int = BACKOFF_AFTER,
+        open_after: int = OPEN_AFTER,
+        name: str = "",
+        clock: Callable[[], float] = time.monotonic,
+        jitter: Callable[[], float] = random.random,
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.backoff_after = backoff_after
+        self.open_after = open_after
+        self.name = name
+        self._clock = clock
+        self._jitter = jitter
+        self._listeners: list[Callable[[LinkState], None]] = []
+
+        self.state = LinkState.CONNECTED
+        # Failures in a row
+        self.failures = 0
+        # clock() time before which no attempt should be made
+        self.next_retry: float | None = None
+        self.last_error: Exception | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.state is LinkState.OPEN_CIRCUIT
+
+    def may_attempt(self) -> bool:
+        """True if it is time to (re)connect."""
+        return self.next_retry is None or self._clock() >= self.next_retry
+
+    def retry_in(self) -> float:
+        """Seconds until the next attempt may be made."""
+        if self.next_retry is None:
+            return 0.0
+        return max(self.next_retry - self._clock(), 0.0)
+
+    def next_retry_at(self) -> datetime | None:
+        """Wall clock time of the next attempt, for display."""
+        if self.next_retry is None:
+            return None
+        return datetime.now(UTC) + timedelta(seconds=self.retry_in())
+
+    def succeeded(self, complete: bool = True):
+        """Record a read. complete is False if not everything arrived."""
+        had_retry = self.next_retry is not None
+        self.failures = 0
+        self.next_retry = None
+        self.last_error = None
+        changed = self._set_state(LinkState.CONNECTED if complete else LinkState.DEGRADED)
+        if changed or had_retry:
+            self._notify()
+
+    def failed(self, error: Exception | None = None):
+        """Record a failed connect or read and schedule the next attempt."""
+        self.failures += 1
+        self.last_error = error
+        doublings = max(self.failures - self.backoff_after, 0)
+        delay = min(self.max_delay, self.base_delay * 2**doublings)
+        delay = delay / 2 + self._jitter() * delay / 2
+        self.next_retry = self._clock() + delay
+        if self.failures >= self.open_after:
+            self._set_state(LinkState.OPEN_CIRCUIT)
+        elif self.failures >= self.backoff_after:
+            self._set_state(LinkState.BACKING_OFF)
+        else:
+            self._set_state(LinkState.DEGRADED)
+        # The retry time moved even if the state did not change
+        self._notify()
+
+    def add_listener(self, listener: Callable[[LinkState], None]) -> Callable[[], None]:
+        """Call listener when the state or the retry time changes.
+
+        Returns a function that removes the listener.
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _set_state(self, state: LinkState) -> bool:
+        if state is self.state:
+            return False
+        previous, self.state = self.state, state
+        if state is LinkState.OPEN_CIRCUIT:
+            logger.warning(
+                "%s unreachable after %s attempts, retrying at most every %.0fs",
+                self.name,
+                self.failures,
+                self.max_delay,
+                exc_info=self.last_error,
+            )
+        elif previous is LinkState.OPEN_CIRCUIT:
+            logger.info("%s reachable again", self.name)
+        else:
+            logger.debug("%s link %s -> %s", self.name, previous, state)
+        return True
+
+    def _notify(self):
+        for listener in list(self._listeners):
+            listener(self.state)
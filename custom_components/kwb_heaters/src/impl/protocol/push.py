@@ -0,0 +1,187 @@
+"""Native asyncio reader that pushes frames as they arrive."""
+
+import asyncio
+from collections.abc import Callable
+import logging
+import os
+
+from .capture import CaptureWriter
+from .frame import Frame, FrameParser, FrameStats
+from .link import LinkMonitor
+from .serial_port import open_port
+
+logger = logging.getLogger(__name__)
+
+
+class KWBFrameProtocol(asyncio.Protocol):
+    """Parses frames as bytes arrive and hands each one to on_frame."""
+
+    def __init__(
+        self,
+        on_frame: Callable[[Frame], None],
+        on_connection_lost: Callable[[Exception | None], None],
+        stats: FrameStats | None = None,
+        capture: CaptureWriter | None = None,
+    ):
+        self._on_frame = on_frame
+        self._on_connection_lost = on_connection_lost
+        self._parser = FrameParser(stats=stats)
+        self._capture = capture
+
+    def data_received(self, data: bytes) -> None:
+        if self._capture is not None:
+            # Only queued, the capture thread writes the file
+            self._capture.write(data)
+        for frame in self._parser.feed(data):
+            try:
+                self._on_frame(frame)
+            except Exception as e:
+                logger.error("Error handling KWB frame %s", frame.message_id, exc_info=e)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._on_connection_lost(exc)
+
+
+class PushConnection:
+    """Keeps a connection to the heater open on the event loop.
+
+    Reconnects whenever the connection drops, with the backoff of its
+    LinkMonitor, until async_stop() is called. Subclasses open the actual
+    transport.
+    """
+
+    def __init__(
+        self,
+        on_frame: Callable[[Frame], None],
+        stats: FrameStats | None = None,
+    ):
+        self._on_frame = on_frame
+        # Records the raw bytes received when set
+        self.capture: CaptureWriter | None = None
+        # Kept across reconnects
+        self.stats = stats if stats is not None else FrameStats()
+        self.link = LinkMonitor()
+        self._transport: asyncio.BaseTransport | None = None
+        self._reconnect: asyncio.TimerHandle | None = None
+        self._stopped = True
+
+    @property
+    def endpoint(self) -> str:
+        """Where the connection goes, for log messages."""
+        raise NotImplementedError
+
+    @property
+    def connected(self) -> bool:
+        return self._transport is not None
+
+    async def async_start(self) -> None:
+        """Connect. Raises OSError if the first connection attempt fails."""
+        self._stopped = False
+        self.link.name = self.endpoint
+        await self._async_connect()
+
+    async def async_stop(self) -> None:
+        """Close the connection and stop reconnecting."""
+        self._stopped = True
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+            self._reconnect = None
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    async def _async_open(
+        self, protocol_factory: Callable[[], asyncio.Protocol]
+    ) -> asyncio.BaseTransport:
+        raise NotImplementedError
+
+    async def _async_connect(self) -> None:
+        try:
+            self._transport = await self._async_open(
+                lambda: KWBFrameProtocol(
+                    self._on_frame, self._connection_lost, self.stats, self.capture
+                )
+            )
+        except OSError as e:
+            self.link.failed(e)
+            raise
+        self.link.succeeded()
+        logger.debug("Connected to %s", self.endpoint)
+
+    def _connection_lost(self, exc: Exception | None) -> None:
+        self._transport = None
+        if self._stopped:
+            return
+        logger.debug("Lost connection to %s", self.endpoint, exc_info=exc)
+        self.link.failed(exc)
+        self._schedule_reconnect()
+
+    def _schedule_reconnect(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._reconnect = loop.call_later(
+            self.link.retry_in(), lambda: loop.create_task(self._async_reconnect())
+        )
+
+    async def _async_reconnect(self) -> None:
+        self._reconnect = None
+        if self._stopped:
+            return
+        try:
+            await self._async_connect()
+        except OSError as e:
+            logger.debug("Reconnect to %s failed", self.endpoint, exc_info=e)
+            self._schedule_reconnect()
+
+
+class TCPPushConnection(PushConnection):
+    """Push connection to an RS485-to-LAN gateway."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        on_frame: Callable[[Frame], None],
+        stats: FrameStats | None = None,
+    ):
+        super().__init__(on_frame, stats)
+        self.host = host
+        self.port = port
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    async def _async_open(self, protocol_factory):
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_connection(protocol_factory, self.host, self.port)
+        return transport
+
+
+class SerialPushConnection(PushConnection):
+    """Push connection through a local serial port."""
+
+    def __init__(
+        self,
+        device: str,
+        baudrate: int,
+        on_frame: Callable[[Frame], None],
+        stats: FrameStats | None = None,
+    ):
+        super().__init__(on_frame, stats)
+        self.device = device
+        self.baudrate = baudrate
+
+    @property
+    def endpoint(self) -> str:
+        return self.device
+
+    async def _async_open(self, protocol_factory):
+        loop = asyncio.get_running_loop()
+        port = os.fdopen(open_port(self.device, self.baudrate, blocking=False), "rb", 0)
+        try:
+            # The transport owns the port from here on and closes it
+            transport, _ = await loop.connect_read_pipe(protocol_factory, port)
+        except Exception:
+            port.close()
+            raise
+        return transport
@@ -0,0 +1,64 @@
+"""Direct RS485 connection through a local serial port.
+
+Uses termios instead of pyserial, so it works on any POSIX system without
+extra requirements, including with pseudo terminals.
+"""
+
+import os
+import select
+import termios
+import tty
+
+# Max bytes taken from the port per read
+READ_SIZE = 4096
+
+
+def open_port(device: str, baudrate: int, blocking: bool = True) -> int:
+    """Open device as a raw 8N1 port without flow control and return the fd."""
+    speed = getattr(termios, f"B{baudrate}", None)
+    if speed is None:
+        raise ValueError(f"Unsupported baud rate {baudrate}")
+    flags = os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK
+    fd = os.open(device, flags)
+    try:
+        tty.setraw(fd)
+        attrs = termios.tcgetattr(fd)
+        attrs[2] |= termios.CLOCAL | termios.CREAD
+        attrs[2] &= ~(termios.PARENB | termios.CSTOPB | getattr(termios, "CRTSCTS", 0))
+        attrs[4] = attrs[5] = speed
+        termios.tcsetattr(fd, termios.TCSANOW, attrs)
+        termios.tcflush(fd, termios.TCIFLUSH)
+        if blocking:
+            os.set_blocking(fd, True)
+    except Exception:
+        os.close(fd)
+        raise
+    return fd
+
+
+class SerialByteSource:
+    """Blocking serial port connection. Same interface as TCPByteSource."""
+
+    def __init__(self, device: str, baudrate: int):
+        self.device = device
+        self.baudrate = baudrate
+        self._fd: int | None = None
+
+    def open(self, timeout: float):
+        # Opening a local port does not wait, timeout is only here for the interface
+        self._fd = open_port(self.device, self.baudrate)
+
+    def read(self, timeout: float) -> bytes:
+        """Return the bytes received, or b"" if nothing arrived within timeout."""
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0.001))
+        if not ready:
+            return b""
+        data = os.read(self._fd, READ_SIZE)
+        if not data:
+            raise ConnectionError(f"{self.device} was closed")
+        return data
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,109 @@
+"""Blocking frame reader used by the persistent connection mode and replays."""
+
+from collections.abc import Callable
+import logging
+import socket
+import time
+
+from ..derived import DerivedValues
+from .capture import CaptureSource, CapturingSource
+from .compiled import CompiledMessageDecoder
+from .decoder import MessageDecoder
+from .frame import FrameParser, FrameStats
+from .serial_port import SerialByteSource
+
+logger = logging.getLogger(__name__)
+
+# Max bytes taken from the socket per read
+READ_SIZE = 4096
+
+
+class TCPByteSource:
+    """Blocking TCP connection to an RS485-to-LAN gateway."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._socket: socket.socket | None = None
+
+    def open(self, timeout: float):
+        self._socket = socket.create_connection((self.host, self.port), timeout=timeout)
+
+    def read(self, timeout: float) -> bytes:
+        """Return the bytes received, or b"" if nothing arrived within timeout."""
+        self._socket.settimeout(max(timeout, 0.001))
+        try:
+            data = self._socket.recv(READ_SIZE)
+        except socket.timeout:
+            return b""
+        if not data:
+            raise ConnectionError(f"{self.host}:{self.port} closed the connection")
+        return data
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class FrameStream:
+    """Reads frames from a byte source and decodes the wanted message ids.
+
+    Has the same open()/read_data_once()/close() interface as pykwb's
+    KWBMessageStream. Unlike KWBMessageStream, read_data_once() returns
+    as soon as one frame of every wanted message id has been decoded.
+    """
+
+    def __init__(
+        self,
+        source: TCPByteSource | SerialByteSource | CaptureSource | CapturingSource,
+        decoder: MessageDecoder | CompiledMessageDecoder,
+        derived: DerivedValues,
+        connect_timeout: float,
+        stats: FrameStats | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.source = source
+        self.decoder = decoder
+        self.derived = derived
+        self.connect_timeout = connect_timeout
+        # Unix time of the values read, for derived values
+        self.clock = clock
+        # Kept across connections
+        self.stats = stats if stats is not None else FrameStats()
+        self._parser = FrameParser(stats=self.stats)
+        # Message ids that did not arrive before the deadline of the last read
+        self.missing_message_ids: set[int] = set()
+
+    def open(self):
+        self._parser = FrameParser(stats=self.stats)
+        self.source.open(self.connect_timeout)
+
+    def close(self):
+        self.source.close()
+
+    def read_data_once(self, message_ids: list[int], timeout: float) -> dict:
+        """Read until every message id in message_ids was decoded once.
+
+        timeout is an overall deadline for the whole read, not a per-read
+        timeout. Whatever was decoded by then is returned.
+        """
+        deadline = time.monotonic() + timeout
+        pending = set(message_ids)
+        data = {}
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for frame in self._parser.feed(self.source.read(remaining)):
+                if frame.message_id not in message_ids:
+                    continue
+                data.update(self.decoder.decode(frame))
+                pending.discard(frame.message_id)
+
+        self.missing_message_ids = pending
+        if pending:
+            logger.debug("Message ids %s did not arrive within %ss", pending, timeout)
+        if data:
+            data.update(self.derived.update(data, self.clock() * 1000))
+        return data
@@ -0,0 +1,153 @@
+"""Rolling-window statistics of signals, calculated from snapshots.
+
+A RollingWindow keeps the samples of the last window_sec seconds in
+fixed-size ring buffers, so its memory does not grow with the read rate:
+samples closer together than window_sec / capacity are skipped. Minimum
+and maximum are kept in monotonic deques, so every statistic is read in
+constant time and a sample costs amortised constant time to add and drop.
+"""
+
+from array import array
+from collections import deque
+from collections.abc import Iterable
+from enum import StrEnum
+import time
+
+from .snapshot import Snapshot
+
+# Samples kept per window
+DEFAULT_CAPACITY = 300
+
+
+class Statistic(StrEnum):
+    MIN = "min"
+    MAX = "max"
+    MEAN = "mean"
+    # Change per minute between the oldest and the newest sample
+    RATE = "rate"
+
+
+class RollingWindow:
+    """Samples of one signal over the last window_sec seconds."""
+
+    def __init__(self, window_sec: float, capacity: int = DEFAULT_CAPACITY):
+        self.window_sec = window_sec
+        self.capacity = capacity
+        self.min_interval = window_sec / capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Sequence numbers of the oldest sample and the next one. Sample n is
+        # at n % capacity.
+        self._head = 0
+        self._next = 0
+        self._sum = 0.0
+        # (sequence number, value), values increasing resp. decreasing
+        self._min: deque[tuple[int, float]] = deque()
+        self._max: deque[tuple[int, float]] = deque()
+
+    def __len__(self) -> int:
+        return self._next - self._head
+
+    def add(self, t: float, value: float) -> bool:
+        """Add the value sampled at t. Returns False if the sample was skipped."""
+        self.expire(t)
+        if len(self) and t - self._times[(self._next - 1) % self.capacity] < self.min_interval:
+            return False
+        if len(self) == self.capacity:
+            self._pop()
+        seq = self._next
+        self._times[seq % self.capacity] = t
+        self._values[seq % self.capacity] = value
+        self._next += 1
+        self._sum += value
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+        return True
+
+    def expire(self, now: float):
+        """Drop samples older than window_sec before now."""
+        cutoff = now - self.window_sec
+        while len(self) and self._times[self._head % self.capacity] < cutoff:
+            self._pop()
+
+    def _pop(self):
+        seq = self._head
+        self._head += 1
+        if self._head == self._next:
+            # Start over from an exact zero instead of the accumulated error
+            self._sum = 0.0
+        else:
+            self._sum -= self._values[seq % self.capacity]
+        if self._min[0][0] == seq:
+            self._min.popleft()
+        if self._max[0][0] == seq:
+            self._max.popleft()
+
+    @property
+    def min(self) -> float | None:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> float | None:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def mean(self) -> float | None:
+        return self._sum / len(self) if len(self) else None
+
+    @property
+    def rate(self) -> float | None:
+        if len(self) < 2:
+            return None
+        oldest = self._head % self.capacity
+        newest = (self._next - 1) % self.capacity
+        elapsed_sec = self._times[newest] - self._times[oldest]
+        if elapsed_sec <= 0:
+            return None
+        return (self._values[newest] - self._values[oldest]) / elapsed_sec * 60
+
+    def statistic(self, statistic: Statistic) -> float | None:
+        return getattr(self, statistic.value)
+
+
+class RollingStats:
+    """Rolling windows of one snapshot key.
+
+    All sensors of a key share one RollingStats. The first one called on
+    a coordinator update adds the sample, the others reuse the result. A
+    sample is taken whenever the key was recorded again, even with the
+    same value, so that a steady signal keeps its windows filled.
+    """
+
+    def __init__(self, key: str, windows: Iterable[float], capacity: int = DEFAULT_CAPACITY):
+        self.key = key
+        self.windows = {window_sec: RollingWindow(window_sec, capacity) for window_sec in windows}
+        self._updated: Snapshot | None = None
+        self._sampled_at: float | None = None
+
+    def update(self, snapshot: Snapshot | None):
+        if snapshot is None or snapshot is self._updated:
+            return
+        self._updated = snapshot
+        slot = snapshot.slot(self.key)
+        seen_at = snapshot.seen_at(slot)
+        value = snapshot.value_at(slot)
+        now = time.monotonic()
+        sample = (
+            seen_at is not None
+            and seen_at != self._sampled_at
+            and isinstance(value, (int, float))
+        )
+        if sample:
+            self._sampled_at = seen_at
+        for window in self.windows.values():
+            if sample:
+                window.add(seen_at, float(value))
+            window.expire(now)
+
+    def value(self, window_sec: float, statistic: Statistic) -> float | None:
+        return self.windows[window_sec].statistic(statistic)
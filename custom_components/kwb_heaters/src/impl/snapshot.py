@@ -0,0 +1,168 @@
+"""Immutable, versioned snapshots of an appliance's values.
+
+Every key gets a slot the first time it is seen. An entity can look its
+slot up once and read it from every later snapshot with the same index.
+Keys that have not been seen for EVICT_AFTER_SEC are dropped and the
+slots of the rest are renumbered in a new index, so that keys of old
+firmware or signal maps do not pile up. A snapshot is never changed after
+it is made: readers on the event loop always see one consistent set of
+values, even while the next read is being recorded.
+"""
+
+from array import array
+from collections.abc import Iterator, Mapping
+import logging
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Keys not seen for this long are dropped from the table
+EVICT_AFTER_SEC = 24 * 3600
+# Seconds between looks for keys to drop
+EVICT_CHECK_SEC = 3600
+
+# Default that tells a missing key from a None value
+_MISSING = object()
+
+
+class SlotIndex:
+    """Append-only mapping of key to slot, shared by snapshots of one table
+    until keys are evicted."""
+
+    def __init__(self, keys: list[str] = ()):
+        self.keys: list[str] = list(keys)
+        self._slots: dict[str, int] = {key: slot for slot, key in enumerate(self.keys)}
+
+    def slot(self, key: str) -> int | None:
+        return self._slots.get(key)
+
+    def add(self, key: str) -> int:
+        slot = self._slots.get(key)
+        if slot is None:
+            # Append the key first, readers only look up slots they can find
+            self.keys.append(key)
+            slot = self._slots[key] = len(self.keys) - 1
+        return slot
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class Snapshot(Mapping):
+    """Values of one table at one version. Read by slot, or by key like a dict.
+
+    seen holds the time.monotonic() time each value was last recorded.
+    """
+
+    __slots__ = ("version", "index", "_values", "_seen")
+
+    def __init__(self, version: int, index: SlotIndex, values: tuple, seen: array):
+        self.version = version
+        self.index = index
+        self._values = values
+        self._seen = seen
+
+    def slot(self, key: str) -> int | None:
+        """Slot of key, or None if the key has never been seen."""
+        return self.index.slot(key)
+
+    def value_at(self, slot: int | None, default: Any = None) -> Any:
+        if slot is None or slot >= len(self._values):
+            return default
+        return self._values[slot]
+
+    def has(self, slot: int | None) -> bool:
+        # Slots added after this snapshot was made are past its end
+        return slot is not None and slot < len(self._values)
+
+    def seen_at(self, slot: int | None) -> float | None:
+        """time.monotonic() time the value in slot was recorded."""
+        if not self.has(slot):
+            return None
+        return self._seen[slot]
+
+    def is_fresh(self, slot: int | None, max_age: float | None, now: float) -> bool:
+        """True if slot has a value recorded at most max_age seconds before now."""
+        if not self.has(slot):
+            return False
+        return max_age is None or now - self._seen[slot] <= max_age
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.value_at(self.index.slot(key), default)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.value_at(self.index.slot(key), _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.has(self.index.slot(key))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index.keys[: len(self._values)])
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"<Snapshot version={self.version} values={len(self._values)}>"
+
+
+class ValueTable:
+    """The writable side: records values and publishes snapshots of them.
+
+    Only one thread may write at a time. snapshot can be read from any
+    thread; publishing a new one is a single attribute assignment.
+    """
+
+    def __init__(self, evict_after: float = EVICT_AFTER_SEC):
+        self.evict_after = evict_after
+        self.index = SlotIndex()
+        self._values: list = []
+        self._seen = array("d")
+        self._checked_at = time.monotonic()
+        self.snapshot = Snapshot(0, self.index, (), self._seen[:])
+
+    def update(self, data: dict, now: float | None = None) -> Snapshot:
+        """Record data, publish the result as a new snapshot and return it."""
+        if not data:
+            return self.snapshot
+        if now is None:
+            now = time.monotonic()
+        if now - self._checked_at >= EVICT_CHECK_SEC:
+            self._checked_at = now
+            self._evict(now - self.evict_after)
+        values = self._values
+        seen = self._seen
+        for key, value in data.items():
+            slot = self.index.add(key)
+            if slot == len(values):
+                values.append(value)
+                seen.append(now)
+            else:
+                values[slot] = value
+                seen[slot] = now
+        self.snapshot = Snapshot(
+            self.snapshot.version + 1,
+            self.index,
+            tuple(values),
+            seen[:],
+        )
+        return self.snapshot
+
+    def _evict(self, seen_before: float):
+        """Drop keys last seen before seen_before and renumber the rest."""
+        keep = [slot for slot, seen in enumerate(self._seen) if seen >= seen_before]
+        if len(keep) == len(self._values):
+            return
+        logger.debug(
+            "Dropping %s values not seen for %ss",
+            len(self._values) - len(keep),
+            self.evict_after,
+        )
+        # Snapshots already handed out keep the old index
+        self.index = SlotIndex([self.index.keys[slot] for slot in keep])
+        self._values = [self._values[slot] for slot in keep]
+        self._seen = array("d", (self._seen[slot] for slot in keep))
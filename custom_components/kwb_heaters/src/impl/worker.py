@@ -0,0 +1,92 @@
+"""Per-appliance I/O worker that keeps blocking heater reads off the event loop."""
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerBusy(Exception):
+    """A job was submitted while the previous one was still running."""
+
+
+class WorkerClosed(Exception):
+    """A job was submitted after the worker was shut down."""
+
+
+class ApplianceWorker:
+    """Single-thread executor dedicated to one appliance.
+
+    All blocking I/O for an appliance (opening the byte reader, waiting for
+    frames, closing it again) runs on this thread, so the Home Assistant
+    event loop never waits on the heater. At most one job is in flight at a
+    time. A job submitted while another is still running is dropped with
+    WorkerBusy instead of being queued behind it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"kwb_{name}"
+        )
+        # Future of the job on the worker thread. It is only done once the
+        # thread is actually free, even if the awaiting coroutine was cancelled.
+        self._in_flight: Future | None = None
+        self._closed = False
+
+    @property
+    def busy(self) -> bool:
+        return self._in_flight is not None and not self._in_flight.done()
+
+    async def async_run(self, func: Callable[..., Any], *args) -> Any:
+        """Run func(*args) on the worker thread and return its result.
+
+        Raises WorkerBusy if the previous job has not finished yet and
+        WorkerClosed if the worker has been shut down.
+        """
+        if self._closed:
+            raise WorkerClosed(f"Worker {self.name} is shut down")
+        if self.busy:
+            raise WorkerBusy(f"Worker {self.name} is still running the last job")
+
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def submit(self, func: Callable[..., Any], *args) -> Future:
+        """Start func(*args) on the worker thread without waiting for it.
+
+        Used for long-running jobs like a persistent read loop. The worker
+        stays busy until the job returns.
+        """
+        if self._closed:
+            raise WorkerClosed(f"Worker {self.name} is shut down")
+        if self.busy:
+            raise WorkerBusy(f"Worker {self.name} is still running the last job")
+
+        self._in_flight = self._executor.submit(func, *args)
+        return self._in_flight
+
+    async def async_shutdown(self) -> None:
+        """Stop accepting jobs and wait for the running one to finish.
+
+        Jobs that have not started yet are cancelled. A job that is already
+        blocked in a read cannot be interrupted and finishes within its own
+        read timeout.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None,
+            functools.partial(self._executor.shutdown, wait=True, cancel_futures=True),
+        )
+        logger.debug("Worker %s shut down", self.name)
+
+    def shutdown(self) -> None:
+        """Blocking variant of async_shutdown() for use outside the event loop."""
+        self._closed = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
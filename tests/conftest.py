@@ -0,0 +1,15 @@
+"""Put the integration's impl package and the tools on the import path.
+
+Most tests only need the protocol and value handling code, which runs
+without Home Assistant. Tests that need it skip when it is not installed.
+"""
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+# Repository root for custom_components, src for the impl package alone
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "custom_components", "kwb_heaters", "src"))
+# FakeHeater, PtyHeater and the synthetic signal maps
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
@@ -0,0 +1,140 @@
+"""Change-only dispatch of the Coordinator. Needs Home Assistant."""
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from impl.snapshot import ValueTable
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.kwb_heaters.coordinator import Coordinator  # noqa: E402
+
+
+class Listeners:
+    """Records which listeners were called."""
+
+    def __init__(self, coordinator: Coordinator, *contexts):
+        self.called = []
+        for context in contexts:
+            coordinator.async_add_listener(self._listener(context), context)
+
+    def _listener(self, context):
+        return lambda: self.called.append(context)
+
+    def take(self) -> list:
+        called, self.called = self.called, []
+        return sorted(called, key=str)
+
+
+@pytest.fixture
+def values():
+    return ValueTable()
+
+
+@pytest.fixture
+def appliance(values):
+    return SimpleNamespace(
+        snapshot=values.snapshot,
+        message_keys={32: frozenset({"a"}), 33: frozenset({"b"})},
+        message_ids=[32, 33],
+        link=SimpleNamespace(is_open=False),
+    )
+
+
+@pytest.fixture
+def coordinator(tmp_path, appliance):
+    async def create():
+        # HomeAssistant wants a running event loop
+        return Coordinator(
+            HomeAssistant(str(tmp_path)), logging.getLogger(__name__), appliance, name="test"
+        )
+
+    return asyncio.run(create())
+
+
+def update(appliance, values, data: dict):
+    appliance.snapshot = values.update(data)
+
+
+def test_only_changed_keys_are_notified(coordinator, appliance, values):
+    listeners = Listeners(coordinator, "a", "b", None)
+    update(appliance, values, {"a": 1, "b": 1})
+    coordinator.async_update_listeners()
+    assert listeners.take() == [None, "a", "b"]
+
+    update(appliance, values, {"a": 2, "b": 1})
+    coordinator.async_update_listeners()
+    # Listeners without a key are called on every update
+    assert listeners.take() == [None, "a"]
+
+    coordinator.async_update_listeners()
+    assert listeners.take() == [None]
+    assert coordinator.skipped_count == 3
+
+
+def test_message_data_only_compares_keys_of_the_message(coordinator, appliance, values):
+    listeners = Listeners(coordinator, "a", "b", "derived")
+    update(appliance, values, {"a": 1, "b": 1, "derived": 1})
+    coordinator.async_set_message_data(32)
+    listeners.take()
+
+    update(appliance, values, {"a": 2, "b": 2, "derived": 2})
+    coordinator.async_set_message_data(32)
+    # b is only carried by message 33
+    assert listeners.take() == ["a", "derived"]
+    # Then message 33 comes in, with the same b
+    update(appliance, values, {"b": 2})
+    coordinator.async_set_message_data(33)
+    assert listeners.take() == ["b"]
+
+
+def test_other_message_keys_follow_the_message_profile(coordinator, appliance, values):
+    listeners = Listeners(coordinator, "a", "b")
+    update(appliance, values, {"a": 1, "b": 1})
+    coordinator.async_set_message_data(32)
+    listeners.take()
+
+    # The heater learned that message 32 carries b as well
+    appliance.message_keys = {32: frozenset({"a", "b"}), 33: frozenset({"b"})}
+    appliance.message_ids = [32]
+    update(appliance, values, {"b": 2})
+    coordinator.async_set_message_data(32)
+    assert listeners.take() == ["b"]
+
+
+def test_everyone_is_notified_when_success_flips(coordinator, appliance, values):
+    listeners = Listeners(coordinator, "a", "b")
+    update(appliance, values, {"a": 1, "b": 1})
+    coordinator.async_update_listeners()
+    listeners.take()
+
+    appliance.link.is_open = True
+    coordinator.async_set_message_data(None)
+    assert coordinator.last_update_success is False
+    assert listeners.take() == ["a", "b"]
+    coordinator.async_set_message_data(None)
+    assert listeners.take() == []
+
+
+def test_stale_keys_are_notified_once(coordinator, appliance, values):
+    listeners = Listeners(coordinator, "a", "b")
+    coordinator.set_stale_after("a", 0.05)
+    update(appliance, values, {"a": 1, "b": 1})
+    coordinator.async_update_listeners()
+    listeners.take()
+
+    time.sleep(0.1)
+    coordinator.async_update_listeners()
+    assert listeners.take() == ["a"]
+    coordinator.async_update_listeners()
+    assert listeners.take() == []
+
+    # A fresh value of the same value is news again
+    update(appliance, values, {"a": 1})
+    coordinator.async_update_listeners()
+    assert listeners.take() == ["a"]
@@ -0,0 +1,141 @@
+from datetime import date, datetime, timedelta
+
+from impl.cycles import BurnerCycleDetector, BurnerPhase
+from impl.snapshot import ValueTable
+
+# Noon, so that a few minutes either way stay on the same day
+NOON_MS = datetime(2026, 1, 15, 12).timestamp() * 1000
+
+
+def feed(detector: BurnerCycleDetector, samples):
+    """Feed (seconds after noon, ignition, output) samples."""
+    for seconds, ignition, output in samples:
+        detector.feed(NOON_MS + seconds * 1000, ignition, output)
+
+
+def test_full_cycle():
+    detector = BurnerCycleDetector(hold_off_sec=60)
+    feed(detector, [(0, False, 0)])
+    assert detector.phase is BurnerPhase.OFF
+    feed(detector, [(10, True, 0)])
+    assert detector.phase is BurnerPhase.IGNITION
+    feed(detector, [(70, False, 30)])
+    assert detector.phase is BurnerPhase.BURNING
+    feed(detector, [(1000, False, 0)])
+    assert detector.phase is BurnerPhase.SHUTDOWN
+    assert detector.cycle_count == 0
+    feed(detector, [(1059, False, 0)])
+    assert detector.phase is BurnerPhase.SHUTDOWN
+    feed(detector, [(1060, False, 0)])
+    assert detector.phase is BurnerPhase.OFF
+    assert detector.cycle_count == 1
+    # From ignition to the output dropping to zero
+    assert detector.last_cycle_duration == 990
+    assert detector.average_cycle_duration == 990
+    assert detector.cycles_today == 1
+
+
+def test_modulation_within_hold_off_is_one_cycle():
+    detector = BurnerCycleDetector(hold_off_sec=60)
+    feed(detector, [(0, True, 0), (10, False, 50), (100, False, 0), (130, False, 20)])
+    assert detector.phase is BurnerPhase.BURNING
+    feed(detector, [(200, False, 0), (300, False, 0)])
+    assert detector.cycle_count == 1
+    assert detector.last_cycle_duration == 200
+
+
+def test_ignition_during_hold_off_ends_the_cycle():
+    detector = BurnerCycleDetector(hold_off_sec=600)
+    feed(detector, [(0, True, 0), (10, False, 50), (100, False, 0), (120, True, 0)])
+    assert detector.cycle_count == 1
+    assert detector.last_cycle_duration == 100
+    assert detector.phase is BurnerPhase.IGNITION
+
+
+def test_failed_ignition_is_not_a_cycle():
+    detector = BurnerCycleDetector(hold_off_sec=60)
+    feed(detector, [(0, True, 0), (30, False, 0)])
+    assert detector.phase is BurnerPhase.OFF
+    assert detector.cycle_count == 0
+
+
+def test_unknown_values_change_nothing():
+    detector = BurnerCycleDetector(hold_off_sec=60)
+    feed(detector, [(0, None, None), (10, True, None), (20, None, None)])
+    assert detector.phase is BurnerPhase.IGNITION
+
+
+def test_without_ignition_signal():
+    detector = BurnerCycleDetector(ignition_key=None, hold_off_sec=60)
+    table = ValueTable()
+    for seconds, output in [(0, 0), (10, 40), (50, 0), (110, 0)]:
+        detector.update(
+            table.update({"last_timestamp": NOON_MS + seconds * 1000, "boiler_output": output})
+        )
+    assert detector.cycle_count == 1
+    assert detector.last_cycle_duration == 40
+
+
+def test_same_snapshot_is_fed_once():
+    detector = BurnerCycleDetector(hold_off_sec=60)
+    table = ValueTable()
+    snapshot = table.update({"last_timestamp": NOON_MS, "ignition": True})
+    detector.update(snapshot)
+    detector.update(snapshot)
+    # No new sample, last_timestamp did not change
+    detector.update(table.update({"ignition": False}))
+    assert detector.phase is BurnerPhase.IGNITION
+
+
+def test_daily_counts_roll_over():
+    detector = BurnerCycleDetector(hold_off_sec=0, histogram_days=3)
+    day_sec = 24 * 3600
+    for day, cycles in enumerate([2, 1, 0, 3]):
+        for i in range(cycles):
+            start = day * day_sec + i * 1000
+            feed(detector, [(start, True, 0), (start + 10, False, 10), (start + 20, False, 0)])
+        # A sample each day, so that days without cycles are counted too
+        feed(detector, [(day * day_sec + 5000, False, 0)])
+    today = date.fromtimestamp(NOON_MS / 1000) + timedelta(days=3)
+    assert detector.cycles_per_day() == {
+        (today - timedelta(days=2)).isoformat(): 1,
+        (today - timedelta(days=1)).isoformat(): 0,
+        today.isoformat(): 3,
+    }
+    assert detector.cycles_today == 3
+    assert detector.cycle_count == 6
+
+
+def test_restore():
+    detector = BurnerCycleDetector(hold_off_sec=60)
+    day = date.fromtimestamp(NOON_MS / 1000)
+    detector.restore_cycle_count(10)
+    detector.restore_last_cycle_duration(300)
+    detector.restore_average_cycle_duration(200, 4)
+    detector.restore_cycles_per_day(
+        {(day - timedelta(days=1)).isoformat(): 5, day.isoformat(): 2}
+    )
+    assert detector.cycles_today == 2
+    feed(detector, [(0, True, 0), (10, False, 20), (100, False, 0), (160, False, 0)])
+    assert detector.cycle_count == 11
+    assert detector.last_cycle_duration == 100
+    assert detector.average_cycle_duration == (200 * 4 + 100) / 5
+    assert detector.cycles_today == 3
+    assert detector.cycles_per_day()[(day - timedelta(days=1)).isoformat()] == 5
+
+
+def test_restore_from_state_attributes():
+    detector = BurnerCycleDetector(hold_off_sec=60)
+    day = date.fromtimestamp(NOON_MS / 1000)
+    # What HomeAssistant stores for the cycles today sensor
+    attributes = {
+        (day - timedelta(days=1)).isoformat(): 4,
+        day.isoformat(): 2,
+        "state_class": "measurement",
+        "unit_of_measurement": None,
+        "friendly_name": "easyfire_1 boiler Burner Cycles Today",
+        "icon": "mdi:fire",
+    }
+    detector.restore_cycles_per_day(attributes)
+    assert detector.cycles_today == 2
+    assert detector.cycles_per_day()[(day - timedelta(days=1)).isoformat()] == 4
@@ -0,0 +1,60 @@
+"""Deadband filtering of CoordinatedSensor writes. Needs Home Assistant."""
+import asyncio
+from datetime import timedelta
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from impl.snapshot import ValueTable
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.kwb_heaters.coordinator import Coordinator  # noqa: E402
+from custom_components.kwb_heaters.src.api.platform.sensor.sensor_coordinated import (  # noqa: E402
+    CoordinatedSensor,
+)
+from custom_components.kwb_heaters.src.api.platform.sensor.sensor_deadband import (  # noqa: E402
+    Deadband,
+)
+from custom_components.kwb_heaters.src.api.platform.sensor.sensor_description import (  # noqa: E402
+    SensorDescription,
+)
+
+MAX_HOLD = timedelta(seconds=0.05)
+
+
+def test_held_back_change_is_written_when_max_hold_is_up(tmp_path):
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        values = ValueTable()
+        appliance = SimpleNamespace(snapshot=values.snapshot)
+        coordinator = Coordinator(hass, logging.getLogger(__name__), appliance, name="test")
+        sensor = CoordinatedSensor(
+            coordinator,
+            SensorDescription(
+                key="temperature", deadband=Deadband(absolute=0.5, max_hold=MAX_HOLD)
+            ),
+            {"identifiers": {("kwb_heaters", "test")}},
+        )
+        sensor.hass = hass
+        written = []
+        sensor.async_write_ha_state = lambda: written.append(sensor.native_value)
+        coordinator.async_add_listener(sensor._handle_coordinator_update, "temperature")
+
+        appliance.snapshot = values.update({"temperature": 20.0})
+        coordinator.async_update_listeners()
+        appliance.snapshot = values.update({"temperature": 20.3})
+        coordinator.async_update_listeners()
+        assert written == [20.0]
+        assert sensor.native_value == 20.0
+
+        # The value holds steady, so the coordinator does not call again
+        coordinator.async_update_listeners()
+        await asyncio.sleep(MAX_HOLD.total_seconds() * 3)
+        assert written == [20.0, 20.3]
+        assert sensor.suppressed_writes == 1
+
+    asyncio.run(run())
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from decode_throughput import compare_with_pykwb, load_maps, synthetic_signal_maps
+from fake_heater import MESSAGE_IDS, payload_size
+from impl.protocol.compiled import CompiledMessageDecoder
+from impl.protocol.decoder import (
+    MessageDecoder,
+    SignalMapLayoutError,
+    check_signal_maps,
+    message_keys,
+)
+from impl.protocol.frame import Frame
+
+# Every kind of signal: overlapping values, sizes struct cannot read,
+# scales, bits and signals past the end of short payloads
+MIXED_MAP = {
+    "Unsigned": ("u", 0, 2, None, None, "", None, None),
+    "Signed": ("s", 2, 2, 0.1, "°C", "", None, None),
+    "Overlapping": ("u", 1, 2, None, None, "", None, None),
+    "Byte": ("s", 4, 1, 0.5, None, "", None, None),
+    "Word": ("u", 5, 4, 0.01, None, "word_key", None, None),
+    "Odd Size": ("u", 9, 3, None, None, "", None, None),
+    "Scale One": ("u", 12, 2, 1, None, "", None, None),
+    "Far Value": ("u", 60, 2, None, None, "", None, None),
+    "Bit 0": ("b", 14, 0, None, None, "", None, None),
+    "Bit 7": ("b", 14, 7, None, None, "", None, None),
+    "Far Bit": ("b", 70, 3, None, None, "", None, None),
+}
+
+
+def random_payloads(size: int, count: int, seed: int):
+    rng = random.Random(seed)
+    return [bytes(rng.getrandbits(8) for _ in range(size)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("message_id", MESSAGE_IDS)
+def test_compiled_matches_generic_on_synthetic_maps(message_id):
+    signal_maps = synthetic_signal_maps()
+    generic = MessageDecoder(signal_maps, MESSAGE_IDS)
+    compiled = CompiledMessageDecoder(signal_maps, MESSAGE_IDS)
+    for payload in random_payloads(payload_size(message_id), 50, message_id):
+        frame = Frame(message_id, payload)
+        assert compiled.decode(frame) == generic.decode(frame)
+
+
+@pytest.mark.parametrize("size", [0, 1, 5, 13, 15, 61, 71, 80])
+def test_compiled_matches_generic_on_mixed_map(size):
+    signal_maps = [None] * 40 + [MIXED_MAP]
+    generic = MessageDecoder(signal_maps, [40])
+    compiled = CompiledMessageDecoder(signal_maps, [40])
+    for payload in random_payloads(size, 20, size):
+        frame = Frame(40, payload)
+        assert compiled.decode(frame) == generic.decode(frame)
+
+
+def test_decode_values():
+    signal_maps = [None] * 40 + [MIXED_MAP]
+    payload = bytes.fromhex("0102ff9c0a000003e80000010000" + "81") + bytes(60)
+    data = CompiledMessageDecoder(signal_maps, [40]).decode(Frame(40, payload))
+    assert data["unsigned"] == 0x0102
+    assert data["signed"] == -10.0
+    assert data["byte"] == 5.0
+    assert data["word_key"] == 10.0
+    assert data["odd_size"] == 1
+    assert data["bit_0"] is True
+    assert data["bit_7"] is True
+    assert data["far_bit"] is False
+
+
+def test_unwanted_and_unknown_message_ids_decode_to_nothing():
+    signal_maps = synthetic_signal_maps()
+    for decoder_class in (MessageDecoder, CompiledMessageDecoder):
+        decoder = decoder_class(signal_maps, [32])
+        assert decoder.decode(Frame(33, bytes(120))) == {}
+        decoder.message_ids = {33, 300}
+        assert decoder.decode(Frame(33, bytes(120)))
+        assert decoder.decode(Frame(300, bytes(120))) == {}
+
+
+def test_message_keys():
+    keys = message_keys([None, MIXED_MAP])
+    assert set(keys) == {1}
+    assert {"unsigned", "word_key", "far_bit"} <= keys[1]
+
+
+def test_check_signal_maps():
+    check_signal_maps(synthetic_signal_maps(), MESSAGE_IDS)
+    with pytest.raises(SignalMapLayoutError):
+        check_signal_maps([{"Odd": ("u", "offset", 2, None)}], [0])
+    # Message ids that are not read are not checked
+    check_signal_maps([{"Odd": ("u", "offset", 2, None)}], [1])
+
+
+def test_native_reader_matches_pykwb():
+    kwb = pytest.importorskip("pykwb.kwb")
+    if not hasattr(kwb, "KWBMessageStream"):
+        pytest.skip("needs the pykwb version with KWBMessageStream")
+    signal_maps, _ = load_maps()
+    message_ids = [message_id for message_id in MESSAGE_IDS if signal_maps[message_id]]
+    assert compare_with_pykwb(signal_maps, message_ids) == {}
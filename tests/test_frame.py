@@ -0,0 +1,130 @@
+import random
+
+import pytest
+
+from impl.protocol.frame import (
+    CONTROL,
+    CONTROL_DATA_SIZE,
+    ESCAPE,
+    Frame,
+    FrameParser,
+    checksum,
+    encode_frame,
+    escape,
+    unescape,
+)
+
+
+def reference_checksum(data: bytes) -> int:
+    """The rotate-left-and-add sum as pykwb 0.0.21 computes it."""
+    value = 0
+    for byte in data:
+        value = ((value << 1) | (value >> 7)) & 0xFF
+        value += byte
+        if value > 255:
+            value -= 255
+    return value
+
+
+def test_checksum_table_matches_reference():
+    for value in range(256):
+        for byte in range(256):
+            # One byte after a sum of value: feed a prefix that produces value
+            assert checksum(bytes((value, byte))) == reference_checksum(
+                bytes((value, byte))
+            )
+
+
+def test_checksum_of_random_data():
+    rng = random.Random(1)
+    for _ in range(200):
+        data = bytes(rng.getrandbits(8) for _ in range(rng.randint(0, 300)))
+        assert checksum(data) == reference_checksum(data)
+
+
+def test_escape_round_trip():
+    data = bytes(range(8)) * 4
+    assert b"\x02\x00" in escape(data)
+    assert unescape(escape(data)) == data
+
+
+def test_sense_frame_round_trip():
+    payload = bytes(range(120))
+    (frame,) = FrameParser().feed(encode_frame(32, payload, counter=7))
+    assert frame == Frame(32, payload, counter=7)
+
+
+def test_control_frame_round_trip():
+    # Control data is not escaped, 0x02 in it is taken as is
+    payload = bytes([2, 0] * 8)
+    (frame,) = FrameParser().feed(encode_frame(64, payload, 3, CONTROL))
+    assert frame == Frame(64, payload, CONTROL, 3)
+
+
+def test_encode_rejects_bad_frames():
+    with pytest.raises(ValueError):
+        encode_frame(64, bytes(CONTROL_DATA_SIZE - 1), frame_type=CONTROL)
+    with pytest.raises(ValueError):
+        encode_frame(64, bytes(CONTROL_DATA_SIZE), frame_type=ESCAPE)
+    with pytest.raises(ValueError):
+        # Escaping makes it longer than the length byte can say
+        encode_frame(32, b"\x02" * 200)
+
+
+def test_resync_skips_garbage():
+    parser = FrameParser()
+    frame = encode_frame(33, bytes(range(40)))
+    frames = parser.feed(b"\xff\x13\x37" + frame + b"\x10\x11" + frame)
+    assert [f.message_id for f in frames] == [33, 33]
+    assert parser.stats.frames == 2
+    assert parser.stats.skipped_bytes == 5
+    assert parser.stats.resyncs == 2
+
+
+def test_escaped_sync_outside_frame_is_skipped():
+    parser = FrameParser()
+    frames = parser.feed(b"\x02\x00" + encode_frame(32, b"\x01\x02\x03"))
+    assert frames == [Frame(32, b"\x01\x02\x03")]
+    assert parser.stats.bad_checksums == 0
+
+
+def test_bad_checksum_is_dropped_and_counted():
+    parser = FrameParser()
+    good = encode_frame(32, bytes(range(50)))
+    bad = bytearray(good)
+    bad[10] ^= 0xFF
+    frames = parser.feed(bytes(bad) + good)
+    assert frames == [Frame(32, bytes(range(50)))]
+    # The corrupt frame, and any false sync bytes found while resyncing
+    assert parser.stats.bad_checksums >= 1
+    assert parser.stats.frames == 1
+
+
+def test_every_bad_checksum_is_counted():
+    parser = FrameParser()
+    # No 0x02 in the data, so there are no false sync bytes to resync to
+    bad = bytearray(encode_frame(64, bytes(range(16, 32)), frame_type=CONTROL))
+    bad[-1] ^= 0x01
+    assert b"\x02" not in bad[1:]
+    parser.feed(bytes(bad) * 3)
+    assert parser.stats.bad_checksums == 3
+    assert parser.stats.frames == 0
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_split_feeds(chunk_size):
+    rng = random.Random(chunk_size)
+    sent = [
+        Frame(32, bytes(rng.getrandbits(8) for _ in range(120)), counter=1),
+        Frame(64, bytes(rng.getrandbits(8) for _ in range(16)), CONTROL, 2),
+        Frame(33, b"\x02" * 10, counter=3),
+    ]
+    data = b"".join(
+        encode_frame(f.message_id, f.payload, f.counter, f.frame_type) for f in sent
+    )
+    parser = FrameParser()
+    received = []
+    for i in range(0, len(data), chunk_size):
+        received += parser.feed(data[i : i + chunk_size])
+    assert received == sent
+    assert parser.stats.bad_checksums == 0
@@ -0,0 +1,97 @@
+from impl.protocol.link import LinkMonitor, LinkState
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def monitor(clock: Clock, jitter: float = 1.0) -> LinkMonitor:
+    return LinkMonitor(
+        base_delay=5,
+        max_delay=60,
+        backoff_after=2,
+        open_after=5,
+        name="test",
+        clock=clock,
+        jitter=lambda: jitter,
+    )
+
+
+def test_transitions():
+    clock = Clock()
+    link = monitor(clock)
+    states = []
+    link.add_listener(states.append)
+
+    link.failed(OSError("refused"))
+    assert link.state is LinkState.DEGRADED
+    link.failed()
+    assert link.state is LinkState.BACKING_OFF
+    for _ in range(3):
+        link.failed()
+    assert link.state is LinkState.OPEN_CIRCUIT
+    assert link.is_open
+
+    link.succeeded(complete=False)
+    assert link.state is LinkState.DEGRADED
+    assert link.failures == 0
+    link.succeeded()
+    assert link.state is LinkState.CONNECTED
+    assert link.next_retry is None
+    assert states == [
+        LinkState.DEGRADED,
+        LinkState.BACKING_OFF,
+        LinkState.BACKING_OFF,
+        LinkState.BACKING_OFF,
+        LinkState.OPEN_CIRCUIT,
+        LinkState.DEGRADED,
+        LinkState.CONNECTED,
+    ]
+
+
+def test_backoff_doubles_up_to_max_delay():
+    clock = Clock()
+    link = monitor(clock)
+    delays = []
+    for _ in range(8):
+        link.failed()
+        delays.append(link.retry_in())
+    assert delays == [5, 5, 10, 20, 40, 60, 60, 60]
+
+
+def test_jitter_shortens_delay_to_half_at_most():
+    clock = Clock()
+    link = monitor(clock, jitter=0.0)
+    link.failed()
+    assert link.retry_in() == 2.5
+
+
+def test_may_attempt_after_retry_time():
+    clock = Clock()
+    link = monitor(clock)
+    assert link.may_attempt()
+    link.failed()
+    assert not link.may_attempt()
+    clock.now += 4.9
+    assert not link.may_attempt()
+    clock.now += 0.1
+    assert link.may_attempt()
+    assert link.retry_in() == 0
+
+
+def test_success_notifies_only_on_change():
+    link = monitor(Clock())
+    states = []
+    remove = link.add_listener(states.append)
+    link.succeeded()
+    assert states == []
+    link.failed()
+    link.succeeded()
+    assert states == [LinkState.DEGRADED, LinkState.CONNECTED]
+    remove()
+    link.failed()
+    assert len(states) == 2
@@ -0,0 +1,98 @@
+import graphlib
+
+import pytest
+
+from impl.config.sensor.metrics import heater_metrics
+from impl.metrics import Integral, Metric, MetricEngine
+
+
+def test_integral_trapezoid():
+    integral = Integral(max_gap_sec=60)
+    assert integral(10.0, 0) == 0
+    # 10 kW to 20 kW over 60 s is 15 kW for a minute
+    assert integral(20.0, 60_000) == pytest.approx(0.25)
+
+
+def test_integral_skips_gaps():
+    integral = Integral(max_gap_sec=15)
+    integral(36.0, 0)
+    integral(36.0, 10_000)
+    # Ten hours without samples count for nothing, the next interval does
+    assert integral(36.0, 36_010_000) == pytest.approx(0.1)
+    assert integral(36.0, 36_020_000) == pytest.approx(0.2)
+
+
+def test_integral_skips_clock_going_back():
+    integral = Integral(max_gap_sec=60)
+    integral(10.0, 60_000)
+    assert integral(10.0, 0) == 0
+    assert integral(10.0, 0) == 0
+
+
+def test_integral_restore_adds_to_total():
+    integral = Integral(max_gap_sec=15)
+    integral(36.0, 0)
+    integral(36.0, 10_000)
+    integral.restore("100")
+    assert integral.total == pytest.approx(100.1)
+
+
+def test_engine_evaluates_in_dependency_order():
+    engine = MetricEngine(
+        [
+            Metric("double_sum", ("sum",), lambda value: value * 2),
+            Metric("sum", ("a", "b"), lambda a, b: a + b),
+        ]
+    )
+    assert engine.evaluate({"a": 1, "b": 2}) == {"sum", "double_sum"}
+    assert engine.value("double_sum") == 6
+
+
+def test_engine_skips_unchanged_and_missing_inputs():
+    calls = []
+
+    def add(a, b):
+        calls.append((a, b))
+        return a + b
+
+    engine = MetricEngine([Metric("sum", ("a", "b"), add)])
+    snapshot = {"a": 1, "b": 2}
+    engine.evaluate(snapshot)
+    # The same snapshot again, and a new one with the same inputs
+    engine.evaluate(snapshot)
+    assert engine.evaluate({"a": 1, "b": 2, "c": 3}) == set()
+    assert engine.evaluate({"a": 1}) == set()
+    assert calls == [(1, 2)]
+    assert engine.value("sum") == 3
+
+
+def test_engine_restores_integrals_only():
+    engine = MetricEngine(
+        [
+            Metric("energy", ("power", "t"), Integral(max_gap_sec=15)),
+            Metric("double", ("energy",), lambda energy: energy * 2),
+        ]
+    )
+    engine.restore("energy", 5.0)
+    engine.restore("double", 99.0)
+    assert engine.value("energy") == 5.0
+    assert engine.value("double") is None
+    engine.evaluate({"power": 1.0, "t": 0})
+    assert engine.value("double") == 10.0
+
+
+def test_engine_rejects_cycles():
+    with pytest.raises(graphlib.CycleError):
+        MetricEngine([Metric("a", ("b",), abs), Metric("b", ("a",), abs)])
+
+
+def test_pellet_consumption_is_a_total_of_its_own():
+    # 90 % efficiency, 5 kWh/kg, read every minute
+    engine = MetricEngine(heater_metrics(90, 5.0, 60))
+    engine.restore("boiler_energy_output", 1000.0)
+    engine.restore("pellet_consumption", 20.0)
+    engine.evaluate({"boiler_power": 9.0, "last_timestamp": 0})
+    engine.evaluate({"boiler_power": 9.0, "last_timestamp": 60_000})
+    # 10 kW of pellets for a minute are 2 kg/h for a minute
+    assert engine.value("pellet_consumption") == pytest.approx(20.0 + 2 / 60)
+    assert engine.value("boiler_energy_output") == pytest.approx(1000.15)
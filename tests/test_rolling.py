@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from impl.rolling import RollingStats, RollingWindow, Statistic
+from impl.snapshot import ValueTable
+
+
+def test_empty_window():
+    window = RollingWindow(60)
+    assert len(window) == 0
+    for statistic in Statistic:
+        assert window.statistic(statistic) is None
+
+
+def test_min_max_mean_rate():
+    window = RollingWindow(600, capacity=600)
+    for t, value in enumerate([3.0, 1.0, 4.0, 1.0, 5.0]):
+        assert window.add(t * 60, value)
+    assert window.min == 1.0
+    assert window.max == 5.0
+    assert window.mean == pytest.approx(2.8)
+    # From 3 to 5 in 4 minutes
+    assert window.rate == pytest.approx(0.5)
+
+
+def test_old_samples_expire():
+    window = RollingWindow(100, capacity=100)
+    window.add(0, 10.0)
+    window.add(50, 1.0)
+    window.add(120, 5.0)
+    # The sample at 0 is older than 100 s
+    assert len(window) == 2
+    assert window.max == 5.0
+    assert window.min == 1.0
+    window.expire(300)
+    assert len(window) == 0
+    assert window.mean is None
+
+
+def test_min_max_follow_expiry():
+    window = RollingWindow(10, capacity=10)
+    for t, value in enumerate([9.0, 1.0, 5.0, 7.0]):
+        window.add(t * 4, value)
+    # Only the samples at 4, 8 and 12 are left
+    assert (window.min, window.max) == (1.0, 7.0)
+    window.expire(15)
+    # Only 8 and 12
+    assert (window.min, window.max) == (5.0, 7.0)
+
+
+def test_samples_closer_than_min_interval_are_skipped():
+    window = RollingWindow(60, capacity=6)
+    assert window.add(0, 1.0)
+    assert not window.add(5, 2.0)
+    assert window.add(10, 3.0)
+    assert len(window) == 2
+
+
+def test_capacity_drops_oldest():
+    window = RollingWindow(100, capacity=4)
+    for t in range(5):
+        assert window.add(t * 25, float(t))
+    # The sample at 0 is still in the window, but there is no room for it
+    assert len(window) == 4
+    assert (window.min, window.max) == (1.0, 4.0)
+
+
+def test_rate_needs_time_between_samples():
+    window = RollingWindow(60)
+    window.add(0, 1.0)
+    assert window.rate is None
+
+
+def test_rolling_stats_samples_each_recorded_value_once():
+    # Windows expire by time.monotonic(), record the values in the last hour
+    start = time.monotonic() - 100
+    table = ValueTable()
+    stats = RollingStats("temperature", [3600])
+    snapshot = table.update({"temperature": 20.0}, now=start)
+    stats.update(snapshot)
+    stats.update(snapshot)
+    # Other keys changed, temperature was not recorded again
+    stats.update(table.update({"other": 1}, now=start + 20))
+    stats.update(table.update({"temperature": 22.0}, now=start + 40))
+    assert len(stats.windows[3600]) == 2
+    assert stats.value(3600, Statistic.MEAN) == 21.0
@@ -0,0 +1,58 @@
+import time
+
+from impl.snapshot import EVICT_CHECK_SEC, ValueTable
+
+
+def test_update_publishes_new_snapshots():
+    table = ValueTable()
+    first = table.update({"a": 1, "b": 2}, now=100.0)
+    second = table.update({"b": 3, "c": 4}, now=101.0)
+    assert second.version == first.version + 1
+    # Snapshots never change once published
+    assert dict(first) == {"a": 1, "b": 2}
+    assert dict(second) == {"a": 1, "b": 3, "c": 4}
+    assert "c" not in first
+    assert first.get("c", "missing") == "missing"
+    assert table.snapshot is second
+
+
+def test_empty_update_keeps_snapshot():
+    table = ValueTable()
+    snapshot = table.update({"a": 1})
+    assert table.update({}) is snapshot
+
+
+def test_slots_are_stable_and_track_freshness():
+    table = ValueTable()
+    table.update({"a": 1}, now=100.0)
+    snapshot = table.update({"b": 2}, now=110.0)
+    slot = snapshot.slot("a")
+    assert snapshot.value_at(slot) == 1
+    assert snapshot.seen_at(slot) == 100.0
+    assert snapshot.is_fresh(slot, 15, now=114.0)
+    assert not snapshot.is_fresh(slot, 5, now=114.0)
+    assert snapshot.is_fresh(slot, None, now=1e9)
+    assert not snapshot.is_fresh(None, None, now=0)
+
+
+def test_eviction_drops_old_keys_and_renumbers():
+    # The table looks for keys to drop EVICT_CHECK_SEC after it was made
+    start = time.monotonic()
+    table = ValueTable(evict_after=50)
+    table.update({"old": 1, "kept": 2}, now=start)
+    before = table.update({"kept": 3}, now=start + EVICT_CHECK_SEC - 10)
+    after = table.update({"new": 4}, now=start + EVICT_CHECK_SEC + 1)
+    assert dict(after) == {"kept": 3, "new": 4}
+    assert after.slot("old") is None
+    assert after.slot("kept") == 0
+    # Snapshots made before keep their own index
+    assert dict(before) == {"old": 1, "kept": 3}
+    assert before.slot("old") == 0
+
+
+def test_no_eviction_before_check_interval():
+    start = time.monotonic()
+    table = ValueTable(evict_after=1)
+    table.update({"a": 1}, now=start)
+    snapshot = table.update({"b": 2}, now=start + EVICT_CHECK_SEC / 2)
+    assert "a" in snapshot
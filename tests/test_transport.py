@@ -0,0 +1,96 @@
+"""FrameStream reading from the fake heaters in tools/ over TCP and a pty."""
+import asyncio
+import random
+
+import pytest
+
+from decode_throughput import synthetic_signal_maps
+from fake_heater import MESSAGE_IDS, FakeHeater, encode_message, payload_size
+from impl.derived import DerivedValues
+from impl.protocol.compiled import CompiledMessageDecoder
+from impl.protocol.decoder import message_keys
+from impl.protocol.serial_port import SerialByteSource
+from impl.protocol.stream import FrameStream, TCPByteSource
+from pty_heater import PtyHeater
+
+
+def frame_stream(source) -> FrameStream:
+    return FrameStream(
+        source=source,
+        decoder=CompiledMessageDecoder(synthetic_signal_maps(), MESSAGE_IDS),
+        derived=DerivedValues({}, {}),
+        connect_timeout=1,
+    )
+
+
+def read_from_fake_heater(reads: int, **heater_options) -> tuple[FrameStream, list[dict]]:
+    """Start a FakeHeater and do reads read_data_once() calls against it."""
+
+    def read(port: int):
+        stream = frame_stream(TCPByteSource("127.0.0.1", port))
+        stream.open()
+        try:
+            return stream, [stream.read_data_once(MESSAGE_IDS, 5) for _ in range(reads)]
+        finally:
+            stream.close()
+
+    async def run():
+        async with FakeHeater(port=0, seed=1, **heater_options) as heater:
+            return await asyncio.to_thread(read, heater.port)
+
+    return asyncio.run(run())
+
+
+def all_keys() -> frozenset[str]:
+    keys = message_keys(synthetic_signal_maps())
+    return frozenset().union(*(keys[message_id] for message_id in MESSAGE_IDS))
+
+
+def test_fake_heater_over_tcp():
+    stream, reads = read_from_fake_heater(3, rate=200)
+    for data in reads:
+        assert all_keys() <= data.keys()
+        assert "last_timestamp" in data
+    assert stream.missing_message_ids == set()
+    assert stream.stats.bad_checksums == 0
+
+
+def test_fake_heater_with_noise_and_dropped_bytes():
+    stream, reads = read_from_fake_heater(5, rate=400, noise=0.3, drop=0.1)
+    assert all(reads)
+    assert stream.stats.frames
+    assert stream.stats.resyncs
+
+
+def test_pty_heater_over_serial():
+    rng = random.Random(0)
+    data = b"".join(
+        encode_message(
+            message_id, bytes(rng.getrandbits(8) for _ in range(payload_size(message_id)))
+        )
+        for message_id in MESSAGE_IDS
+    )
+    with PtyHeater() as heater:
+        stream = frame_stream(SerialByteSource(heater.device, 19200))
+        stream.open()
+        try:
+            # In pieces, the way a serial port delivers them
+            for i in range(0, len(data), 50):
+                heater.send(data[i : i + 50])
+            values = stream.read_data_once(MESSAGE_IDS, 5)
+        finally:
+            stream.close()
+    assert all_keys() <= values.keys()
+    assert stream.missing_message_ids == set()
+
+
+def test_pty_heater_gone():
+    with PtyHeater() as heater:
+        source = SerialByteSource(heater.device, 19200)
+        source.open(1)
+        try:
+            heater.close()
+            with pytest.raises(OSError):
+                source.read(1)
+        finally:
+            source.close()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Fake KWB heaters behind an RS485-to-LAN gateway, for load and latency tests.
+
+Each simulated boiler listens on its own TCP port (--port, --port + 1, ...)
+and broadcasts frames of message ids 32, 33, 64 and 65 to every client,
+like a gateway forwarding the bus. 32 and 33 are sent as sense frames
+with 120 bytes of data, 64 and 65 as control frames with 16 (see
+protocol/frame.py). Payload values drift slowly, so value change filters
+behave as they would on a real heater.
+
+Faults can be injected: garbage between frames (--noise), bytes dropped
+from frames (--drop) and clients disconnected at random (--disconnect).
+
+Configure the integration with host 127.0.0.1 and the printed ports, or
+read the first boiler through the integration's own Appliance with
+--measure, which needs Home Assistant and pykwb installed:
+
+    python tools/fake_heater.py --boilers 2 --rate 50 --noise 0.05
+    python tools/fake_heater.py --rate 500 --measure 10
+    python tools/fake_heater.py --measure 60 --connection scrape
+    python tools/fake_heater.py --measure 60 --capture /tmp/kwb.gz
+
+FakeHeater can also be started from test code:
+
+    async with FakeHeater(port=0, rate=100) as heater:
+        ... connect to heater.port ...
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+# Import the protocol package directly so that Home Assistant is not needed
+# to serve frames. --measure imports the integration from the repository root.
+sys.path.insert(0, os.path.join(ROOT, "custom_components", "kwb_heaters", "src", "impl"))
+sys.path.insert(1, ROOT)
+from protocol.frame import CONTROL, CONTROL_DATA_SIZE, encode_frame  # noqa: E402
+
+MESSAGE_IDS = [32, 33, 64, 65]
+# Sent as sense frames, the others as control frames
+SENSE_MESSAGE_IDS = {32, 33}
+SENSE_PAYLOAD_SIZE = 120
+
+
+def payload_size(message_id: int) -> int:
+    return SENSE_PAYLOAD_SIZE if message_id in SENSE_MESSAGE_IDS else CONTROL_DATA_SIZE
+
+
+def encode_message(message_id: int, payload: bytes, counter: int = 0) -> bytes:
+    """Encode payload as the kind of frame message_id is sent in."""
+    if message_id in SENSE_MESSAGE_IDS:
+        return encode_frame(message_id, payload, counter)
+    return encode_frame(message_id, payload, counter, CONTROL)
+
+
+class FakeHeater:
+    """One simulated boiler broadcasting frames to all connected clients."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8899,
+        rate: float = 20,
+        noise: float = 0.0,
+        drop: float = 0.0,
+        disconnect: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.host = host
+        self.port = port
+        # Frames per second, over all message ids
+        self.rate = rate
+        # Chance per frame of garbage before it
+        self.noise = noise
+        # Chance per frame of one byte missing from it
+        self.drop = drop
+        # Chance per second that each client is disconnected
+        self.disconnect = disconnect
+        self._rng = random.Random(seed)
+        self._payloads = {
+            message_id: bytearray(
+                self._rng.getrandbits(8) for _ in range(payload_size(message_id))
+            )
+            for message_id in MESSAGE_IDS
+        }
+        self._counters = dict.fromkeys(MESSAGE_IDS, 0)
+        self._clients: set[asyncio.StreamWriter] = set()
+        self._handlers: set[asyncio.Task] = set()
+        self._server: asyncio.base_events.Server | None = None
+        self._broadcast: asyncio.Task | None = None
+
+        # Statistics
+        self.frames_sent = 0
+        self.disconnects = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._broadcast = asyncio.create_task(self._broadcast_forever())
+
+    async def stop(self):
+        self._broadcast.cancel()
+        self._server.close()
+        for handler in self._handlers:
+            handler.cancel()
+        await asyncio.gather(*self._handlers)
+        await self._server.wait_closed()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        self._handlers.add(asyncio.current_task())
+        try:
+            # Clients never send anything, this only waits for them to go away
+            await reader.read()
+        except asyncio.CancelledError:
+            # Server is stopping. Finish normally, asyncio's stream callback
+            # logs handlers that end cancelled.
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            self._clients.discard(writer)
+            writer.close()
+
+    def next_frame(self, message_id: int) -> bytes:
+        """Drift a few values of message_id and encode it."""
+        payload = self._payloads[message_id]
+        for _ in range(3):
+            position = self._rng.randrange(len(payload))
+            payload[position] = (payload[position] + self._rng.choice((-1, 1))) % 256
+        counter = self._counters[message_id] = (self._counters[message_id] + 1) % 256
+        frame = encode_message(message_id, bytes(payload), counter)
+        if self.drop and self._rng.random() < self.drop:
+            position = self._rng.randrange(len(frame))
+            frame = frame[:position] + frame[position + 1 :]
+        if self.noise and self._rng.random() < self.noise:
+            garbage = bytes(self._rng.getrandbits(8) for _ in range(self._rng.randint(1, 32)))
+            frame = garbage + frame
+        return frame
+
+    async def _broadcast_forever(self):
+        interval = 1 / self.rate
+        next_send = time.monotonic()
+        message_index = 0
+        while True:
+            message_id = MESSAGE_IDS[message_index % len(MESSAGE_IDS)]
+            message_index += 1
+            frame = self.next_frame(message_id)
+            for writer in list(self._clients):
+                if self.disconnect and self._rng.random() < self.disconnect * interval:
+                    self.disconnects += 1
+                    writer.close()
+                    self._clients.discard(writer)
+                    continue
+                writer.write(frame)
+            self.frames_sent += 1
+
+            next_send += interval
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Behind schedule: yield so that clients and writes get served
+                await asyncio.sleep(0)
+
+
+def create_appliance(host: str, port: int, connection: str, capture: str | None = None):
+    """The integration's Appliance, configured to read a fake heater.
+
+    Only the message ids the fake heater sends are read. Needs Home
+    Assistant and pykwb, exits with a message if they are missing.
+    """
+    try:
+        from homeassistant.const import (
+            CONF_HOST,
+            CONF_PORT,
+            CONF_PROTOCOL,
+            CONF_TIMEOUT,
+            CONF_UNIQUE_ID,
+        )
+
+        from custom_components.kwb_heaters.const import (
+            CONF_CAPTURE_FILE,
+            CONF_CONNECTION,
+            CONF_MESSAGE_PROFILE,
+            PROTOCOL_TCP,
+        )
+        from custom_components.kwb_heaters.src.impl.appliance import Appliance
+        from custom_components.kwb_heaters.src.impl.config.signal_catalog import (
+            get_signal_catalog,
+        )
+    except ImportError as e:
+        sys.exit(f"Reading through the integration needs Home Assistant and pykwb: {e}")
+
+    return Appliance(
+        {
+            CONF_UNIQUE_ID: "fake",
+            CONF_HOST: host,
+            CONF_PORT: port,
+            CONF_PROTOCOL: PROTOCOL_TCP,
+            CONF_TIMEOUT: 2,
+            CONF_CONNECTION: connection,
+            CONF_CAPTURE_FILE: capture,
+            CONF_MESSAGE_PROFILE: {str(message_id): 1.0 for message_id in MESSAGE_IDS},
+        },
+        get_signal_catalog().signal_maps,
+    )
+
+
+def measure(
+    host: str, port: int, seconds: float, connection: str, capture: str | None = None
+):
+    """Read the heater through the integration's Appliance and report
+    reads per second, how long a read took and the frame counters.
+
+    Every read goes through the appliance's read path, like the scrape
+    (pykwb) or persistent (native reader) connection mode reads. Blocks,
+    run it on a thread next to the servers. If capture is set, the native
+    reader also records the received bytes to that file.
+    """
+    appliance = create_appliance(host, port, connection, capture)
+    durations = []
+    deadline = time.monotonic() + seconds
+    try:
+        if not appliance.native:
+            # Scrape: connects and disconnects on every read
+            while time.monotonic() < deadline:
+                appliance.scrape()
+                durations.append(appliance.last_scrape_duration)
+        else:
+            appliance.message_stream.open()
+            try:
+                while time.monotonic() < deadline:
+                    appliance._read_data_once()
+                    durations.append(appliance.last_scrape_duration)
+            finally:
+                appliance.message_stream.close()
+    finally:
+        appliance.close()
+
+    print(f"{len(durations) / seconds:,.1f} reads/s over {seconds}s, {connection} connection")
+    if durations:
+        durations.sort()
+        print(
+            f"read ms: p50 {durations[len(durations) // 2] * 1000:.3f}"
+            f"  p99 {durations[int(len(durations) * 0.99)] * 1000:.3f}"
+            f"  max {durations[-1] * 1000:.3f}"
+        )
+    if appliance.native:
+        stats = appliance.frame_stats
+        print(
+            f"frames: {stats.frames}  bad checksums: {stats.bad_checksums}"
+            f"  resyncs: {stats.resyncs}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899, help="port of the first boiler")
+    parser.add_argument("--boilers", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=20, help="frames per second per boiler")
+    parser.add_argument("--noise", type=float, default=0.0, help="chance of garbage per frame")
+    parser.add_argument("--drop", type=float, default=0.0, help="chance of a dropped byte per frame")
+    parser.add_argument(
+        "--disconnect", type=float, default=0.0, help="chance per second of dropping a client"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--measure", type=float, default=None, metavar="SECONDS",
+        help="read from the first boiler for SECONDS, print statistics and exit",
+    )
+    parser.add_argument(
+        "--connection", default="persistent", choices=["scrape", "persistent"],
+        help="with --measure, the connection type to read with",
+    )
+    parser.add_argument("--capture", default=None, help="with --measure, record to this file")
+    args = parser.parse_args()
+
+    heaters = [
+        FakeHeater(
+            host=args.host,
+            port=args.port + i if args.port else 0,
+            rate=args.rate,
+            noise=args.noise,
+            drop=args.drop,
+            disconnect=args.disconnect,
+            seed=None if args.seed is None else args.seed + i,
+        )
+        for i in range(args.boilers)
+    ]
+    for heater in heaters:
+        await heater.start()
+        print(f"Boiler on {heater.host}:{heater.port}, {heater.rate:g} frames/s")
+
+    try:
+        if args.measure:
+            # The servers keep running on this loop while the appliance reads
+            await asyncio.to_thread(
+                measure,
+                heaters[0].host,
+                heaters[0].port,
+                args.measure,
+                args.connection,
+                args.capture,
+            )
+        else:
+            await asyncio.Event().wait()
+    finally:
+        for heater in heaters:
+            await heater.stop()
+        sent = sum(heater.frames_sent for heater in heaters)
+        disconnects = sum(heater.disconnects for heater in heaters)
+        print(f"Sent {sent} frames, disconnected {disconnects} clients")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Pseudo terminal stand-in for a heater on a serial RS485 link.
+
+Opens a pty pair and writes KWB frames to it, the same kinds of frames
+as fake_heater.py. Configure the integration with protocol "serial" and
+the printed device to test the serial transport without an adapter.
+PtyHeater can also be used from test code:
+
+    with PtyHeater() as heater:
+        source = SerialByteSource(heater.device, 19200)
+        heater.send(encode_message(32, payload))
+
+Usage: python tools/pty_heater.py [--rate 4]
+"""
+import argparse
+import os
+import random
+import time
+import tty
+
+from fake_heater import MESSAGE_IDS, encode_message, payload_size
+
+
+class PtyHeater:
+    """The heater end of a pseudo terminal. Readers open device."""
+
+    def __init__(self):
+        self._master, self._slave = os.openpty()
+        # No line editing or echo, bytes pass through unchanged
+        tty.setraw(self._slave)
+        self.device = os.ttyname(self._slave)
+
+    def send(self, data: bytes):
+        os.write(self._master, data)
+
+    def close(self):
+        """Close both ends. Open readers see the link go down."""
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=4, help="frames per second")
+    args = parser.parse_args()
+
+    rng = random.Random()
+    with PtyHeater() as heater:
+        print(f"Sending frames on {heater.device}, Ctrl+C to stop")
+        try:
+            while True:
+                for message_id in MESSAGE_IDS:
+                    payload = bytes(
+                        rng.getrandbits(8) for _ in range(payload_size(message_id))
+                    )
+                    heater.send(encode_message(message_id, payload))
+                    time.sleep(1 / args.rate)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
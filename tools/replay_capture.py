@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Replay a raw traffic capture through the frame reader and decoder.
+
+Runs the same FrameStream.read_data_once() cycles an Appliance runs, fed
+from a capture file instead of the heater, and prints what was decoded.
+Uses pykwb's signal maps if pykwb is installed, synthetic ones otherwise.
+
+Record a capture with the integration's "Capture file" setting, or from
+the fake heater:
+
+    python tools/fake_heater.py --measure 60 --capture /tmp/kwb.gz
+    python tools/replay_capture.py /tmp/kwb.gz
+
+Usage: python tools/replay_capture.py FILE [--speed 0] [--show 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Import the integration's impl package directly so that Home Assistant is not needed
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "kwb_heaters", "src")
+)
+from impl.derived import DerivedValues  # noqa: E402
+from impl.protocol.capture import CaptureSource  # noqa: E402
+from impl.protocol.compiled import CompiledMessageDecoder  # noqa: E402
+from impl.protocol.stream import FrameStream  # noqa: E402
+
+MESSAGE_IDS = [32, 33, 64, 65]
+
+
+def load_maps():
+    try:
+        from pykwb.kwb import load_signal_maps
+    except ImportError:
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+        from decode_throughput import synthetic_signal_maps
+
+        return synthetic_signal_maps(), "synthetic"
+    return load_signal_maps(), "pykwb"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("file")
+    parser.add_argument(
+        "--speed", type=float, default=0, help="1 for real time, 0 as fast as possible"
+    )
+    parser.add_argument("--show", type=int, default=3, help="print the first N cycles")
+    args = parser.parse_args()
+
+    signal_maps, kind = load_maps()
+    source = CaptureSource(args.file, speed=args.speed)
+    stream = FrameStream(
+        source=source,
+        decoder=CompiledMessageDecoder(signal_maps, MESSAGE_IDS),
+        derived=DerivedValues({}, {}),
+        connect_timeout=1,
+        clock=source.clock,
+    )
+
+    cycles = 0
+    start = time.perf_counter()
+    stream.open()
+    try:
+        while True:
+            data = stream.read_data_once(MESSAGE_IDS, timeout=5)
+            if not data:
+                break
+            cycles += 1
+            if cycles <= args.show:
+                print(f"cycle {cycles}: {len(data)} values, e.g. {dict(list(data.items())[:4])}")
+    except ConnectionError:
+        # End of the capture
+        pass
+    finally:
+        stream.close()
+    elapsed = time.perf_counter() - start
+
+    stats = stream.stats
+    print(f"Replayed {args.file} with {kind} signal maps")
+    print(f"{cycles} read cycles, {stats.frames} frames in {elapsed:.2f}s")
+    print(
+        f"bad checksums: {stats.bad_checksums}  resyncs: {stats.resyncs}"
+        f"  skipped bytes: {stats.skipped_bytes}"
+    )
+
+
+if __name__ == "__main__":
+    main()